@@ -0,0 +1,82 @@
+import os
+import hashlib
+import threading
+from contextlib import contextmanager
+
+
+class AttachmentTextCache:
+    """On-disk cache of extracted attachment text, keyed by content hash
+
+    ``text/<sha256>.txt`` holds the extracted text of one file, so the same
+    PDF attached to several emails is parsed once. ``refs/<msg>_<part>``
+    maps a Gmail message part to its hash, so a cached attachment is not
+    even downloaded again. Only successful extractions are cached (a PDF
+    without text as empty text), so a failed one is retried.
+    """
+
+    def __init__(self, root="data/attachment_text"):
+        self.root = root
+        # (msg_id, part_id) -> [lock, holders and waiters]; dropped when unused
+        self._locks = {}
+        self._guard = threading.Lock()
+        os.makedirs(os.path.join(root, "text"), exist_ok=True)
+        os.makedirs(os.path.join(root, "refs"), exist_ok=True)
+
+    @staticmethod
+    def content_hash(data):
+        return hashlib.sha256(data).hexdigest()
+
+    def _text_path(self, digest):
+        return os.path.join(self.root, "text", f"{digest}.txt")
+
+    def _ref_path(self, msg_id, part_id):
+        safe = "".join(c if c.isalnum() or c in "-." else "_" for c in f"{msg_id}_{part_id}")
+        return os.path.join(self.root, "refs", safe)
+
+    def _write(self, path, content):
+        # Write then rename so readers never see a partial file; thread idents
+        # repeat across server worker processes, so the pid is in the name too
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp, path)
+
+    @contextmanager
+    def lock_for(self, msg_id, part_id):
+        """Context manager serializing work on one attachment (so it's downloaded once)"""
+        key = (msg_id, part_id)
+        with self._guard:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
+
+    def get_text(self, digest):
+        """Cached text for a content hash, or None if not cached"""
+        try:
+            with open(self._text_path(digest), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put_text(self, digest, text):
+        self._write(self._text_path(digest), text or "")
+
+    def get_ref(self, msg_id, part_id):
+        """Content hash previously recorded for a message part, or None"""
+        try:
+            with open(self._ref_path(msg_id, part_id), "r") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def put_ref(self, msg_id, part_id, digest):
+        self._write(self._ref_path(msg_id, part_id), digest)
@@ -1,18 +1,62 @@
-from fastapi import FastAPI, HTTPException
+import time
+_import_start = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 import os
 from dotenv import load_dotenv
 from anthropic import Anthropic
-from database import ArbitrationDB
-from email_reader import GmailReader
+from database import ArbitrationDB, CaseReferenceExists
+from attachment_cache import AttachmentTextCache
+from email_reader import GmailReader, GmailUnavailable, InboxSync
 from scc_rag_simple import SCCRagSystem
+from case_index import CaseIndex
+from case_router import CaseRouter
+from label_updater import LabelUpdater
+from inbox_events import InboxBroadcaster, InboxSyncWorker, format_sse
+from startup_profile import StartupProfile
+from process_lock import LeaderLock
+from case_generator import CaseGenerator, synthetic_case
+from llm_router import LLMUnavailable, default_router
+from case_archive import CONFLICT_MODES, ArchiveError, import_archive, iter_archive
 import json
+import math
+import random
+import re
+import tempfile
+import threading
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+try:
+    from brotli_asgi import BrotliMiddleware  # optional: pip install brotli-asgi
+except ImportError:
+    BrotliMiddleware = None
+
+startup_profile = StartupProfile()
+startup_profile.record("imports", time.perf_counter() - _import_start)
 
 load_dotenv()
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    # Background threads start here rather than at import: with gunicorn's
+    # preload the module is imported once in the master and every worker is
+    # forked from it, and threads don't survive a fork
+    threading.Thread(target=connect_gmail, name="gmail-connect", daemon=True).start()
+    sync_worker.start()
+    label_updater.start()
+    yield
+    sync_worker.stop()
+    label_updater.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS - allow frontend to access backend
 app.add_middleware(
@@ -23,15 +67,109 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize
-client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-db = ArbitrationDB()
-rag = SCCRagSystem(pdf_path="./SCC_Arbitration_Rules_2023_English.pdf")
+# Archive downloads are gzip files already (see archive_response)
+ARCHIVE_EXPORT_PATH = r"/api/cases(/\d+)?/export"
 
-try:
-    gmail_reader = GmailReader()
-except:
-    gmail_reader = None
+class ExportSkippingGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that passes archive exports through instead of compressing them again"""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and re.fullmatch(ARCHIVE_EXPORT_PATH, scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# Compress JSON responses (case payloads carry full email bodies); brotli when
+# available, falling back to gzip for clients that don't accept it. The event
+# stream is left alone so events are not held back in a compression buffer
+# (GZipMiddleware skips text/event-stream itself), and archive exports are
+# compressed already
+if BrotliMiddleware:
+    app.add_middleware(BrotliMiddleware, minimum_size=1000,
+                       excluded_handlers=[r"/api/emails/events", ARCHIVE_EXPORT_PATH])
+else:
+    app.add_middleware(ExportSkippingGZipMiddleware, minimum_size=1000)
+
+@app.exception_handler(LLMUnavailable)
+def llm_unavailable(request: Request, exc: LLMUnavailable):
+    """Rate limits, timeouts and provider outages are a retryable 503, not a 500"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"AI service unavailable, try again shortly: {exc}"},
+        headers={"Retry-After": str(int(exc.retry_after or 5))}
+    )
+
+# Database, case index and attachment text cache
+DATA_DIR = os.getenv("DATA_DIR", "data")
+
+# Initialize (the client also honours ANTHROPIC_BASE_URL)
+with startup_profile.step("anthropic_client"):
+    client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    # Every LLM call goes through here: per-provider limits, timeouts, retries and fallback
+    llm = default_router(client)
+with startup_profile.step("database"):
+    db = ArbitrationDB(os.path.join(DATA_DIR, "arbitration.db"))
+with startup_profile.step("rag"):
+    rag = SCCRagSystem(pdf_path="./SCC_Arbitration_Rules_2023_English.pdf")
+with startup_profile.step("case_index"):
+    # Queries share the RAG system's embedding batcher, so case and rules queries are
+    # batched together; indexing (hundreds of chunks for a large attachment) bypasses it
+    case_index = CaseIndex(rag.embedding_model, root=os.path.join(DATA_DIR, "case_index"),
+                           query_encoder=rag.embedder)
+
+# Connects on first use; connect_gmail (started by lifespan) warms it up without blocking startup.
+# Without a usable token it reports that authorization is required: a browser
+# flow would block the connection (and every request waiting on it) on a
+# headless server, so it only runs with GMAIL_INTERACTIVE_AUTH=true
+gmail_reader = GmailReader(
+    text_cache=AttachmentTextCache(os.path.join(DATA_DIR, "attachment_text")),
+    token_path=os.getenv("GMAIL_TOKEN_PATH", "token.json"),
+    credentials_path=os.getenv("GMAIL_CREDENTIALS_PATH", "credentials.json"),
+    interactive=os.getenv("GMAIL_INTERACTIVE_AUTH", "false").lower() == "true"
+)
+
+def connect_gmail():
+    try:
+        with startup_profile.step("gmail_client"):
+            gmail_reader.connect()
+    except GmailUnavailable as e:
+        print(f"Gmail not connected: {e}")
+
+def require_gmail():
+    """Connect to Gmail if needed, or fail the request with a retryable 503"""
+    try:
+        gmail_reader.connect()
+    except GmailUnavailable as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Gmail not connected: {e}",
+            headers={"Retry-After": str(max(1, math.ceil(gmail_reader.retry_in)))}
+        )
+
+# Local copy of the unread inbox, refreshed incrementally from Gmail history
+inbox_sync = InboxSync(gmail_reader, db)
+
+# Of several server processes, only the one holding this polls Gmail and sends label changes
+background_leader = LeaderLock(os.path.join(DATA_DIR, "background.lock"))
+
+# Pushes inbox changes to every open client; the worker is the only thing polling Gmail
+inbox_events = InboxBroadcaster()
+sync_worker = InboxSyncWorker(
+    inbox_sync, db, inbox_events,
+    interval=float(os.getenv("GMAIL_SYNC_INTERVAL", "30")),
+    leader=background_leader
+)
+
+# Gmail label changes, persisted and sent in batches in the background
+label_updater = LabelUpdater(gmail_reader, db, leader=background_leader)
+
+# Assigns inbox messages that quote a known case reference
+case_router = CaseRouter(db, gmail_reader, label_updater=label_updater)
+
+# Demo cases: one outline call, then the emails written in parallel
+case_generator = CaseGenerator(llm, db, max_concurrency=int(os.getenv("CASE_GENERATION_CONCURRENCY", "8")))
+
+print(f"Startup: {startup_profile.summary()}")
 
 # Pydantic models
 class CaseCreate(BaseModel):
@@ -48,18 +186,114 @@ class EmailAssign(BaseModel):
 
 # ========== CASES ==========
 
+def revision_validators(request, scope, case_id=0):
+    """ETag/Last-Modified headers from the stored case revision, and whether the client's copy is current
+
+    Read before the data itself: if a write lands in between, the response
+    carries the older tag and the next request simply gets a 200 again.
+    """
+    revision, updated_at = db.get_case_revision(case_id)
+    headers = {"ETag": f'W/"{scope}-{revision}"', "Cache-Control": "no-cache"}
+    modified = None
+    if updated_at:
+        modified = datetime.strptime(updated_at, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+        headers["ETag"] = f'W/"{scope}-{revision}-{int(modified.timestamp())}"'
+        headers["Last-Modified"] = format_datetime(modified, usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison: gzip/brotli variants of one revision are the same resource
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        current = "*" in tags or headers["ETag"].removeprefix("W/") in tags
+        return headers, current
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and modified:
+        try:
+            return headers, modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            pass
+    return headers, False
+
 @app.get("/api/cases")
-def get_cases():
+def get_cases(request: Request):
     """Get all cases"""
+    headers, not_modified = revision_validators(request, "cases")
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    
     cases = db.get_all_cases()
     # Add email count to each case
+    email_counts = db.get_email_counts()
     for case in cases:
-        case['email_count'] = len(db.get_case_emails(case['id']))
-    return {"cases": cases}
+        case['email_count'] = email_counts.get(case['id'], 0)
+    return JSONResponse({"cases": cases}, headers=headers)
+
+def archive_response(case_ids, name):
+    """Stream cases as a case_archive download
+
+    The archive is a .gz file and is sent as one (application/gzip, no
+    Content-Encoding), so clients save it as it is rather than decoding it.
+    """
+    filename = re.sub(r"[^\w.-]", "_", name) + ".ndjson.gz"
+    return StreamingResponse(
+        iter_archive(db, case_ids),
+        media_type="application/gzip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# Declared before /api/cases/{case_id}, which would otherwise take "export" for an ID
+@app.get("/api/cases/export")
+def export_cases():
+    """Archive of every case with its emails and documents"""
+    return archive_response(None, "cases")
+
+@app.get("/api/cases/{case_id}/export")
+def export_case(case_id: int):
+    """Archive of one case with its emails and documents"""
+    case = db.get_case_by_id(case_id)
+    if not case:
+        raise HTTPException(status_code=404, detail="Case not found")
+    return archive_response([case_id], case.get('case_reference') or f"case-{case_id}")
+
+@app.post("/api/cases/import")
+async def import_cases(request: Request, background_tasks: BackgroundTasks, on_conflict: str = "rename"):
+    """Load a case archive (gzip or plain NDJSON) sent as the request body
+
+    The upload is spooled to a temporary file and imported from there in
+    chunked transactions, so neither step holds the archive in memory. If the
+    import fails, cases finished before the problem stay imported (and are
+    indexed) but none is left half imported. on_conflict decides what happens
+    to a case whose reference exists: rename, skip, merge or fail (409).
+    """
+    if on_conflict not in CONFLICT_MODES:
+        raise HTTPException(status_code=400, detail=f"on_conflict must be one of {', '.join(CONFLICT_MODES)}")
+
+    with tempfile.TemporaryFile(dir=DATA_DIR) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        summary = {}
+        try:
+            await run_in_threadpool(import_archive, db, spool, on_conflict, summary=summary)
+        except (ArchiveError, CaseReferenceExists) as e:
+            # Background tasks don't run after an error response
+            threading.Thread(target=index_imported_cases, args=(summary["case_ids"],), daemon=True).start()
+            kept = f" ({len(summary['case_ids'])} complete cases imported before it)" if summary["case_ids"] else ""
+            if isinstance(e, ArchiveError):
+                raise HTTPException(status_code=400, detail=f"Invalid archive: {e}{kept}")
+            raise HTTPException(status_code=409, detail=f"{e}{kept}")
+
+    background_tasks.add_task(index_imported_cases, summary["case_ids"])
+    return summary
 
 @app.get("/api/cases/{case_id}")
-def get_case(case_id: int):
+def get_case(case_id: int, request: Request):
     """Get single case details"""
+    headers, not_modified = revision_validators(request, f"case-{case_id}", case_id)
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    
     case = db.get_case_by_id(case_id)
     if not case:
         raise HTTPException(status_code=404, detail="Case not found")
@@ -68,7 +302,7 @@ def get_case(case_id: int):
     case['emails'] = db.get_case_emails(case_id)
     case['parties'] = db.get_case_parties(case_id)
     
-    return {"case": case}
+    return JSONResponse({"case": case}, headers=headers)
 
 @app.post("/api/cases")
 def create_case(case: CaseCreate):
@@ -84,38 +318,152 @@ def delete_case(case_id: int):
 
 # ========== EMAILS ==========
 
+def index_assigned_email(case_id, email_id, gmail_id, email):
+    """Index an assigned email's body and PDF attachment text for case chat retrieval"""
+    try:
+        pdf_contents = gmail_reader.get_pdf_attachments_text(gmail_id, email.get('attachments', []))
+        case_index.add_email(
+            case_id,
+            email_id,
+            email['sender'],
+            email['subject'],
+            email['body'],
+            pdf_contents
+        )
+    except Exception as e:
+        print(f"Error indexing email: {e}")
+
+def index_case_emails(case_id):
+    """Index the emails of a case (generated or imported) that aren't in its case index yet"""
+    indexed = case_index.email_ids(case_id)
+    for email in db.get_case_emails(case_id):
+        if email['id'] in indexed:
+            continue
+        try:
+            case_index.add_email(case_id, email['id'], email['sender'], email['subject'], email['body'])
+        except Exception as e:
+            print(f"Error indexing email: {e}")
+
+def index_imported_cases(case_ids):
+    for case_id in case_ids:
+        index_case_emails(case_id)
+
 @app.get("/api/emails/unread")
-def get_unread_emails():
-    """Fetch unread emails from Gmail"""
-    if not gmail_reader:
-        raise HTTPException(status_code=500, detail="Gmail not connected")
+def get_unread_emails(cursor: Optional[str] = None, limit: int = 20):
+    """One page of the unread inbox from the local store
+
+    The sync worker keeps the store current and pushes changes on
+    /api/emails/events, so this never waits on Gmail history; pass the
+    returned next_cursor to scroll further. The list holds headers and
+    Gmail's snippet only; bodies are fetched by /api/emails/{email_id} or
+    on assignment. Right after startup the store may not have been synced
+    yet (by this worker or the leading one): the page comes back as stored,
+    with syncing set, and a 'reset' event follows the first sync.
+    """
+    require_gmail()
+    
+    if cursor:
+        try:
+            inbox_sync.parse_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        emails, next_cursor = inbox_sync.get_inbox_page(cursor=cursor, limit=min(max(limit, 1), 100))
+        return {"emails": emails, "next_cursor": next_cursor, "sync": sync_worker.last_sync,
+                "syncing": not sync_worker.synced}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/emails/events")
+async def inbox_event_stream(request: Request):
+    """Server-sent events: 'inbox' with added messages and removed IDs, 'reset' to reload"""
+    subscription = inbox_events.subscribe(last_event_id=request.headers.get("last-event-id"))
+
+    async def stream():
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                event = await subscription.get(timeout=15)
+                # A comment line keeps proxies from closing an idle connection
+                yield format_sse(event) if event else ": keep-alive\n\n"
+        finally:
+            inbox_events.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/emails/sync")
+def request_inbox_sync():
+    """Ask the sync worker to check Gmail now; changes arrive on /api/emails/events"""
+    sync_worker.trigger()
+    return {"message": "Sync requested"}
+
+@app.post("/api/emails/auto-route")
+def auto_route_emails(background_tasks: BackgroundTasks):
+    """Assign every stored inbox message that matches exactly one case; queue the rest for review"""
+    require_gmail()
     
     try:
-        emails = gmail_reader.get_unread_emails(max_results=20)
-        return {"emails": emails}
+        result = case_router.route_inbox()
+        for entry in result['assigned']:
+            background_tasks.add_task(
+                index_assigned_email, entry['case_id'], entry['email_id'], entry['gmail_id'], entry['email']
+            )
+        return {
+            "assigned": [
+                {"gmail_id": a['gmail_id'], "case_id": a['case_id'], "email_id": a['email_id']}
+                for a in result['assigned']
+            ],
+            "queued": result['queued']
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/emails/review-queue")
+def get_review_queue():
+    """Inbox messages the router held back, with the reason and candidate cases"""
+    return {"emails": db.get_review_queue()}
+
+@app.get("/api/emails/{email_id}")
+def get_email(email_id: str):
+    """Full email (body and attachment metadata) for a message opened from the inbox"""
+    require_gmail()
+    
+    email = gmail_reader.get_email_details(email_id)
+    if not email:
+        raise HTTPException(status_code=404, detail="Email not found")
+    
+    return {"email": email}
+
+@app.get("/api/emails/{email_id}/attachments/text")
+def get_email_attachment_text(email_id: str):
+    """Extract (or read from cache) the text of an email's PDF attachments"""
+    require_gmail()
+    
+    # The inbox store has no attachment metadata (metadata-format list), so use the cached full message
+    email = gmail_reader.get_email_by_id(email_id)
+    if not email:
+        raise HTTPException(status_code=404, detail="Email not found")
+    
+    return {"attachments": gmail_reader.get_pdf_attachments_text(email_id, email.get('attachments', []))}
+
 @app.post("/api/emails/assign")
-def assign_email(data: EmailAssign):
+def assign_email(data: EmailAssign, background_tasks: BackgroundTasks):
     """Assign email to case and process it"""
-    if not gmail_reader:
-        raise HTTPException(status_code=500, detail="Gmail not connected")
+    require_gmail()
     
     try:
-        # Get the email from Gmail
+        # Get the email from Gmail (reuses the payload if it was just opened)
         email = gmail_reader.get_email_by_id(data.email_id)
         
         if not email:
             raise HTTPException(status_code=404, detail="Email not found")
         
         # Extract info with Claude
-        response = client.messages.create(
-            model="claude-3-haiku-20240307",
-            max_tokens=2000,
-            messages=[{
-                "role": "user",
-                "content": f"""Analyze this arbitration email and extract key information.
+        response_text = llm.complete(f"""Analyze this arbitration email and extract key information.
 
 From: {email['sender']}
 Subject: {email['subject']}
@@ -128,11 +476,7 @@ Extract the following and return ONLY a valid JSON object:
     "key_dates": ["list", "of", "dates"],
     "action_items": ["list", "of", "actions"],
     "summary": "brief summary in 2-3 sentences"
-}}"""
-            }]
-        )
-        
-        response_text = response.content[0].text.strip()
+}}""", max_tokens=2000).text.strip()
         
         # Parse JSON response
         try:
@@ -155,14 +499,21 @@ Extract the following and return ONLY a valid JSON object:
             extracted_info
         )
         
-        # Mark as read in Gmail
-        gmail_reader.mark_as_read(data.email_id)
+        # Index body and PDF attachment text after responding
+        background_tasks.add_task(index_assigned_email, data.case_id, email_id, data.email_id, email)
+        
+        # Mark as read in Gmail (sent in the next label batch) and drop it from the local inbox
+        label_updater.mark_read([data.email_id])
+        db.delete_gmail_messages([data.email_id])
+        db.remove_from_review_queue([data.email_id])
         
         return {
             "message": "Email assigned successfully",
             "email_id": email_id
         }
         
+    except (HTTPException, LLMUnavailable):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -188,13 +539,18 @@ def chat(data: ChatMessage):
     for e in emails[:5]:
         context += f"- From {e['sender']}: {e['subject']}\n"
     
+    # Add the case file excerpts (emails and attachments) most relevant to the question
+    excerpts = case_index.build_context(data.case_id, data.message, max_chars=6000)
+    if excerpts:
+        context += f"\nRelevant excerpts from the case file:\n{excerpts}\n"
+    
     # Check if procedural question
     is_procedural = any(word in data.message.lower() for word in 
                        ['deadline', 'rule', 'article', 'procedure', 'cost'])
     
     if is_procedural:
-        # Use RAG system
-        result = rag.smart_query(data.message, client, force_claude=False)
+        # Use RAG system, with the case file so the rules are applied to this case
+        result = rag.smart_query(data.message, llm, force_claude=False, case_context=context)
         return {
             "response": result['answer'],
             "model": result['model_used'],
@@ -202,18 +558,11 @@ def chat(data: ChatMessage):
         }
     else:
         # Direct Claude call
-        response = client.messages.create(
-            model="claude-3-haiku-20240307",
-            max_tokens=1500,
-            messages=[{
-                "role": "user",
-                "content": f"{context}\n\nQuestion: {data.message}\n\nAnswer concisely:"
-            }]
-        )
+        completion = llm.complete(f"{context}\n\nQuestion: {data.message}\n\nAnswer concisely:", max_tokens=1500)
         
         return {
-            "response": response.content[0].text,
-            "model": "Claude",
+            "response": completion.text,
+            "model": completion.label,
             "articles": []
         }
 
@@ -229,16 +578,12 @@ def generate_background_summary(data: ChatMessage):
     for e in emails[:10]:
         context += f"Email from {e['sender']}: {e['subject']}\n{e['body'][:300]}\n\n"
     
-    response = client.messages.create(
-        model="claude-3-haiku-20240307",
-        max_tokens=2000,
-        messages=[{
-            "role": "user",
-            "content": f"{context}\n\nGenerate a comprehensive background summary of this arbitration case, including:\n1. Parties involved\n2. Nature of dispute\n3. Key events and timeline\n4. Current status\n\nProvide a professional, detailed summary:"
-        }]
+    completion = llm.complete(
+        f"{context}\n\nGenerate a comprehensive background summary of this arbitration case, including:\n1. Parties involved\n2. Nature of dispute\n3. Key events and timeline\n4. Current status\n\nProvide a professional, detailed summary:",
+        max_tokens=2000
     )
     
-    return {"response": response.content[0].text}
+    return {"response": completion.text}
 
 @app.post("/api/generate/email-response")
 def generate_email_response(data: ChatMessage):
@@ -253,22 +598,15 @@ def generate_email_response(data: ChatMessage):
     
     latest_email = emails[0]
     
-    response = client.messages.create(
-        model="claude-3-haiku-20240307",
-        max_tokens=1500,
-        messages=[{
-            "role": "user",
-            "content": f"""Draft a professional email response to this arbitration email:
+    completion = llm.complete(f"""Draft a professional email response to this arbitration email:
 
 From: {latest_email['sender']}
 Subject: {latest_email['subject']}
 Body: {latest_email['body']}
 
-Write a clear, professional response addressing the main points:"""
-        }]
-    )
+Write a clear, professional response addressing the main points:""", max_tokens=1500)
     
-    return {"response": response.content[0].text}
+    return {"response": completion.text}
 
 @app.post("/api/generate/case-analysis")
 def generate_case_analysis(data: ChatMessage):
@@ -287,12 +625,7 @@ def generate_case_analysis(data: ChatMessage):
             except:
                 pass
     
-    response = client.messages.create(
-        model="claude-3-haiku-20240307",
-        max_tokens=2500,
-        messages=[{
-            "role": "user",
-            "content": f"""{context}
+    completion = llm.complete(f"""{context}
 
 Create a comprehensive Case Analysis Framework including:
 
@@ -303,11 +636,9 @@ Create a comprehensive Case Analysis Framework including:
 5. **Procedural Timeline**: Key dates and deadlines
 6. **Recommendations**: Suggested next steps
 
-Provide a structured, professional analysis:"""
-        }]
-    )
+Provide a structured, professional analysis:""", max_tokens=2500)
     
-    return {"response": response.content[0].text}
+    return {"response": completion.text}
 
 # ========== CASE GENERATION ==========
 
@@ -315,17 +646,28 @@ class CaseGenerate(BaseModel):
     description: str
     num_emails: int = 10
     time_span: int = 60
+    synthetic: bool = False
 
 @app.post("/api/cases/generate")
-def generate_demo_case(data: CaseGenerate):
-    """Generate a demo case with AI"""
-    # TODO: Implement full case generation from app.py
-    # For now, just create empty case
-    case_id = db.create_case("Demo Case", "DEMO-001")
-    return {
-        "case_id": case_id,
-        "message": "Demo case generated (simplified version)"
-    }
+def generate_demo_case(data: CaseGenerate, background_tasks: BackgroundTasks):
+    """Generate a demo case with AI, or from templates with synthetic=true"""
+    if not 1 <= data.num_emails <= 200:
+        raise HTTPException(status_code=400, detail="num_emails must be between 1 and 200")
+
+    if data.synthetic:
+        case_name, emails = synthetic_case(random.Random(), data.num_emails, data.time_span)
+        (case_id, case_reference), = db.add_cases_with_emails([(case_name, None, emails)])
+        result = {"case_id": case_id, "case_reference": case_reference, "emails": len(emails), "failed": 0}
+    else:
+        try:
+            result = case_generator.generate(data.description, data.num_emails, data.time_span)
+        except LLMUnavailable:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=f"Case generation failed: {e}")
+
+    background_tasks.add_task(index_case_emails, result["case_id"])
+    return {**result, "message": f"Generated case with {result['emails']} emails"}
 
 # ========== HEALTH CHECK ==========
 
@@ -333,16 +675,37 @@ def generate_demo_case(data: CaseGenerate):
 def health_check():
     return {
         "status": "healthy",
-        "gmail_connected": gmail_reader is not None
+        "gmail_connected": gmail_reader.connected,
+        "gmail_error": gmail_reader.last_error,
+        "rag_cache": rag.cache_stats(),
+        "vector_index": {
+            "kind": rag.index.kind,
+            "count": len(rag.index),
+            "memory_mb": round(rag.index.nbytes / 2**20, 1),
+            # Memory-mapped vectors, in the page cache rather than process memory
+            "mapped_mb": round(rag.index.mapped_nbytes / 2**20, 1)
+        },
+        "llm": llm.stats(),
+        "pending_label_changes": label_updater.pending(),
+        "inbox_sync": sync_worker.status(),
+        "startup": startup_profile.as_dict()
     }
 
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 import os
 
+class ImmutableStaticFiles(StaticFiles):
+    """Static files with long-lived caching; Vite puts a content hash in every asset name"""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
 # Serve built frontend (after all API routes)
 if os.path.exists("dist"):
-    app.mount("/assets", StaticFiles(directory="dist/assets"), name="assets")
+    app.mount("/assets", ImmutableStaticFiles(directory="dist/assets"), name="assets")
     
     @app.get("/{full_path:path}")
     def serve_frontend(full_path: str):
@@ -350,8 +713,8 @@ if os.path.exists("dist"):
         if full_path.startswith("api/"):
             return
         
-        # Serve index.html for all other routes
-        return FileResponse("dist/index.html")
+        # Serve index.html for all other routes; revalidated so new asset hashes are picked up
+        return FileResponse("dist/index.html", headers={"Cache-Control": "no-cache"})
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,100 @@
+"""Throughput and peak memory of case archive export and import at growing sizes
+
+For each size, seeds a scratch database with one synthetic case of that many
+emails (bodies padded with --pad-kb of hex noise, roughly half compressible),
+then runs ``python -m case_archive export`` and ``import`` as child processes
+and samples each one's peak RSS (VmHWM in /proc; ru_maxrss would include the
+benchmark's own memory, as it survives fork and exec). Flat peak RSS across
+sizes is the point: neither side holds the case in memory. Linux only.
+
+    python -m benchmarks.bench_case_archive --emails 10000 100000 --pad-kb 8
+"""
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from case_generator import generate_synthetic_dataset
+from database import ArbitrationDB
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def peak_rss_kb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return 0
+
+
+def run(args):
+    """(seconds, peak RSS in MB) of a child python process"""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, *args], cwd=ROOT, stderr=subprocess.DEVNULL)
+    peak = 0
+    while process.poll() is None:
+        try:
+            peak = max(peak, peak_rss_kb(process.pid))
+        except OSError:
+            pass
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    if process.returncode:
+        raise SystemExit(f"{' '.join(args)} failed with status {process.returncode}")
+    return elapsed, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--emails", type=int, nargs="+", default=[10000, 50000, 200000])
+    parser.add_argument("--pad-kb", type=int, default=4, help="Extra body size per email")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    report = []
+    for emails in args.emails:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "source.db")
+            target = os.path.join(tmp, "target.db")
+            archive = os.path.join(tmp, "case.ndjson.gz")
+
+            generate_synthetic_dataset(ArbitrationDB(source), 1, emails, seed=args.seed)
+            with sqlite3.connect(source) as conn:
+                conn.execute("UPDATE emails SET body = body || hex(randomblob(?))", (args.pad_kb * 512,))
+            db_mb = os.path.getsize(source) / 1e6
+
+            export_s, export_rss = run(["-m", "case_archive", "export", "--db", source, "-o", archive])
+            import_s, import_rss = run(["-m", "case_archive", "import", "--db", target, archive])
+            with sqlite3.connect(target) as conn:
+                imported = conn.execute("SELECT COUNT(*) FROM emails").fetchone()[0]
+
+            row = {
+                "emails": emails,
+                "imported": imported,
+                "db_mb": round(db_mb, 1),
+                "archive_mb": round(os.path.getsize(archive) / 1e6, 1),
+                "export_s": round(export_s, 2),
+                "export_mb_per_s": round(db_mb / export_s, 1),
+                "export_peak_rss_mb": round(export_rss, 1),
+                "import_s": round(import_s, 2),
+                "import_emails_per_s": round(emails / import_s),
+                "import_peak_rss_mb": round(import_rss, 1)
+            }
+            report.append(row)
+            print(f"{emails:>8} emails  db {row['db_mb']} MB  archive {row['archive_mb']} MB  "
+                  f"export {row['export_s']} s ({row['export_mb_per_s']} MB/s, peak {row['export_peak_rss_mb']} MB)  "
+                  f"import {row['import_s']} s ({row['import_emails_per_s']} emails/s, peak {row['import_peak_rss_mb']} MB)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Cost of a dashboard refresh of /api/cases and /api/cases/{id}
+
+Seeds a scratch database and compares, per refresh: the old full rebuild
+(email count from get_case_emails per case), the new rebuild (one GROUP BY
+query), and the revalidation path that answers 304 from the revision
+lookup alone. Also reports the JSON payload size raw and gzipped.
+
+    python -m benchmarks.bench_case_endpoints --cases 200 --emails-per-case 25
+"""
+import argparse
+import gzip
+import json
+import os
+import tempfile
+import time
+
+from database import ArbitrationDB
+
+BODY = (
+    "Please find attached our submission in accordance with the procedural timetable. "
+    "The Respondent requests a two-week extension of the deadline for its Statement of Defence. "
+) * 8
+
+
+def seed(db, n_cases, emails_per_case):
+    for i in range(n_cases):
+        case_id = db.create_case(f"Case {i}", f"SCC-2025-{i:04d}")
+        db.add_emails_bulk([
+            (case_id, f"Counsel {j} <c{j}@example.org>", f"Submission {j}", BODY, {"summary": "Email processed"})
+            for j in range(emails_per_case)
+        ])
+
+
+def cases_old(db):
+    cases = db.get_all_cases()
+    for case in cases:
+        case['email_count'] = len(db.get_case_emails(case['id']))
+    return {"cases": cases}
+
+
+def cases_new(db):
+    cases = db.get_all_cases()
+    email_counts = db.get_email_counts()
+    for case in cases:
+        case['email_count'] = email_counts.get(case['id'], 0)
+    return {"cases": cases}
+
+
+def case_detail(db, case_id):
+    case = db.get_case_by_id(case_id)
+    case['emails'] = db.get_case_emails(case_id)
+    case['parties'] = db.get_case_parties(case_id)
+    return {"case": case}
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        payload = json.dumps(fn()).encode()
+    return (time.perf_counter() - start) / repeat * 1000, payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=200)
+    parser.add_argument("--emails-per-case", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = ArbitrationDB(os.path.join(tmp, "bench.db"))
+        seed(db, args.cases, args.emails_per_case)
+        case_id = db.get_all_cases()[0]['id']
+
+        rows = []
+        for name, fn in [
+            ("cases: old rebuild", lambda: cases_old(db)),
+            ("cases: new rebuild", lambda: cases_new(db)),
+            ("cases: 304 check", lambda: db.get_case_revision()),
+            ("case: rebuild", lambda: case_detail(db, case_id)),
+            ("case: 304 check", lambda: db.get_case_revision(case_id)),
+        ]:
+            ms, payload = timed(fn, args.repeat)
+            rows.append({
+                "path": name,
+                "ms": round(ms, 3),
+                "bytes": len(payload) if "304" not in name else 0,
+                "gzip_bytes": len(gzip.compress(payload)) if "304" not in name else 0
+            })
+            print(f"{name:<20} {rows[-1]['ms']:>9} ms  {rows[-1]['bytes']:>9} B  {rows[-1]['gzip_bytes']:>8} B gzip")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Case routing throughput: CaseRouter's in-memory index vs. per-reference SQL lookups
+
+Seeds a scratch database with cases and routes synthetic inbox messages
+(references in varied case and dash styles, some unknown, some quoting two
+cases, some with none). The baseline extracts references the same way but
+resolves each with ArbitrationDB.find_case_by_reference, as the manual
+flow would.
+
+    python -m benchmarks.bench_case_routing --cases 2000 --emails 5000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+
+from case_matcher import extract_case_references
+from case_router import CaseRouter
+from database import ArbitrationDB
+
+FILLER = (
+    "Please find attached the respondent's submission on the procedural timetable. "
+    "The tribunal is invited to consider the request for document production. "
+)
+
+
+def make_reference(i):
+    if i % 2:
+        return f"{chr(65 + i % 26)}{chr(65 + (i // 26) % 26)}-{i % 10000:03d}/{20 + i % 7}"
+    return f"ICC/{2018 + i % 8}/{i % 10000:03d}"
+
+
+def seed_cases(db, n):
+    references = [make_reference(i) for i in range(n)]
+    for i, reference in enumerate(references):
+        db.create_case(f"Case {i}", reference)
+    return references
+
+
+def make_emails(references, n, body_chars, seed):
+    rng = random.Random(seed)
+    body = (FILLER * (body_chars // len(FILLER) + 1))[:body_chars]
+    emails = []
+    for i in range(n):
+        kind = rng.random()
+        if kind < 0.6:
+            reference = rng.choice(references)
+            reference = reference.lower() if rng.random() < 0.3 else reference.replace("-", "–")
+            subject = f"Re: {reference} - Document submission"
+        elif kind < 0.7:
+            subject = f"{rng.choice(references)} and {rng.choice(references)} consolidated"
+        elif kind < 0.8:
+            subject = "Re: ZZ-9999/99 - Unknown matter"
+        elif kind < 0.9:
+            subject = f"Urgent: Case #{rng.randint(100, 99999)} needs review"
+        else:
+            subject = "Hearing logistics"
+        emails.append({'id': f"m{i}", 'subject': subject, 'snippet': body[:200], 'body': body})
+    return emails
+
+
+def route_with_sql(db, emails):
+    """Baseline: one find_case_by_reference query per extracted reference"""
+    decisions = []
+    for email in emails:
+        text = f"{email['subject']}\n{email['body']}"
+        cases = {c['id'] for c in (db.find_case_by_reference(r) for r in extract_case_references(text)) if c}
+        decisions.append(cases.pop() if len(cases) == 1 else None)
+    return decisions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=2000)
+    parser.add_argument("--emails", type=int, default=5000)
+    parser.add_argument("--body-chars", type=int, default=2000)
+    parser.add_argument("--baseline-emails", type=int, default=500,
+                        help="Emails routed by the SQL baseline (it is much slower)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = ArbitrationDB(os.path.join(tmp, "bench.db"))
+        references = seed_cases(db, args.cases)
+        emails = make_emails(references, args.emails, args.body_chars, args.seed)
+        router = CaseRouter(db, reader=None)
+
+        start = time.perf_counter()
+        router.index.refresh()
+        index_build_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        decisions = router.route(emails)
+        router_s = time.perf_counter() - start
+
+        baseline = emails[:args.baseline_emails]
+        start = time.perf_counter()
+        route_with_sql(db, baseline)
+        baseline_s = time.perf_counter() - start
+
+    report = {
+        "cases": args.cases,
+        "emails": args.emails,
+        "index_build_s": round(index_build_s, 4),
+        "router_msgs_per_s": round(len(emails) / router_s),
+        "sql_msgs_per_s": round(len(baseline) / baseline_s),
+        "reasons": dict(Counter(d['reason'] for d in decisions))
+    }
+
+    print(f"index build     {report['index_build_s']}s for {args.cases} cases")
+    print(f"router          {report['router_msgs_per_s']:>8} msgs/s")
+    print(f"sql lookups     {report['sql_msgs_per_s']:>8} msgs/s")
+    print("decisions       " + "  ".join(f"{k}={v}" for k, v in sorted(report['reasons'].items())))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Query embedding throughput with and without EmbeddingBatcher
+
+At each concurrency level, that many threads embed the questions in
+benchmarks/scc_questions.json for --duration seconds, either each calling
+model.encode on its own string (the old retrieval path) or through one
+shared EmbeddingBatcher. Reports queries/s, p50/p99 latency and the mean
+batch size the batcher reached. The embedding model must already be in the
+local Hugging Face cache.
+
+    python -m benchmarks.bench_embedding_batching --concurrency 1 8 32
+    python -m benchmarks.bench_embedding_batching --max-wait 0.005 --json batching.json
+"""
+import argparse
+import json
+import threading
+import time
+
+from sentence_transformers import SentenceTransformer
+
+from benchmarks.bench_retrieval import load_questions
+from benchmarks.loadtest import percentile
+from embedding_service import EmbeddingBatcher
+
+
+def drive(encode, queries, concurrency, duration):
+    """Latencies of encode(query) calls from concurrency threads over duration seconds"""
+    latencies = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def worker(offset):
+        own = []
+        i = offset
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            encode(queries[i % len(queries)])
+            own.append(time.perf_counter() - start)
+            i += concurrency
+        with lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait", type=float, default=0.002, help="Seconds to wait for a batch to fill")
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    model = SentenceTransformer(args.model)
+    # Distinct strings, so nothing is answered from a cache
+    queries = [f"{q['question']} ({i})" for i in range(50) for q in load_questions()]
+    model.encode(queries[:64])  # warm up
+
+    report = []
+    for concurrency in args.concurrency:
+        for mode in ("direct", "batched"):
+            if mode == "direct":
+                batcher = None
+                encode = model.encode
+            else:
+                batcher = EmbeddingBatcher(model, args.max_batch_size, args.max_wait)
+                encode = batcher.encode
+            latencies = drive(encode, queries, concurrency, args.duration)
+            stats = batcher.stats() if batcher else {}
+            if batcher:
+                batcher.close()
+
+            row = {
+                "concurrency": concurrency,
+                "mode": mode,
+                "queries_per_s": round(len(latencies) / args.duration, 1),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+                "mean_batch_size": stats.get("mean_batch_size", 1)
+            }
+            report.append(row)
+            print(f"{concurrency:>3} threads  {mode:<8} {row['queries_per_s']:>8} q/s  "
+                  f"p50 {row['p50_ms']:>7} ms  p99 {row['p99_ms']:>7} ms  batch {row['mean_batch_size']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
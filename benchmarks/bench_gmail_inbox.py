@@ -0,0 +1,78 @@
+"""Inbox-open latency: sequential per-message fetches vs. GmailReader's batched fetch
+
+Runs against benchmarks.fake_gmail.FakeGmailService with a fixed latency per
+HTTP round trip, so numbers reflect round-trip counts rather than Gmail's
+actual speed on a given day.
+
+    python -m benchmarks.bench_gmail_inbox --sizes 20 100 500 --latency 0.05
+"""
+import argparse
+import json
+import tempfile
+import time
+
+from attachment_cache import AttachmentTextCache
+from benchmarks.fake_gmail import FakeGmailService
+from email_reader import GmailReader
+
+
+def make_reader(service, cache_dir=None):
+    """A GmailReader wired to a fake service (never connects), with a scratch text cache"""
+    reader = GmailReader(text_cache=AttachmentTextCache(cache_dir or tempfile.mkdtemp()))
+    reader.service = service
+    return reader
+
+
+def open_inbox_sequential(reader, n):
+    """The original N+1 path: list, then one messages.get per message"""
+    results = reader.service.users().messages().list(
+        userId='me', labelIds=['INBOX', 'UNREAD'], maxResults=n
+    ).execute()
+    return [reader.get_email_details(m['id']) for m in results.get('messages', [])]
+
+
+def open_inbox_batched(reader, n):
+    return reader.get_unread_emails(max_results=n)
+
+
+def measure(fn, n, latency, error_rate, attachment_every):
+    service = FakeGmailService(latency=latency, error_rate=error_rate)
+    service.populate(n, attachment_every=attachment_every)
+    reader = make_reader(service)
+
+    start = time.perf_counter()
+    emails = fn(reader, n)
+    elapsed = time.perf_counter() - start
+    return {
+        "seconds": round(elapsed, 3),
+        "round_trips": service.round_trips,
+        "emails": len([e for e in emails if e])
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 500])
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per HTTP round trip")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 429")
+    parser.add_argument("--attachment-every", type=int, default=0,
+                        help="Give every n-th email a PDF attachment (0 = none)")
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    report = []
+    for n in args.sizes:
+        for name, fn in [("sequential", open_inbox_sequential), ("batched", open_inbox_batched)]:
+            result = measure(fn, n, args.latency, args.error_rate, args.attachment_every)
+            result.update({"messages": n, "strategy": name})
+            report.append(result)
+            print(f"{n:>5} messages  {name:<10}  {result['seconds']:>7}s  "
+                  f"{result['round_trips']:>4} round trips  {result['emails']} emails")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
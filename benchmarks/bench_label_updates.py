@@ -0,0 +1,72 @@
+"""Marking a triaged batch read: one messages.modify per email vs. LabelUpdater
+
+Runs against benchmarks.fake_gmail.FakeGmailService, so the numbers show
+API calls and round-trip latency rather than Gmail's own speed.
+
+    python -m benchmarks.bench_label_updates --sizes 50 500 2500 --latency 0.05
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.bench_gmail_inbox import make_reader
+from benchmarks.fake_gmail import FakeGmailService
+from database import ArbitrationDB
+from label_updater import LabelUpdater
+
+
+def mark_individually(reader, db, msg_ids):
+    for msg_id in msg_ids:
+        reader.mark_as_read(msg_id)
+
+
+def mark_write_behind(reader, db, msg_ids):
+    updater = LabelUpdater(reader, db)
+    updater.mark_read(msg_ids)
+    result = updater.flush()
+    assert result['pending'] == 0, result
+
+
+def measure(fn, n, latency, error_rate):
+    service = FakeGmailService(latency=latency, error_rate=error_rate)
+    service.populate(n, attachment_every=0)
+    reader = make_reader(service)
+    msg_ids = list(service.messages)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = ArbitrationDB(os.path.join(tmp, "bench.db"))
+        service.round_trips = 0
+        start = time.perf_counter()
+        fn(reader, db, msg_ids)
+        elapsed = time.perf_counter() - start
+
+    still_unread = sum(1 for m in service.messages.values() if "UNREAD" in m["labelIds"])
+    return {"seconds": round(elapsed, 3), "round_trips": service.round_trips, "still_unread": still_unread}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 2500])
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per HTTP round trip")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 429")
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    report = []
+    for n in args.sizes:
+        for name, fn in [("individual", mark_individually), ("write-behind", mark_write_behind)]:
+            result = measure(fn, n, args.latency, args.error_rate)
+            result.update({"messages": n, "strategy": name})
+            report.append(result)
+            print(f"{n:>5} messages  {name:<12}  {result['seconds']:>7}s  "
+                  f"{result['round_trips']:>5} round trips  {result['still_unread']} still unread")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Success rate and tail latency of LLM calls with and without LLMRouter
+
+Sends a burst of completions from many threads to fake providers (see
+benchmarks.fake_llm) that have a long latency tail, random 529s and a
+per-minute quota answering 429 beyond it, in three setups:
+
+    direct   provider.complete straight from each thread, as the endpoints used to
+    router   LLMRouter with the provider's concurrency cap, rate limit and retries
+    hedged   router plus a second provider, hedging calls slower than --hedge-after
+
+and reports how many calls succeeded, p50/p95/p99 latency and what the fake
+APIs saw. Nothing leaves the process.
+
+    python -m benchmarks.bench_llm_router --requests 400 --concurrency 32
+"""
+import argparse
+import json
+import threading
+import time
+
+from benchmarks.fake_llm import FakeProvider
+from benchmarks.loadtest import percentile
+from llm_router import LLMRouter
+
+
+def drive(call, requests, concurrency):
+    """(latencies of successful calls, failures) of requests calls from concurrency threads"""
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+    remaining = iter(range(requests))
+
+    def worker():
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            start = time.perf_counter()
+            try:
+                call()
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+            except Exception as e:
+                with lock:
+                    failures.append(type(e).__name__)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sorted(latencies), failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32, help="Client threads")
+    parser.add_argument("--latency", type=float, default=0.3, help="Typical call latency (s)")
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Fraction of calls in the slow tail")
+    parser.add_argument("--slow-latency", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Fraction of calls failing with 529")
+    parser.add_argument("--quota", type=int, default=600, help="Calls per minute the fake API accepts")
+    parser.add_argument("--rpm", type=float, default=550, help="Router rate limit (calls per minute)")
+    parser.add_argument("--max-concurrency", type=int, default=16, help="Router concurrency cap per provider")
+    parser.add_argument("--hedge-after", type=float, default=1.0, help="Latency budget (s) before hedging")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    def provider(name, seed):
+        return FakeProvider(name, latency=args.latency, slow_rate=args.slow_rate, slow_latency=args.slow_latency,
+                            error_rate=args.error_rate, quota_per_minute=args.quota, seed=seed,
+                            max_concurrency=args.max_concurrency, requests_per_minute=args.rpm, timeout=30)
+
+    prompt = "Summarise the procedural timetable. " * 20
+    report = []
+    for setup in ("direct", "router", "hedged"):
+        primary = provider("claude", args.seed)
+        providers = [primary]
+        if setup == "direct":
+            def call():
+                primary.complete(prompt, 500, timeout=30)
+        else:
+            if setup == "hedged":
+                providers.append(provider("gemini", args.seed + 1))
+            router = LLMRouter(providers, timeout=60,
+                               hedge_after=args.hedge_after if setup == "hedged" else None)
+
+            def call():
+                router.complete(prompt, 500, fallback=setup == "hedged")
+
+        start = time.perf_counter()
+        latencies, failures = drive(call, args.requests, args.concurrency)
+        wall = time.perf_counter() - start
+
+        row = {
+            "setup": setup,
+            "succeeded": len(latencies),
+            "failed": len(failures),
+            "failures": {name: failures.count(name) for name in sorted(set(failures))},
+            "wall_s": round(wall, 2),
+            **{f"p{p}_ms": round(percentile(latencies, p) * 1000) if latencies else None for p in (50, 95, 99)},
+            "api_calls": {p.name: p.received for p in providers},
+            "api_errors": {p.name: p.errors for p in providers},
+            "router": router.stats() if setup != "direct" else None
+        }
+        report.append(row)
+        print(f"{setup:<7} ok {row['succeeded']:>4}/{args.requests}  p50 {row['p50_ms']} ms  "
+              f"p95 {row['p95_ms']} ms  p99 {row['p99_ms']} ms  wall {row['wall_s']} s  "
+              f"api calls {row['api_calls']} errors {row['api_errors']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
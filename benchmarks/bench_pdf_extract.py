@@ -0,0 +1,83 @@
+"""PDF extraction throughput: in-thread pypdf vs. the PDFExtractor process pool
+
+Extracts a batch of documents (copies of the SCC rules PDF plus generated
+attachments) and reports pages per second for a plain sequential pypdf
+loop and for PDFExtractor.extract_many at several worker counts.
+
+    python -m benchmarks.bench_pdf_extract --copies 8 --workers 1 2 4
+"""
+import argparse
+import io
+import json
+import time
+import pypdf
+
+from benchmarks.fake_gmail import make_pdf
+from pdf_extract import PDFExtractor
+
+
+def build_corpus(pdf_path, copies, generated, generated_pages):
+    with open(pdf_path, "rb") as f:
+        rules = f.read()
+    docs = [rules] * copies
+    for i in range(generated):
+        docs.append(make_pdf([f"Attachment {i} page {p}: statement of claim" for p in range(generated_pages)]))
+    return docs
+
+
+def extract_sequential(docs):
+    pages = 0
+    for data in docs:
+        reader = pypdf.PdfReader(io.BytesIO(data))
+        for page in reader.pages:
+            page.extract_text()
+            pages += 1
+    return pages
+
+
+def extract_pool(docs, workers):
+    extractor = PDFExtractor(max_workers=workers, max_pages=0)
+    pages = 0
+    for text in extractor.extract_many(docs):
+        if isinstance(text, Exception):
+            raise text
+        pages += text.count("--- Page ")
+    return pages
+
+
+def run(name, fn):
+    start = time.perf_counter()
+    pages = fn()
+    elapsed = time.perf_counter() - start
+    result = {
+        "strategy": name,
+        "pages": pages,
+        "seconds": round(elapsed, 3),
+        "pages_per_s": round(pages / elapsed, 1) if elapsed else None
+    }
+    print(f"{name:<14} {pages:>6} pages  {result['seconds']:>8}s  {result['pages_per_s']:>8} pages/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf", default="./SCC_Arbitration_Rules_2023_English.pdf")
+    parser.add_argument("--copies", type=int, default=4, help="Copies of the rules PDF in the batch")
+    parser.add_argument("--generated", type=int, default=20, help="Generated attachment PDFs in the batch")
+    parser.add_argument("--generated-pages", type=int, default=5)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    docs = build_corpus(args.pdf, args.copies, args.generated, args.generated_pages)
+    report = [run("sequential", lambda: extract_sequential(docs))]
+    for workers in args.workers:
+        report.append(run(f"pool x{workers}", lambda: extract_pool(docs, workers)))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
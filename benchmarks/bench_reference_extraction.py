@@ -0,0 +1,108 @@
+"""Reference extraction throughput: the old four-pass findall vs. ReferenceExtractor
+
+Bodies are synthetic correspondence: prose with dates and amounts on some
+lines, a few case references, and a long quoted reply history below an
+attribution line. Reports MB/s, messages/s and distinct references found
+per body size. The old patterns are case-sensitive and have no SCC format,
+so they find fewer references.
+
+    python -m benchmarks.bench_reference_extraction --sizes 2000 50000 500000
+"""
+import argparse
+import json
+import random
+import re
+import time
+
+from case_matcher import ReferenceExtractor
+
+PROSE = [
+    "Please find attached the respondent's submission on the procedural timetable.",
+    "The tribunal is invited to consider the request for document production.",
+    "Counsel for the claimant will attend the case management conference.",
+    "The hearing is scheduled for 14 May 2025 at 09:30 in Stockholm.",
+    "The amount in dispute is EUR 2,450,000 plus interest at 8 per cent.",
+    "Kind regards,",
+]
+REFERENCES = ["SCC-2025-014", "AB-001/26", "ICC/2024/117", "Case #40213"]
+
+
+def legacy_extract(text):
+    """extract_case_references as it was: four separate findall passes"""
+    references = []
+    references.extend(re.findall(r'[A-Z]{1,3}-\d{1,4}/\d{2}', text))
+    references.extend(re.findall(r'#\d{3,6}', text))
+    matches = re.findall(r'(?:Case|Matter|File)\s*[:#]?\s*(\d{3,6})', text, re.IGNORECASE)
+    references.extend([f"#{m}" for m in matches])
+    references.extend(re.findall(r'[A-Z]{2,4}/\d{4}/\d{3,4}', text))
+    return list(set(references))
+
+
+def make_body(size, rng):
+    lines = []
+    length = 0
+    while length < size * 0.2:
+        line = rng.choice(PROSE)
+        if rng.random() < 0.05:
+            line += f" Re {rng.choice(REFERENCES)}."
+        lines.append(line)
+        length += len(line) + 1
+    lines.append("")
+    lines.append("On Mon, 3 Feb 2025 at 10:12, Registrar <registrar@example.org> wrote:")
+    while length < size:
+        line = "> " + rng.choice(PROSE)
+        if rng.random() < 0.05:
+            line += f" Re {rng.choice(REFERENCES)}."
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+
+def throughput(fn, bodies):
+    start = time.perf_counter()
+    found = sum(len(set(fn(body))) for body in bodies)
+    elapsed = time.perf_counter() - start
+    size_mb = sum(len(body) for body in bodies) / 2**20
+    return {
+        "mb_per_s": round(size_mb / elapsed, 2),
+        "msgs_per_s": round(len(bodies) / elapsed, 1),
+        "found": found
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 50000, 500000],
+                        help="Body sizes in characters")
+    parser.add_argument("--total-mb", type=float, default=20, help="Text extracted per size and strategy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    full = ReferenceExtractor(strip_quotes=False)
+    stripped = ReferenceExtractor()
+    strategies = [
+        ("legacy 4-pass", legacy_extract),
+        ("engine", lambda body: [r.key for r in full.finditer(body)]),
+        ("engine+strip", lambda body: [r.key for r in stripped.extract_email("", body)]),
+    ]
+
+    report = []
+    for size in args.sizes:
+        count = max(1, int(args.total_mb * 2**20 / size))
+        bodies = [make_body(size, rng) for _ in range(count)]
+        for name, fn in strategies:
+            result = throughput(fn, bodies)
+            result.update({"body_chars": size, "messages": count, "strategy": name})
+            report.append(result)
+            print(f"{size:>8} chars  {name:<14} {result['mb_per_s']:>8} MB/s  "
+                  f"{result['msgs_per_s']:>10} msgs/s  {result['found']} refs")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Retrieval quality and latency benchmark for SCCRagSystem
+
+Runs the labeled questions in benchmarks/scc_questions.json through
+retrieve_relevant_articles of scc_rag_simple.py and scc_rag.py and reports
+recall@k, MRR, p50/p99 retrieval latency, index build time and memory.
+No LLM is called (scc_rag only initializes Vertex AI on first use); the
+embedding model must already be in the local Hugging Face cache.
+
+    python -m benchmarks.bench_retrieval --json retrieval.json
+    python -m benchmarks.bench_retrieval --index exact ivf --storage float32 int8
+"""
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+from vector_index import build_index
+
+QUESTIONS_PATH = os.path.join(os.path.dirname(__file__), "scc_questions.json")
+MODULES = ["scc_rag_simple", "scc_rag"]
+
+
+def load_questions(path=QUESTIONS_PATH):
+    with open(path) as f:
+        return json.load(f)["questions"]
+
+
+def matches(article, label):
+    """Same article number and title (prefix match, PDF titles wrap across lines)"""
+    if article["article_number"] != label["number"]:
+        return False
+    title = " ".join(article["title"].split()).casefold()
+    expected = label["title"].casefold()
+    return bool(title) and (title.startswith(expected) or expected.startswith(title))
+
+
+def score_question(articles, labels, ks):
+    """recall@k for each k and the reciprocal rank of the first relevant article"""
+    found_at = {}
+    for rank, article in enumerate(articles, start=1):
+        for i, label in enumerate(labels):
+            if i not in found_at and matches(article, label):
+                found_at[i] = rank
+
+    recalls = {k: sum(1 for r in found_at.values() if r <= k) / len(labels) for k in ks}
+    reciprocal_rank = 1 / min(found_at.values()) if found_at else 0.0
+    return recalls, reciprocal_rank
+
+
+def current_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def bench_module(module_name, questions, index_type, storage, ks, pdf_path):
+    module = importlib.import_module(module_name)
+    index_params = {} if storage == "float32" else {"storage": storage}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Fresh vector db path so the constructor processes the PDF itself
+        start = time.perf_counter()
+        rag = module.SCCRagSystem(
+            pdf_path=pdf_path,
+            index_type=index_type,
+            index_params=index_params,
+            cache_size=0,
+            db_path=os.path.join(tmp, "scc_vector_db.pkl")
+        )
+        startup_s = time.perf_counter() - start
+
+        # Index build on its own: PDF extraction, embedding and index construction
+        tracemalloc.start()
+        start = time.perf_counter()
+        articles_db = rag.process_pdf()
+        index = build_index(index_type, articles_db["embeddings"], **index_params)
+        build_s = time.perf_counter() - start
+        _, build_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    n_results = max(ks)
+    recalls = {k: [] for k in ks}
+    reciprocal_ranks = []
+    latencies = []
+    for item in questions:
+        start = time.perf_counter()
+        articles = rag.retrieve_relevant_articles(item["question"], n_results=n_results)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        question_recalls, reciprocal_rank = score_question(articles, item["articles"], ks)
+        for k in ks:
+            recalls[k].append(question_recalls[k])
+        reciprocal_ranks.append(reciprocal_rank)
+
+    return {
+        "module": module_name,
+        "index": index_type,
+        "storage": storage,
+        "articles": len(articles_db["articles"]),
+        **{f"recall@{k}": round(float(np.mean(recalls[k])), 4) for k in ks},
+        "mrr": round(float(np.mean(reciprocal_ranks)), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "startup_s": round(startup_s, 3),
+        "build_s": round(build_s, 3),
+        "build_peak_mb": round(build_peak / 2**20, 2),
+        "index_mb": round(index.nbytes / 2**20, 3),
+        "index_mapped_mb": round(index.mapped_nbytes / 2**20, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--index", nargs="+", default=["exact"], help="Vector index types to compare")
+    parser.add_argument("--storage", nargs="+", default=["float32"], help="Vector storage types to compare")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--questions", default=QUESTIONS_PATH)
+    parser.add_argument("--pdf", default="./SCC_Arbitration_Rules_2023_English.pdf")
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    results = []
+    for module_name in args.modules:
+        for index_type in args.index:
+            for storage in args.storage:
+                try:
+                    results.append(bench_module(module_name, questions, index_type, storage, args.k, args.pdf))
+                except Exception as e:
+                    print(f"{module_name} ({index_type}/{storage}) failed: {e}")
+                    results.append({"module": module_name, "index": index_type, "storage": storage, "error": str(e)})
+
+    report = {
+        "commit": current_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "questions": len(questions),
+        "results": results
+    }
+
+    for result in results:
+        if "error" in result:
+            continue
+        recall_text = "  ".join(f"R@{k}={result[f'recall@{k}']}" for k in args.k)
+        print(f"{result['module']:<16} {result['index']:<6} {result['storage']:<8} {recall_text}  "
+              f"MRR={result['mrr']}  p50={result['p50_ms']}ms  p99={result['p99_ms']}ms  "
+              f"build={result['build_s']}s  peak={result['build_peak_mb']}MB  index={result['index_mb']}MB "
+              f"(+{result['index_mapped_mb']}MB mapped)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Recall vs. latency vs. memory for the vector indexes in vector_index.py
+
+Uses synthetic clustered unit vectors (384 dims, like all-MiniLM-L6-v2) so it
+runs offline. Ground truth comes from a float32 ExactIndex. Quantized
+(float16/int8) indexes are saved and reloaded first, as a worker loads them.
+The memory column is process memory; the rescoring vectors are memory-mapped
+(from the saved index, or a spill file when built in memory) and reported
+separately as mapped, since they still occupy the page cache.
+
+    python -m benchmarks.bench_vector_index --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import tempfile
+import time
+import numpy as np
+
+from vector_index import build_index, load_index, normalize
+
+
+def make_corpus(n, dim, n_clusters=1000, seed=0, batch_size=100000):
+    """Clustered vectors: sentence embeddings are far from uniformly distributed"""
+    rng = np.random.default_rng(seed)
+    centers = normalize(rng.normal(size=(n_clusters, dim)))
+    vectors = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, batch_size):
+        size = min(batch_size, n - start)
+        noise = rng.normal(scale=0.03, size=(size, dim)).astype(np.float32)
+        vectors[start:start + size] = normalize(centers[rng.integers(n_clusters, size=size)] + noise)
+    return vectors
+
+
+def make_queries(vectors, n_queries, seed=1):
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.choice(len(vectors), n_queries, replace=False)]
+    return normalize(picks + rng.normal(scale=0.01, size=picks.shape).astype(np.float32))
+
+
+def time_searches(index, queries, k, **search_kwargs):
+    results = []
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        ids, _ = index.search(query, k, **search_kwargs)
+        latencies.append(time.perf_counter() - start)
+        results.append(ids)
+    return results, np.array(latencies) * 1000
+
+
+def recall(results, truth, k):
+    return float(np.mean([len(set(r[:k]) & set(t[:k])) / k for r, t in zip(results, truth)]))
+
+
+def row(name, n, k, build_s, latencies, index, recall_value, **extra):
+    result = {
+        "index": name, "n": n, "k": k,
+        "recall": round(recall_value, 4),
+        "build_s": round(build_s, 3),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "memory_mb": round(index.nbytes / 2**20, 1),
+        "mapped_mb": round(index.mapped_nbytes / 2**20, 1)
+    }
+    result.update(extra)
+    return result
+
+
+def run(sizes, dim=384, k=10, n_queries=200, nprobes=(1, 4, 16), storages=("float16", "int8")):
+    report = []
+    for n in sizes:
+        vectors = make_corpus(n, dim)
+        queries = make_queries(vectors, n_queries)
+
+        start = time.perf_counter()
+        exact = build_index("exact", vectors)
+        exact_build = time.perf_counter() - start
+
+        truth, latencies = time_searches(exact, queries, k)
+        baseline_memory = exact.nbytes
+        report.append(row("exact", n, k, exact_build, latencies, exact, 1.0))
+        del exact
+
+        for storage in storages:
+            for rescore in (0, 4):
+                start = time.perf_counter()
+                quantized = build_index("exact", vectors, storage=storage, rescore=rescore)
+                build_s = time.perf_counter() - start
+                with tempfile.TemporaryDirectory() as path:
+                    quantized.save(path)
+                    del quantized
+                    quantized = load_index(path)
+                    results, latencies = time_searches(quantized, queries, k)
+                    report.append(row(
+                        f"exact({storage},rescore={rescore})", n, k, build_s, latencies,
+                        quantized, recall(results, truth, k),
+                        memory_reduction=round(1 - quantized.nbytes / baseline_memory, 3)
+                    ))
+                    del quantized
+
+        nlist = max(16, int(np.sqrt(n)))
+        start = time.perf_counter()
+        ivf = build_index("ivf", vectors, nlist=nlist)
+        ivf_build = time.perf_counter() - start
+
+        for nprobe in nprobes:
+            results, latencies = time_searches(ivf, queries, k, nprobe=nprobe)
+            report.append(row(
+                f"ivf(nlist={nlist},nprobe={nprobe})", n, k, ivf_build, latencies,
+                ivf, recall(results, truth, k)
+            ))
+        del ivf, vectors
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    report = run(args.sizes, dim=args.dim, k=args.k, n_queries=args.queries)
+
+    print(f"{'index':<32} {'n':>9} {'recall':>7} {'build s':>8} {'p50 ms':>8} {'p99 ms':>8} {'MB':>8} {'mapped MB':>10}")
+    for r in report:
+        print(f"{r['index']:<32} {r['n']:>9} {r['recall']:>7} {r['build_s']:>8} "
+              f"{r['p50_ms']:>8} {r['p99_ms']:>8} {r['memory_mb']:>8} {r['mapped_mb']:>10}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Memory and throughput of the gunicorn serving mode at several worker counts
+
+For each worker count, starts ``gunicorn -c gunicorn.conf.py backend:app``
+against a FakeAnthropicServer and a seeded scratch data directory (see
+benchmarks.loadtest), drives the loadtest traffic mix without assignment
+(the workers have no Gmail mailbox), then reads each worker's RSS and PSS
+from /proc. RSS counts shared pages in full in every worker; PSS splits
+them between the processes sharing them, so total PSS is the real memory
+cost. Run with --no-preload to compare against workers that each load
+their own model. Linux only.
+
+    python -m benchmarks.bench_workers --workers 1 2 4 8 --duration 30
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+from benchmarks.fake_anthropic import FakeAnthropicServer
+from benchmarks.loadtest import free_port, load_state, parse_mix, percentile, run_traffic, seed_database
+from database import ArbitrationDB
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def memory_kb(pid):
+    """(RSS, PSS) of a process in KiB"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key] = int(rest.split()[0])
+    return values.get("Rss", 0), values.get("Pss", 0)
+
+
+def child_pids(pid):
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces; the parent pid follows the state after it
+        if int(stat.rsplit(")", 1)[1].split()[1]) == pid:
+            children.append(int(entry))
+    return children
+
+
+def start_server(workers, data_dir, anthropic_url, preload):
+    port = free_port()
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_PRELOAD="1" if preload else "0",
+        DATA_DIR=data_dir,
+        ANTHROPIC_BASE_URL=anthropic_url,
+        ANTHROPIC_API_KEY="loadtest",
+        # Files that do not exist, so the real mailbox is never authorised
+        GMAIL_TOKEN_PATH=os.path.join(data_dir, "token.json"),
+        GMAIL_CREDENTIALS_PATH=os.path.join(data_dir, "credentials.json"),
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "backend:app"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + 600
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"gunicorn exited with status {process.returncode}")
+        try:
+            if requests.get(base_url, timeout=5).ok and len(child_pids(process.pid)) >= workers:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    process.kill()
+    raise SystemExit("gunicorn did not become ready")
+
+
+def stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--concurrency", type=int, default=16, help="Client threads")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--mix", default="cases=30,case=30,chat=25,generate=15")
+    parser.add_argument("--cases", type=int, default=200)
+    parser.add_argument("--emails-per-case", type=int, default=30)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--no-preload", action="store_true", help="Let every worker load the app itself")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    anthropic = FakeAnthropicServer(latency=args.llm_latency, seed=args.seed).start()
+    report = []
+    try:
+        with tempfile.TemporaryDirectory() as data_dir:
+            seed_database(ArbitrationDB(os.path.join(data_dir, "arbitration.db")),
+                          args.cases, args.emails_per_case, args.seed)
+
+            for workers in args.workers:
+                process, base_url = start_server(workers, data_dir, anthropic.url, not args.no_preload)
+                try:
+                    state = load_state(base_url, args.seed)
+                    samples = run_traffic(base_url, state, mix, args.concurrency,
+                                          args.duration, args.warmup, args.seed)
+                    master_rss, master_pss = memory_kb(process.pid)
+                    worker_memory = [memory_kb(pid) for pid in child_pids(process.pid)]
+                finally:
+                    stop_server(process)
+
+                latencies = sorted(l for sample in samples.values() for l in sample["latencies"])
+                errors = sum(n for sample in samples.values() for status, n in sample["statuses"].items()
+                             if not isinstance(status, int) or status >= 400)
+                row = {
+                    "workers": workers,
+                    "preload": not args.no_preload,
+                    "throughput_rps": round(len(latencies) / args.duration, 2),
+                    "errors": errors,
+                    **{f"p{p}_ms": round(percentile(latencies, p) * 1000, 1) if latencies else None
+                       for p in (50, 95, 99)},
+                    "worker_rss_mb": round(sum(r for r, _ in worker_memory) / len(worker_memory) / 1024, 1),
+                    "worker_pss_mb": round(sum(p for _, p in worker_memory) / len(worker_memory) / 1024, 1),
+                    "master_rss_mb": round(master_rss / 1024, 1),
+                    "total_pss_mb": round((master_pss + sum(p for _, p in worker_memory)) / 1024, 1)
+                }
+                report.append(row)
+                print(f"{workers} workers  {row['throughput_rps']:>8} req/s  p50 {row['p50_ms']} ms  "
+                      f"p99 {row['p99_ms']} ms  rss/worker {row['worker_rss_mb']} MB  "
+                      f"pss/worker {row['worker_pss_mb']} MB  total pss {row['total_pss_mb']} MB")
+    finally:
+        anthropic.stop()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
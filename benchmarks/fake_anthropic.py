@@ -0,0 +1,181 @@
+"""Local stand-in for the Anthropic Messages API
+
+FakeAnthropicServer answers POST /v1/messages over HTTP, plain or streamed as
+server-sent events, so the real anthropic client (pointed at it with
+base_url or ANTHROPIC_BASE_URL) can be load-tested without API credits.
+Each response waits ``latency`` seconds before the first token, then emits
+tokens at ``tokens_per_second``; requests can fail with injected 529s.
+Prompts that ask for a JSON object get one back.
+
+    server = FakeAnthropicServer(latency=0.5).start()
+    client = Anthropic(api_key="test", base_url=server.url)
+    ...
+    server.stop()
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = (
+    "Under the SCC Arbitration Rules the Arbitral Tribunal shall conduct the arbitration in an "
+    "impartial, efficient and expeditious manner, giving each party an equal and reasonable "
+    "opportunity to present its case. The parties should confirm the procedural timetable, "
+    "the scope of document production and the dates reserved for the hearing. "
+)
+
+JSON_REPLY = {
+    "parties_mentioned": ["Claimant", "Respondent"],
+    "document_types": ["Statement of Claim"],
+    "key_dates": ["14 May 2025"],
+    "action_items": ["Confirm hearing dates"],
+    "summary": "The parties exchanged submissions on the procedural timetable."
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server.fake
+        if self.path.split("?")[0] != "/v1/messages":
+            return self._send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+
+        length = int(self.headers.get("content-length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        server._count(request.get("model"))
+
+        if server._should_fail():
+            return self._send_json(529, {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}})
+
+        prompt = "".join(
+            m["content"] if isinstance(m["content"], str) else "".join(b.get("text", "") for b in m["content"])
+            for m in request.get("messages", [])
+        )
+        tokens = server.reply_tokens(prompt, request.get("max_tokens", 1024))
+        time.sleep(server.latency)
+
+        if request.get("stream"):
+            self._stream(request, prompt, tokens)
+        else:
+            time.sleep(len(tokens) / server.tokens_per_second)
+            self._send_json(200, self._message(request, prompt, "".join(tokens), len(tokens)))
+
+    def _message(self, request, prompt, text, output_tokens):
+        return {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": request.get("model", "claude-3-haiku-20240307"),
+            "content": [{"type": "text", "text": text}] if text is not None else [],
+            "stop_reason": "end_turn" if text is not None else None,
+            "stop_sequence": None,
+            "usage": {"input_tokens": max(1, len(prompt) // 4), "output_tokens": output_tokens}
+        }
+
+    def _stream(self, request, prompt, tokens):
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("cache-control", "no-cache")
+        self.send_header("connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(name, data):
+            self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode())
+            self.wfile.flush()
+
+        event("message_start", {"type": "message_start", "message": self._message(request, prompt, None, 0)})
+        event("content_block_start", {"type": "content_block_start", "index": 0,
+                                      "content_block": {"type": "text", "text": ""}})
+        interval = 1 / self.server.fake.tokens_per_second
+        for token in tokens:
+            time.sleep(interval)
+            event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                          "delta": {"type": "text_delta", "text": token}})
+        event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        event("message_delta", {"type": "message_delta",
+                                "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                "usage": {"output_tokens": len(tokens)}})
+        event("message_stop", {"type": "message_stop"})
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class FakeAnthropicServer:
+    """Threaded HTTP server speaking enough of the Messages API for the backend
+
+    Args:
+        latency: Seconds before the first token (time to first byte)
+        tokens_per_second: Output speed once generating
+        reply_tokens: Output length in tokens (capped by the request's max_tokens)
+        error_rate: Probability that a request fails with 529 overloaded
+        port: 0 picks a free port
+    """
+
+    def __init__(self, latency=0.5, tokens_per_second=200, reply_tokens=150, error_rate=0.0,
+                 host="127.0.0.1", port=0, seed=0):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.max_reply_tokens = reply_tokens
+        self.error_rate = error_rate
+
+        self.requests = 0
+        self.failures = 0
+        self.models = {}
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-anthropic", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def stats(self):
+        with self._lock:
+            return {"requests": self.requests, "failures": self.failures, "models": dict(self.models)}
+
+    def reply_tokens(self, prompt, max_tokens):
+        """The reply split into roughly token-sized pieces"""
+        if "JSON" in prompt:
+            return [json.dumps(JSON_REPLY)]
+        words = (REPLY * (self.max_reply_tokens // 40 + 1)).split(" ")
+        return [word + " " for word in words[:min(self.max_reply_tokens, max_tokens)]]
+
+    def _count(self, model):
+        with self._lock:
+            self.requests += 1
+            self.models[model] = self.models.get(model, 0) + 1
+
+    def _should_fail(self):
+        with self._lock:
+            failed = self._rng.random() < self.error_rate
+            self.failures += failed
+            return failed
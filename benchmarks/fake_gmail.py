@@ -0,0 +1,409 @@
+"""In-memory stand-in for the Gmail API client
+
+FakeGmailService mimics the parts of the googleapiclient Gmail resource that
+email_reader.GmailReader uses (users().messages(), users().history(),
+users().getProfile() and new_batch_http_request), so the reader can be
+exercised and benchmarked without a real mailbox. Every HTTP round trip
+sleeps for ``latency`` seconds and requests can fail with injected 429s.
+
+    service = FakeGmailService(latency=0.05)
+    service.populate(100)
+    reader = GmailReader.__new__(GmailReader)
+    reader.service = service
+"""
+import base64
+import copy
+import random
+import threading
+import time
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+
+SENDERS = [
+    "Anna Berg <anna.berg@nordlaw.se>",
+    "James Carter <jcarter@carterllp.com>",
+    "SCC Secretariat <secretariat@sccinstitute.com>",
+    "Maria Lopez <m.lopez@lopez-partners.es>",
+    "Tribunal Secretary <secretary@tribunal-office.org>"
+]
+
+TOPICS = [
+    "Statement of Claim", "Request for extension of time", "Procedural Order No. 2",
+    "Document production requests", "Hearing logistics", "Advance on costs",
+    "Witness statements", "Expert report", "Challenge to arbitrator", "Answer to the Request"
+]
+
+PARAGRAPHS = [
+    "Please find attached our submission in accordance with the procedural timetable.",
+    "The Respondent requests a two-week extension of the deadline for its Statement of Defence, "
+    "citing the volume of documents produced by the Claimant.",
+    "Pursuant to Article 28 of the SCC Rules, the Tribunal invites the parties to a case management "
+    "conference to discuss the timetable and the scope of document production.",
+    "The Claimant objects to the Respondent's request and reserves its right to seek costs "
+    "under Article 50.",
+    "We confirm receipt of the advance on costs and note that the balance is due within 30 days.",
+    "Kindly confirm the availability of counsel and witnesses for the hearing dates proposed below."
+]
+
+
+def _http_error(status, reason):
+    resp = httplib2.Response({"status": status})
+    resp.reason = reason
+    content = ('{"error": {"code": %d, "message": "%s", "errors": [{"reason": "%s"}]}}'
+               % (status, reason, reason)).encode()
+    return HttpError(resp, content)
+
+
+def make_pdf(pages):
+    """Build a minimal single-font PDF with one text line per entry in pages"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        safe = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        stream = f"BT /F1 11 Tf 50 750 Td ({safe}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return out.encode("latin-1")
+
+
+class _Request:
+    """A single API request; execute() costs one HTTP round trip"""
+
+    def __init__(self, service, fn):
+        self._service = service
+        self._fn = fn
+
+    def execute(self):
+        self._service._round_trip()
+        return self._run()
+
+    def _run(self):
+        self._service._maybe_fail()
+        return self._fn()
+
+
+class _Batch:
+    """googleapiclient BatchHttpRequest: many requests in one round trip"""
+
+    def __init__(self, service, callback=None):
+        self._service = service
+        self._callback = callback
+        self._requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        request_id = request_id or str(len(self._requests) + 1)
+        self._requests.append((request_id, request, callback))
+
+    def execute(self):
+        if len(self._requests) > self._service.max_batch:
+            raise _http_error(400, "tooManyRequestsInBatch")
+        self._service._round_trip(items=len(self._requests))
+        for request_id, request, callback in self._requests:
+            callback = callback or self._callback
+            try:
+                response, error = request._run(), None
+            except HttpError as e:
+                response, error = None, e
+            if callback:
+                callback(request_id, response, error)
+
+
+class _Attachments:
+    def __init__(self, service):
+        self._service = service
+
+    def get(self, userId, messageId, id):
+        def fn():
+            data = self._service.attachment_data[(messageId, id)]
+            return {"size": len(data), "data": base64.urlsafe_b64encode(data).decode()}
+        return _Request(self._service, fn)
+
+
+class _Messages:
+    def __init__(self, service):
+        self._service = service
+
+    def list(self, userId, labelIds=None, maxResults=100, pageToken=None, q=None):
+        return _Request(self._service, lambda: self._service._list(labelIds or [], maxResults, pageToken))
+
+    def get(self, userId, id, format="full", metadataHeaders=None):
+        return _Request(self._service, lambda: self._service._get(id, format))
+
+    def modify(self, userId, id, body):
+        return _Request(self._service, lambda: self._service._modify(
+            [id], body.get("addLabelIds", []), body.get("removeLabelIds", [])
+        )[0])
+
+    def batchModify(self, userId, body):
+        def fn():
+            if len(body["ids"]) > 1000:
+                raise _http_error(400, "invalidArgument")
+            self._service._modify(body["ids"], body.get("addLabelIds", []), body.get("removeLabelIds", []))
+            return ""
+        return _Request(self._service, fn)
+
+    def attachments(self):
+        return _Attachments(self._service)
+
+
+class _History:
+    def __init__(self, service):
+        self._service = service
+
+    def list(self, userId, startHistoryId, historyTypes=None, labelId=None, maxResults=100, pageToken=None):
+        return _Request(self._service, lambda: self._service._history_list(
+            int(startHistoryId), labelId, maxResults, pageToken
+        ))
+
+
+class _Users:
+    def __init__(self, service):
+        self._service = service
+
+    def messages(self):
+        return _Messages(self._service)
+
+    def history(self):
+        return _History(self._service)
+
+    def getProfile(self, userId):
+        return _Request(self._service, lambda: {
+            "emailAddress": "arbitrator@example.com",
+            "messagesTotal": len(self._service.messages),
+            "historyId": str(self._service.history_id)
+        })
+
+
+class FakeGmailService:
+    """In-memory Gmail mailbox with simulated network latency and rate limits
+
+    Args:
+        latency: Seconds per HTTP round trip (a single request or a whole batch)
+        batch_item_latency: Extra server time per request inside a batch
+        error_rate: Probability that any request fails with a 429
+        history_retention: Number of history records kept; older start IDs get a 404
+    """
+
+    def __init__(self, latency=0.05, batch_item_latency=0.001, error_rate=0.0, seed=0,
+                 max_batch=100, history_retention=10000):
+        self.latency = latency
+        self.batch_item_latency = batch_item_latency
+        self.error_rate = error_rate
+        self.max_batch = max_batch
+        self.history_retention = history_retention
+
+        self.messages = {}
+        self.attachment_data = {}
+        self.history = []
+        self.history_id = 1000
+
+        self.round_trips = 0
+        self.requests = 0
+
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+        self._next_id = 1
+
+    # ---- googleapiclient surface ----
+
+    def users(self):
+        return _Users(self)
+
+    def new_batch_http_request(self, callback=None):
+        return _Batch(self, callback)
+
+    # ---- mailbox setup ----
+
+    def add_message(self, subject, sender, body, labels=("INBOX", "UNREAD"), attachments=(), internal_date=None):
+        """Add a message (as if delivered now) and return its ID
+
+        Args:
+            attachments: (filename, data, mime_type) tuples
+        """
+        with self._lock:
+            msg_id = f"{self._next_id:016x}"
+            self._next_id += 1
+
+            parts = [{
+                "partId": "0",
+                "mimeType": "text/plain",
+                "filename": "",
+                "headers": [{"name": "Content-Type", "value": "text/plain; charset=UTF-8"}],
+                "body": {"size": len(body), "data": base64.urlsafe_b64encode(body.encode()).decode()}
+            }]
+            for i, (filename, data, mime_type) in enumerate(attachments, start=1):
+                attachment_id = f"att-{msg_id}-{i}"
+                self.attachment_data[(msg_id, attachment_id)] = data
+                parts.append({
+                    "partId": str(i),
+                    "mimeType": mime_type,
+                    "filename": filename,
+                    "headers": [{"name": "Content-Disposition", "value": f'attachment; filename="{filename}"'}],
+                    "body": {"attachmentId": attachment_id, "size": len(data)}
+                })
+
+            self.history_id += 1
+            message = {
+                "id": msg_id,
+                "threadId": msg_id,
+                "labelIds": list(labels),
+                "snippet": body[:120],
+                "historyId": str(self.history_id),
+                "internalDate": str(internal_date or int(time.time() * 1000) + self._next_id),
+                "sizeEstimate": len(body) + sum(len(a[1]) for a in attachments),
+                "payload": {
+                    "partId": "",
+                    "mimeType": "multipart/mixed",
+                    "filename": "",
+                    "headers": [
+                        {"name": "From", "value": sender},
+                        {"name": "To", "value": "arbitrator@example.com"},
+                        {"name": "Subject", "value": subject},
+                        {"name": "Date", "value": time.strftime("%a, %d %b %Y %H:%M:%S +0000", time.gmtime())}
+                    ],
+                    "body": {"size": 0},
+                    "parts": parts
+                }
+            }
+            self.messages[msg_id] = message
+            self._record({"messagesAdded": [{"message": self._stub(message)}]})
+            return msg_id
+
+    def delete_message(self, msg_id):
+        with self._lock:
+            message = self.messages.pop(msg_id)
+            self.history_id += 1
+            self._record({"messagesDeleted": [{"message": self._stub(message)}]})
+
+    def populate(self, n, attachment_every=4, pdf_pages=3, seed=0):
+        """Add n realistic arbitration emails, every attachment_every-th with a PDF"""
+        rng = random.Random(seed)
+        ids = []
+        for i in range(n):
+            reference = f"SCC-{rng.choice([2024, 2025, 2026])}-{rng.randint(1, 40):03d}"
+            topic = rng.choice(TOPICS)
+            body = "\n\n".join(["Dear Members of the Tribunal,"] + rng.sample(PARAGRAPHS, 3) +
+                               [f"Yours sincerely,\n{rng.choice(SENDERS).split(' <')[0]}"])
+            attachments = []
+            if attachment_every and i % attachment_every == 0:
+                pages = [f"{topic} - {reference} - page {p + 1}: " + rng.choice(PARAGRAPHS)
+                         for p in range(pdf_pages)]
+                attachments.append((f"{topic.replace(' ', '_')}.pdf", make_pdf(pages), "application/pdf"))
+            ids.append(self.add_message(f"{reference} - {topic}", rng.choice(SENDERS), body,
+                                        attachments=attachments))
+        return ids
+
+    # ---- simulated server ----
+
+    def _round_trip(self, items=1):
+        with self._lock:
+            self.round_trips += 1
+            self.requests += items
+        time.sleep(self.latency + self.batch_item_latency * (items - 1))
+
+    def _maybe_fail(self):
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise _http_error(429, "rateLimitExceeded")
+
+    def _stub(self, message):
+        return {"id": message["id"], "threadId": message["threadId"], "labelIds": list(message["labelIds"])}
+
+    def _record(self, record):
+        record["id"] = str(self.history_id)
+        self.history.append(record)
+        if len(self.history) > self.history_retention:
+            del self.history[:len(self.history) - self.history_retention]
+
+    def _list(self, label_ids, max_results, page_token):
+        with self._lock:
+            matching = [m for m in self.messages.values() if all(l in m["labelIds"] for l in label_ids)]
+        matching.sort(key=lambda m: int(m["internalDate"]), reverse=True)
+
+        offset = int(page_token or 0)
+        page = matching[offset:offset + max_results]
+        result = {
+            "messages": [{"id": m["id"], "threadId": m["threadId"]} for m in page],
+            "resultSizeEstimate": len(matching)
+        }
+        if offset + max_results < len(matching):
+            result["nextPageToken"] = str(offset + max_results)
+        if not page:
+            del result["messages"]
+        return result
+
+    def _get(self, msg_id, format):
+        with self._lock:
+            if msg_id not in self.messages:
+                raise _http_error(404, "notFound")
+            message = copy.deepcopy(self.messages[msg_id])
+
+        if format == "minimal":
+            del message["payload"]
+        elif format == "metadata":
+            message["payload"] = {
+                "partId": "",
+                "mimeType": message["payload"]["mimeType"],
+                "headers": message["payload"]["headers"]
+            }
+        return message
+
+    def _modify(self, msg_ids, add_labels, remove_labels):
+        with self._lock:
+            results = []
+            for msg_id in msg_ids:
+                if msg_id not in self.messages:
+                    raise _http_error(404, "notFound")
+                message = self.messages[msg_id]
+                added = [l for l in add_labels if l not in message["labelIds"]]
+                removed = [l for l in remove_labels if l in message["labelIds"]]
+                message["labelIds"] = [l for l in message["labelIds"] if l not in removed] + added
+
+                if added or removed:
+                    self.history_id += 1
+                    message["historyId"] = str(self.history_id)
+                    record = {}
+                    if added:
+                        record["labelsAdded"] = [{"message": self._stub(message), "labelIds": added}]
+                    if removed:
+                        record["labelsRemoved"] = [{"message": self._stub(message), "labelIds": removed}]
+                    self._record(record)
+                results.append(self._stub(message))
+            return results
+
+    def _history_list(self, start_history_id, label_id, max_results, page_token):
+        with self._lock:
+            oldest = int(self.history[0]["id"]) if self.history else self.history_id
+            if start_history_id < oldest - 1:
+                raise _http_error(404, "notFound")
+
+            records = [r for r in self.history if int(r["id"]) > start_history_id]
+            if label_id:
+                records = [r for r in records if any(
+                    label_id in entry["message"]["labelIds"] or label_id in entry.get("labelIds", [])
+                    for key in ("messagesAdded", "messagesDeleted", "labelsAdded", "labelsRemoved")
+                    for entry in r.get(key, [])
+                )]
+
+            offset = int(page_token or 0)
+            page = copy.deepcopy(records[offset:offset + max_results])
+            result = {"historyId": str(self.history_id)}
+            if page:
+                result["history"] = page
+            if offset + max_results < len(records):
+                result["nextPageToken"] = str(offset + max_results)
+            return result
@@ -0,0 +1,80 @@
+"""In-process stand-in LLM providers for exercising llm_router.LLMRouter
+
+FakeProvider is a llm_router.Provider whose calls sleep instead of calling
+an API. Latency has a long tail (a ``slow_rate`` fraction of calls take
+``slow_latency``), calls fail with injected 529s at ``error_rate``, and the
+provider enforces its own quota: beyond ``quota_per_minute`` calls in a
+sliding minute it answers 429 with a Retry-After, like a real API under a
+burst.
+
+    claude = FakeProvider("claude", latency=0.3, slow_rate=0.05, quota_per_minute=120)
+    gemini = FakeProvider("gemini", latency=0.2)
+    router = LLMRouter([claude, gemini], hedge_after=1.0)
+"""
+import collections
+import random
+import threading
+import time
+
+from llm_router import Provider
+
+
+class FakeAPIError(Exception):
+    """An HTTP error as the SDKs raise them: status_code and response headers"""
+
+    def __init__(self, status_code, message, retry_after=None):
+        super().__init__(f"{status_code} {message}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"headers": {"retry-after": str(retry_after)} if retry_after else {}})()
+
+
+class FakeProvider(Provider):
+    """Provider that sleeps for a simulated latency and fails like an overloaded API
+
+    Args:
+        latency: Seconds a normal call takes (±20% jitter)
+        slow_rate: Fraction of calls that take slow_latency instead
+        error_rate: Probability that a call fails with 529 overloaded
+        quota_per_minute: Calls the fake API accepts per sliding minute, None for unlimited
+        **limits: Passed to Provider (max_concurrency, requests_per_minute, timeout)
+    """
+
+    def __init__(self, name, latency=0.3, slow_rate=0.0, slow_latency=5.0, error_rate=0.0,
+                 quota_per_minute=None, seed=0, label=None, **limits):
+        super().__init__(name, label or name, **limits)
+        self.latency = latency
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.quota_per_minute = quota_per_minute
+
+        self.received = 0
+        self.errors = 0
+        self._recent = collections.deque()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def complete(self, prompt, max_tokens, timeout):
+        with self._lock:
+            self.received += 1
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            if self.quota_per_minute and len(self._recent) >= self.quota_per_minute:
+                self.errors += 1
+                raise FakeAPIError(429, "rate_limit_error", retry_after=round(60 - (now - self._recent[0]), 1))
+            self._recent.append(now)
+            fail = self._rng.random() < self.error_rate
+            slow = self._rng.random() < self.slow_rate
+            jitter = self._rng.uniform(0.8, 1.2)
+
+        duration = (self.slow_latency if slow else self.latency) * jitter
+        if duration > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"{self.name} timed out after {timeout:.1f}s")
+        time.sleep(duration)
+        if fail:
+            with self._lock:
+                self.errors += 1
+            raise FakeAPIError(529, "overloaded_error")
+        return f"{self.name} answer to {len(prompt)} characters"
@@ -0,0 +1,337 @@
+"""End-to-end load test of backend.py against local fakes
+
+Starts a FakeAnthropicServer, seeds a scratch data directory (cases with
+realistic email histories), imports the backend with DATA_DIR and
+ANTHROPIC_BASE_URL pointed at them, swaps its Gmail client for a
+FakeGmailService mailbox and serves it with uvicorn on a free port. Worker
+threads then replay a weighted mix of dashboard traffic (case list, case
+detail, chat, generate, assign) for --duration seconds and the report gives
+throughput and p50/p95/p99 latency per endpoint.
+
+Case list/detail requests revalidate with If-None-Match like a browser, so
+a share of them are 304s. Nothing touches a real mailbox or the Anthropic
+API; the first requests also pay for model warm-up, which --warmup excludes.
+
+    python -m benchmarks.loadtest --concurrency 16 --duration 60 --llm-latency 0.8
+    python -m benchmarks.loadtest --url http://localhost:8000   # an already running backend
+"""
+import argparse
+import json
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+from benchmarks.fake_anthropic import FakeAnthropicServer
+from benchmarks.fake_gmail import PARAGRAPHS, SENDERS, TOPICS, FakeGmailService
+
+DEFAULT_MIX = "cases=40,case=25,chat=15,generate=10,assign=10"
+GENERATE_KINDS = ["background-summary", "email-response", "case-analysis"]
+FREE_CHAT = [
+    "Summarise the latest submission from the respondent.",
+    "Who are the parties' counsel?",
+    "What did the claimant say about document production?",
+]
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise SystemExit(f"Unknown operation in --mix: {name}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def seed_database(db, n_cases, emails_per_case, seed=0):
+    """Cases with email histories shaped like the ones assignment produces"""
+    rng = random.Random(seed)
+    for i in range(n_cases):
+        case_id = db.create_case(f"{rng.choice(TOPICS)} ({i})", f"SCC-{2020 + i // 1000}-{i % 1000:03d}")
+        db.add_emails_bulk([
+            (
+                case_id,
+                rng.choice(SENDERS),
+                f"SCC-{2020 + i // 1000}-{i % 1000:03d} - {rng.choice(TOPICS)}",
+                "\n\n".join(["Dear Members of the Tribunal,"] + rng.sample(PARAGRAPHS, 4)),
+                {"summary": rng.choice(PARAGRAPHS)}
+            )
+            for _ in range(emails_per_case)
+        ])
+
+
+# ---- traffic ----
+
+class FailedRequest:
+    """Stands in for a response when the request itself failed (timeout, connection reset)"""
+
+    def __init__(self, error):
+        self.status_code = type(error).__name__
+        self.headers = {}
+
+
+class Client:
+    """One simulated user: a session plus the validators its browser would keep"""
+
+    def __init__(self, base_url, state, rng):
+        self.base_url = base_url
+        self.state = state
+        self.rng = rng
+        self.session = requests.Session()
+        self.etags = {}
+
+    def get_cached(self, path):
+        headers = {"If-None-Match": self.etags[path]} if path in self.etags else {}
+        response = self.request("GET", path, headers=headers, timeout=120)
+        if response.status_code == 200 and "etag" in response.headers:
+            self.etags[path] = response.headers["etag"]
+        return response
+
+    def post(self, path, body):
+        return self.request("POST", path, json=body, timeout=300)
+
+    def request(self, method, path, **kwargs):
+        try:
+            return self.session.request(method, self.base_url + path, **kwargs)
+        except requests.RequestException as e:
+            return FailedRequest(e)
+
+
+def op_cases(client):
+    return "GET /api/cases", client.get_cached("/api/cases")
+
+
+def op_case(client):
+    case_id = client.rng.choice(client.state["case_ids"])
+    return "GET /api/cases/{id}", client.get_cached(f"/api/cases/{case_id}")
+
+
+def op_chat(client):
+    questions = client.state["questions"] if client.rng.random() < 0.5 else FREE_CHAT
+    body = {"case_id": client.rng.choice(client.state["case_ids"]), "message": client.rng.choice(questions)}
+    return "POST /api/chat", client.post("/api/chat", body)
+
+
+def op_generate(client):
+    kind = client.rng.choice(GENERATE_KINDS)
+    body = {"case_id": client.rng.choice(client.state["case_ids"]), "message": ""}
+    return f"POST /api/generate/{kind}", client.post(f"/api/generate/{kind}", body)
+
+
+def op_assign(client):
+    with client.state["lock"]:
+        gmail_id = client.state["inbox"].pop() if client.state["inbox"] else None
+    if gmail_id is None:
+        return "POST /api/emails/assign", None
+    body = {"email_id": gmail_id, "case_id": client.rng.choice(client.state["case_ids"])}
+    return "POST /api/emails/assign", client.post("/api/emails/assign", body)
+
+
+OPERATIONS = {
+    "cases": op_cases,
+    "case": op_case,
+    "chat": op_chat,
+    "generate": op_generate,
+    "assign": op_assign,
+}
+
+
+def load_state(base_url, seed):
+    """Case IDs, unread inbox IDs and chat questions for the traffic mix"""
+    session = requests.Session()
+    case_ids = [c["id"] for c in session.get(f"{base_url}/api/cases", timeout=120).json()["cases"]]
+    if not case_ids:
+        raise SystemExit("The backend has no cases to load-test against")
+
+    inbox = []
+    cursor = None
+    while True:
+        params = {"limit": 100, **({"cursor": cursor} if cursor else {})}
+        page = session.get(f"{base_url}/api/emails/unread", params=params, timeout=120).json()
+        inbox.extend(e["id"] for e in page.get("emails", []))
+        cursor = page.get("next_cursor")
+        if not cursor:
+            break
+    random.Random(seed).shuffle(inbox)
+
+    with open(os.path.join(os.path.dirname(__file__), "scc_questions.json")) as f:
+        questions = [q["question"] for q in json.load(f)["questions"]]
+
+    return {"case_ids": case_ids, "inbox": inbox, "questions": questions, "lock": threading.Lock()}
+
+
+def run_traffic(base_url, state, mix, concurrency, duration, warmup, seed):
+    """Workers pick operations by weight until the deadline; returns per-endpoint samples"""
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    samples = defaultdict(lambda: {"latencies": [], "statuses": defaultdict(int), "skipped": 0})
+    lock = threading.Lock()
+    record_from = time.monotonic() + warmup
+    deadline = record_from + duration
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        client = Client(base_url, state, rng)
+        while time.monotonic() < deadline:
+            operation = OPERATIONS[rng.choices(names, weights)[0]]
+            start = time.perf_counter()
+            endpoint, response = operation(client)
+            elapsed = time.perf_counter() - start
+            if time.monotonic() < record_from:
+                continue
+            with lock:
+                sample = samples[endpoint]
+                if response is None:
+                    sample["skipped"] += 1
+                    continue
+                sample["statuses"][response.status_code] += 1
+                sample["latencies"].append(elapsed)
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def summarize(samples, duration):
+    rows = []
+    for endpoint, sample in sorted(samples.items()):
+        latencies = sorted(sample["latencies"])
+        errors = sum(n for status, n in sample["statuses"].items()
+                     if not isinstance(status, int) or status >= 400)
+        rows.append({
+            "endpoint": endpoint,
+            "requests": len(latencies),
+            "rps": round(len(latencies) / duration, 2),
+            "errors": errors,
+            "not_modified": sample["statuses"].get(304, 0),
+            "skipped": sample["skipped"],
+            **{f"p{p}_ms": round(percentile(latencies, p) * 1000, 1) if latencies else None
+               for p in (50, 95, 99)}
+        })
+    return rows
+
+
+# ---- in-process backend ----
+
+def start_backend(data_dir, anthropic_url, gmail, port):
+    """Import backend.py against the fakes and serve it with uvicorn in a thread"""
+    os.environ.update({
+        "DATA_DIR": data_dir,
+        "ANTHROPIC_BASE_URL": anthropic_url,
+        "ANTHROPIC_API_KEY": "loadtest",
+        # Files that do not exist, so the real mailbox is never authorised
+        "GMAIL_TOKEN_PATH": os.path.join(data_dir, "token.json"),
+        "GMAIL_CREDENTIALS_PATH": os.path.join(data_dir, "credentials.json"),
+    })
+    import uvicorn
+    import backend
+
+    backend.gmail_reader.service = gmail
+    # The worker's first attempt ran before the fake was attached
+    backend.sync_worker.sync_once()
+
+    server = uvicorn.Server(uvicorn.Config(backend.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="loadtest-backend", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise SystemExit("Backend failed to start")
+        time.sleep(0.05)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+def free_port():
+    import socket
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Drive an already running backend instead of starting one with fakes")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds of traffic before measuring")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Operation weights")
+    parser.add_argument("--cases", type=int, default=200)
+    parser.add_argument("--emails-per-case", type=int, default=30)
+    parser.add_argument("--inbox", type=int, default=500, help="Unread messages in the fake mailbox")
+    parser.add_argument("--gmail-latency", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Fake model time to first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=200)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    anthropic = server = thread = None
+    with tempfile.TemporaryDirectory() as data_dir:
+        base_url = args.url
+        if not base_url:
+            anthropic = FakeAnthropicServer(latency=args.llm_latency, tokens_per_second=args.llm_tokens_per_second,
+                                            error_rate=args.llm_error_rate, seed=args.seed).start()
+            from database import ArbitrationDB
+            seed_database(ArbitrationDB(os.path.join(data_dir, "arbitration.db")),
+                          args.cases, args.emails_per_case, args.seed)
+            gmail = FakeGmailService(latency=args.gmail_latency, seed=args.seed)
+            gmail.populate(args.inbox, seed=args.seed)
+            server, thread, base_url = start_backend(data_dir, anthropic.url, gmail, free_port())
+
+        try:
+            state = load_state(base_url.rstrip("/"), args.seed)
+            print(f"Driving {base_url}: {len(state['case_ids'])} cases, {len(state['inbox'])} unread, "
+                  f"{args.concurrency} workers for {args.duration}s")
+            samples = run_traffic(base_url.rstrip("/"), state, mix, args.concurrency,
+                                  args.duration, args.warmup, args.seed)
+        finally:
+            if server:
+                server.should_exit = True
+                thread.join()
+            if anthropic:
+                anthropic.stop()
+
+    rows = summarize(samples, args.duration)
+    total = sum(r["requests"] for r in rows)
+    print(f"\n{'endpoint':<42} {'reqs':>6} {'rps':>7} {'err':>5} {'304':>5} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for r in rows:
+        print(f"{r['endpoint']:<42} {r['requests']:>6} {r['rps']:>7} {r['errors']:>5} {r['not_modified']:>5} "
+              f"{r['p50_ms'] or '-':>8} {r['p95_ms'] or '-':>8} {r['p99_ms'] or '-':>8}")
+    print(f"\ntotal {total} requests, {total / args.duration:.1f} req/s")
+
+    report = {
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "mix": mix,
+        "throughput_rps": round(total / args.duration, 2),
+        "endpoints": rows,
+        "fake_anthropic": anthropic.stats() if anthropic else None
+    }
+    if anthropic:
+        print(f"fake Anthropic: {report['fake_anthropic']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Case export/import archives: gzip-compressed NDJSON, streamed both ways
+
+An archive is one JSON object per line: a header, then each case followed
+by its emails, each email followed by its documents, then a trailer with
+the record counts so a truncated archive is detected:
+
+    {"type": "header", "format": "scc-case-archive", "version": 1, "exported_at": "..."}
+    {"type": "case", "id": 7, "case_name": "...", "case_reference": "SCC-2025-007", "created_at": "..."}
+    {"type": "email", "id": 31, "case_id": 7, "sender": "...", "body": "...", "extracted_info": "{...}", ...}
+    {"type": "document", "id": 2, "email_id": 31, "filename": "...", ...}
+    {"type": "end", "cases": 1, "emails": 1, "documents": 1}
+
+Export and import both stream, so memory use does not grow with the size
+of a case:
+
+    python -m case_archive export --db data/arbitration.db --case 7 -o case-7.ndjson.gz
+    python -m case_archive import --db other.db --on-conflict skip case-7.ndjson.gz
+"""
+import gzip
+import io
+import json
+import zlib
+from datetime import datetime, timezone
+
+FORMAT = "scc-case-archive"
+VERSION = 1
+CONFLICT_MODES = ("rename", "skip", "merge", "fail")
+
+
+class ArchiveError(ValueError):
+    """Not a case archive, an unsupported version, malformed or truncated"""
+
+
+def iter_archive(db, case_ids=None, compresslevel=6, buffer_size=256 * 1024):
+    """A gzip-compressed archive of the cases (all if case_ids is None) as a stream of byte chunks"""
+    counts = {"case": 0, "email": 0, "document": 0}
+
+    def records():
+        yield {"type": "header", "format": FORMAT, "version": VERSION,
+               "exported_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")}
+        for kind, row in db.iter_case_records(case_ids):
+            counts[kind] += 1
+            yield {"type": kind, **row}
+        yield {"type": "end", "cases": counts["case"], "emails": counts["email"], "documents": counts["document"]}
+
+    # wbits 31: gzip container, so the output is a regular .gz file
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, 31)
+    lines = []
+    size = 0
+    for record in records():
+        line = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+        lines.append(line)
+        size += len(line)
+        if size >= buffer_size:
+            chunk = compressor.compress(b"".join(lines))
+            lines.clear()
+            size = 0
+            if chunk:
+                yield chunk
+    yield compressor.compress(b"".join(lines)) + compressor.flush()
+
+
+def export_archive(db, out, case_ids=None):
+    """Write an archive to a binary file object
+
+    Returns:
+        Bytes written
+    """
+    written = 0
+    for chunk in iter_archive(db, case_ids):
+        out.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def read_archive(fileobj):
+    """(kind, row) records of an archive from a binary file object, gzip-compressed or plain
+
+    Raises:
+        ArchiveError: Not an archive, unsupported version, malformed or
+            truncated (raised when reached, after the records before it)
+    """
+    stream = fileobj if hasattr(fileobj, "peek") else io.BufferedReader(fileobj)
+    if stream.peek(2)[:2] == b"\x1f\x8b":
+        stream = gzip.GzipFile(fileobj=stream)
+    lines = io.TextIOWrapper(stream, encoding="utf-8")
+
+    counts = {"case": 0, "email": 0, "document": 0}
+    header = None
+    line_number = 0
+    try:
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            kind = record.pop("type", None)
+            if header is None:
+                if kind != "header" or record.get("format") != FORMAT:
+                    raise ArchiveError("Not a case archive")
+                if record.get("version") != VERSION:
+                    raise ArchiveError(f"Unsupported archive version {record.get('version')}")
+                header = record
+            elif kind in counts:
+                counts[kind] += 1
+                yield kind, record
+            elif kind == "end":
+                expected = {k: record.get(f"{k}s") for k in counts}
+                if expected != counts:
+                    raise ArchiveError(f"Archive records {counts} do not match its trailer {expected}")
+                return
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ArchiveError(f"Malformed archive at line {line_number}: {e}")
+    except (OSError, EOFError, zlib.error) as e:
+        # gzip.BadGzipFile is an OSError; EOFError is a cut-off gzip stream
+        raise ArchiveError(f"Corrupt archive after line {line_number}: {e}")
+    if header is None:
+        raise ArchiveError("Empty archive")
+    raise ArchiveError(f"Archive is truncated after line {line_number}")
+
+
+def import_archive(db, fileobj, on_conflict="rename", chunk_size=1000, summary=None):
+    """Load an archive from a binary file object into db (see ArbitrationDB.import_case_records)
+
+    Raises:
+        ArchiveError: The archive is invalid; the cases before the problem may
+            stay imported (listed in summary), but none is left half imported
+        database.CaseReferenceExists: A case reference exists and on_conflict is 'fail'
+    """
+    if on_conflict not in CONFLICT_MODES:
+        raise ValueError(f"on_conflict must be one of {', '.join(CONFLICT_MODES)}")
+    return db.import_case_records(read_archive(fileobj), on_conflict, chunk_size, summary)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import time
+    from database import ArbitrationDB
+
+    parser = argparse.ArgumentParser(description="Export or import case archives")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Write cases to an archive")
+    export_parser.add_argument("--db", default="data/arbitration.db")
+    export_parser.add_argument("--case", type=int, action="append", help="Case ID (repeatable); default all cases")
+    export_parser.add_argument("-o", "--output", default="-", help="Archive path, - for stdout")
+    import_parser = commands.add_parser("import", help="Load an archive into a database")
+    import_parser.add_argument("--db", default="data/arbitration.db")
+    import_parser.add_argument("--on-conflict", choices=CONFLICT_MODES, default="rename")
+    import_parser.add_argument("--chunk-size", type=int, default=1000, help="Records per transaction")
+    import_parser.add_argument("archive", help="Archive path, - for stdin")
+    args = parser.parse_args()
+
+    db = ArbitrationDB(args.db)
+    start = time.perf_counter()
+    if args.command == "export":
+        if args.output == "-":
+            written = export_archive(db, sys.stdout.buffer, args.case)
+        else:
+            with open(args.output, "wb") as f:
+                written = export_archive(db, f, args.case)
+        print(f"{written} bytes in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    else:
+        summary = {}
+        try:
+            if args.archive == "-":
+                import_archive(db, sys.stdin.buffer, args.on_conflict, args.chunk_size, summary)
+            else:
+                with open(args.archive, "rb") as f:
+                    import_archive(db, f, args.on_conflict, args.chunk_size, summary)
+        except ValueError as e:
+            sys.exit(f"Import failed: {e}; {summary['cases'] + summary['merged']} complete cases stay imported"
+                     " (import again with --on-conflict skip to resume)")
+        summary.pop("case_ids")
+        print(f"{json.dumps(summary)} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
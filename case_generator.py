@@ -0,0 +1,243 @@
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+# Building blocks for synthetic (no LLM) cases
+INDUSTRIES = ["Energy", "Construction", "Shipping", "Telecom", "Mining", "Pharma", "Software", "Agri"]
+COMPANY_SUFFIXES = ["AB", "Ltd", "GmbH", "S.A.", "LLC", "Oy", "AS"]
+ROLES = [
+    ("Counsel for Claimant", "claimant-counsel.com"),
+    ("Counsel for Respondent", "respondent-law.com"),
+    ("Chairperson of the Tribunal", "tribunal-chair.org"),
+    ("SCC Secretariat", "sccinstitute.com"),
+]
+FIRST_NAMES = ["Anna", "James", "Maria", "Lars", "Sofia", "David", "Elin", "Omar", "Ingrid", "Paul"]
+LAST_NAMES = ["Berg", "Carter", "Lopez", "Nilsson", "Rossi", "Meyer", "Khan", "Dubois", "Holm", "Tanaka"]
+TOPICS = [
+    ("Request for Arbitration", "Request for Arbitration"),
+    ("Answer to the Request", "Answer"),
+    ("Procedural Order No. {n}", "Procedural Order"),
+    ("Statement of Claim", "Statement of Claim"),
+    ("Statement of Defence", "Statement of Defence"),
+    ("Request for extension of time", "Correspondence"),
+    ("Document production requests", "Redfern Schedule"),
+    ("Witness statements", "Witness Statement"),
+    ("Expert report", "Expert Report"),
+    ("Advance on costs", "Invoice"),
+    ("Hearing logistics", "Correspondence"),
+]
+PARAGRAPHS = [
+    "Please find attached our submission in accordance with the procedural timetable.",
+    "The Respondent requests a two-week extension of the deadline for its Statement of Defence, "
+    "citing the volume of documents produced by the Claimant.",
+    "Pursuant to Article 28 of the SCC Rules, the Tribunal invites the parties to a case management "
+    "conference to discuss the timetable and the scope of document production.",
+    "The Claimant objects to the Respondent's request and reserves its right to seek costs under Article 50.",
+    "We confirm receipt of the advance on costs and note that the balance is due within 30 days.",
+    "Kindly confirm the availability of counsel and witnesses for the hearing dates proposed below.",
+    "The Tribunal has considered the parties' submissions and will issue its decision in due course.",
+    "The Respondent maintains that the claims are time-barred under the applicable law.",
+]
+ACTIONS = ["Confirm hearing dates", "File reply submission", "Pay advance on costs",
+           "Produce requested documents", "Comment on draft procedural order"]
+
+
+def spread_timestamps(count, time_span_days, end=None, rng=None):
+    """count ascending 'YYYY-MM-DD HH:MM:SS' UTC timestamps spread over the last time_span_days
+
+    The span is split into equal slots with one timestamp at a random point
+    in each, so emails are spaced out like real correspondence rather than
+    bunched together.
+    """
+    rng = rng or random.Random()
+    end = end or datetime.now(timezone.utc)
+    span = timedelta(days=max(time_span_days, 1)).total_seconds()
+    slot = span / max(count, 1)
+    start = end - timedelta(seconds=span)
+    return [
+        (start + timedelta(seconds=i * slot + rng.random() * slot)).strftime("%Y-%m-%d %H:%M:%S")
+        for i in range(count)
+    ]
+
+
+def parse_json_response(text):
+    """The JSON object in a model reply, tolerating code fences and surrounding prose"""
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("No JSON object in response")
+    return json.loads(text[start:end + 1])
+
+
+def synthetic_case(rng, num_emails, time_span, index=0):
+    """A case and its emails built from templates, for test and benchmark data
+
+    Returns:
+        (case_name, emails) with emails as (sender, subject, body, received_at, extracted_info)
+    """
+    claimant = f"{rng.choice(INDUSTRIES)} {rng.choice(LAST_NAMES)} {rng.choice(COMPANY_SUFFIXES)}"
+    respondent = f"{rng.choice(INDUSTRIES)} {rng.choice(LAST_NAMES)} {rng.choice(COMPANY_SUFFIXES)}"
+    case_name = f"{claimant} v. {respondent}" + (f" ({index})" if index else "")
+    people = [
+        (f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", role, domain)
+        for role, domain in ROLES
+    ]
+
+    emails = []
+    for n, received_at in enumerate(spread_timestamps(num_emails, time_span, rng=rng), 1):
+        name, role, domain = rng.choice(people)
+        topic, document = rng.choice(TOPICS)
+        topic = topic.format(n=n)
+        paragraphs = rng.sample(PARAGRAPHS, 3)
+        body = "\n\n".join(["Dear Members of the Tribunal,"] + paragraphs +
+                           [f"Yours sincerely,\n{name}\n{role}"])
+        emails.append((
+            f"{name} <{name.split()[0].lower()}@{domain}>",
+            f"{case_name.split(' (')[0]} - {topic}",
+            body,
+            received_at,
+            {
+                "parties_mentioned": [claimant, respondent],
+                "document_types": [document],
+                "key_dates": [received_at[:10]],
+                "action_items": rng.sample(ACTIONS, 2),
+                "summary": paragraphs[0]
+            }
+        ))
+    return case_name, emails
+
+
+def generate_synthetic_dataset(db, num_cases, emails_per_case, time_span=365, seed=0,
+                               cases_per_transaction=100, progress=None):
+    """Bulk-insert num_cases synthetic cases of emails_per_case emails each, without any LLM
+
+    Cases are written cases_per_transaction at a time, so 100k emails take
+    a few hundred transactions rather than one per email.
+
+    Returns:
+        List of created case IDs
+    """
+    rng = random.Random(seed)
+    case_ids = []
+    for start in range(0, num_cases, cases_per_transaction):
+        batch = []
+        for i in range(start, min(start + cases_per_transaction, num_cases)):
+            case_name, emails = synthetic_case(rng, emails_per_case, time_span, index=i + 1)
+            batch.append((case_name, None, emails))
+        case_ids.extend(case_id for case_id, _ in db.add_cases_with_emails(batch))
+        if progress:
+            progress(len(case_ids), num_cases)
+    return case_ids
+
+
+class CaseGenerator:
+    """Generates a realistic demo case with the LLM: an outline, then every email in parallel
+
+    One outline call fixes the parties and a brief for each email; the
+    emails are then written concurrently (up to max_concurrency at once,
+    within the llm_router.LLMRouter's rate limits and retries) with each
+    call also returning the extraction info the assign flow would store.
+    Emails get received_at times spread over the requested span, and the
+    case is inserted with all its emails in one transaction. An email whose
+    call fails falls back to a synthetic one so the case is still complete.
+    """
+
+    def __init__(self, llm, db, max_concurrency=8):
+        self.llm = llm
+        self.db = db
+        self.max_concurrency = max_concurrency
+
+    def _complete(self, prompt, max_tokens):
+        return parse_json_response(self.llm.complete(prompt, max_tokens=max_tokens, provider="claude").text)
+
+    def outline(self, description, num_emails):
+        return self._complete(f"""Invent a realistic SCC arbitration for this dispute: {description}
+
+Return ONLY a valid JSON object:
+{{
+    "case_name": "Claimant v. Respondent",
+    "claimant": "company name",
+    "respondent": "company name",
+    "participants": [{{"name": "...", "role": "e.g. Counsel for Claimant", "email": "..."}}],
+    "emails": [{{"from": "participant email", "subject": "...", "brief": "what this email says"}}]
+}}
+
+The emails list must have exactly {num_emails} entries in chronological order, following the
+procedure from the Request for Arbitration onwards.""", max_tokens=4000)
+
+    def write_email(self, outline, position):
+        brief = outline["emails"][position]
+        context = "\n".join(
+            f"{i + 1}. {e.get('subject')}: {e.get('brief')}" for i, e in enumerate(outline["emails"])
+        )
+        return self._complete(f"""Arbitration: {outline.get('case_name')}
+Claimant: {outline.get('claimant')}; Respondent: {outline.get('respondent')}
+Correspondence in this case:
+{context}
+
+Write email {position + 1} in full. From: {brief.get('from')}. Subject: {brief.get('subject')}.
+Return ONLY a valid JSON object:
+{{
+    "body": "the full email text",
+    "parties_mentioned": ["list", "of", "parties"],
+    "document_types": ["list", "of", "documents"],
+    "key_dates": ["list", "of", "dates"],
+    "action_items": ["list", "of", "actions"],
+    "summary": "brief summary in 2-3 sentences"
+}}""", max_tokens=1500)
+
+    def generate(self, description, num_emails=10, time_span=60, seed=None):
+        """Generate and store one case
+
+        Returns:
+            Dict with case_id, case_reference, the number of emails and how many fell back to synthetic text
+        """
+        rng = random.Random(seed)
+        outline = self.outline(description, num_emails)
+        briefs = (outline.get("emails") or [])[:num_emails]
+        outline["emails"] = briefs
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            futures = [pool.submit(self.write_email, outline, i) for i in range(len(briefs))]
+
+        _, fallback_emails = synthetic_case(rng, len(briefs), time_span)
+        received = spread_timestamps(len(briefs), time_span, rng=rng)
+        emails = []
+        failed = 0
+        for brief, future, fallback, received_at in zip(briefs, futures, fallback_emails, received):
+            try:
+                written = future.result()
+                body = written.pop("body")
+            except Exception as e:
+                print(f"Email generation failed, using synthetic text: {e}")
+                failed += 1
+                body, written = fallback[2], fallback[4]
+            emails.append((brief.get("from") or fallback[0], brief.get("subject") or fallback[1],
+                           body, received_at, written))
+
+        case_name = outline.get("case_name") or description[:80]
+        (case_id, case_reference), = self.db.add_cases_with_emails([(case_name, None, emails)])
+        return {"case_id": case_id, "case_reference": case_reference, "emails": len(emails), "failed": failed}
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import ArbitrationDB
+
+    parser = argparse.ArgumentParser(description="Fill a database with synthetic cases (no LLM calls)")
+    parser.add_argument("--db", default="data/arbitration.db")
+    parser.add_argument("--cases", type=int, default=1000)
+    parser.add_argument("--emails-per-case", type=int, default=100)
+    parser.add_argument("--time-span", type=int, default=365, help="Days the emails of a case are spread over")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    generate_synthetic_dataset(
+        ArbitrationDB(args.db), args.cases, args.emails_per_case, args.time_span, args.seed,
+        progress=lambda done, total: print(f"\r{done}/{total} cases", end="", flush=True)
+    )
+    elapsed = time.perf_counter() - start
+    total = args.cases * args.emails_per_case
+    print(f"\n{total} emails in {elapsed:.1f}s ({total / elapsed:.0f} emails/s)")
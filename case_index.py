@@ -0,0 +1,257 @@
+import os
+import json
+import threading
+import numpy as np
+from typing import List, Dict
+from vector_index import ExactIndex, normalize
+from process_lock import file_lock
+
+
+class CaseIndex:
+    """Per-case retrieval index over email bodies and PDF attachment text.
+
+    Every case gets its own directory under ``root`` with two append-only
+    files: ``chunks.jsonl`` (one metadata line per chunk) and ``vectors.f32``
+    (raw float32 embeddings, one row per chunk, in the same order). New
+    emails are appended to both files, so the index never needs a rebuild.
+
+    Vectors are memory-mapped rather than read into RAM, so server worker
+    processes share one copy through the page cache. Appends take a file
+    lock in the case directory, and a cached case is reloaded when its files
+    have grown, whichever process appended to them.
+    """
+
+    def __init__(self, embedding_model, root="data/case_index", chunk_size=800, chunk_overlap=150,
+                 query_encoder=None):
+        self.embedding_model = embedding_model
+        # Encodes search queries, e.g. a shared EmbeddingBatcher; indexing
+        # encodes through embedding_model directly, so a large email doesn't
+        # queue queries behind it
+        self.query_encoder = query_encoder or embedding_model
+        self.root = root
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+        # case_id -> {"chunks": [...], "index": ExactIndex or None, "stamp": file sizes}
+        self._cases = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(self.root, exist_ok=True)
+
+    def _case_dir(self, case_id):
+        return os.path.join(self.root, f"case_{int(case_id)}")
+
+    def chunk_text(self, text: str) -> List[str]:
+        """Split text into overlapping chunks, preferring paragraph boundaries"""
+        text = (text or "").strip()
+        if not text:
+            return []
+
+        paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
+
+        chunks = []
+        current = ""
+        for paragraph in paragraphs:
+            if current and len(current) + len(paragraph) + 2 > self.chunk_size:
+                chunks.append(current)
+                # Carry the tail of the previous chunk over for context
+                current = current[-self.chunk_overlap:] if self.chunk_overlap else ""
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+
+            # Hard-split paragraphs that are longer than a chunk on their own
+            while len(current) > self.chunk_size:
+                chunks.append(current[:self.chunk_size])
+                current = current[self.chunk_size - self.chunk_overlap:]
+
+        if current.strip():
+            chunks.append(current)
+
+        return chunks
+
+    def _stamp(self, case_dir):
+        """Sizes of a case's files, which change whenever any process appends to them"""
+        try:
+            return (os.path.getsize(os.path.join(case_dir, "chunks.jsonl")),
+                    os.path.getsize(os.path.join(case_dir, "vectors.f32")))
+        except OSError:
+            return None
+
+    @staticmethod
+    def _align_files(case_dir, dim):
+        """Cut back whichever file an interrupted append left longer (call under the file lock)
+
+        A crash between the two appends leaves vectors without chunk lines
+        (or a partial line). Reads clamp to the shorter file, but the next
+        append would land after the leftovers and pair every later chunk
+        with another chunk's vector, so both files are trimmed to the rows
+        they have in common first.
+        """
+        chunks_path = os.path.join(case_dir, "chunks.jsonl")
+        vectors_path = os.path.join(case_dir, "vectors.f32")
+        if not os.path.exists(chunks_path) and not os.path.exists(vectors_path):
+            return
+        rows = os.path.getsize(vectors_path) // (4 * dim) if os.path.exists(vectors_path) else 0
+
+        # Byte length of the first `rows` complete chunk lines
+        kept = 0
+        end = 0
+        if os.path.exists(chunks_path):
+            with open(chunks_path, "rb") as f:
+                for line in f:
+                    if kept == rows or not line.endswith(b"\n"):
+                        break
+                    kept += 1
+                    end += len(line)
+
+        for path, size in ((chunks_path, end), (vectors_path, kept * 4 * dim)):
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    def _load_case(self, case_id) -> Dict:
+        """Load a case's chunks and embeddings from disk (cached until the files change)"""
+        case_dir = self._case_dir(case_id)
+        cached = self._cases.get(case_id)
+        if cached is not None and cached["stamp"] == self._stamp(case_dir):
+            return cached
+
+        chunks = []
+        index = None
+        stamp = None
+
+        if os.path.isdir(case_dir):
+            # Waits out an append in progress, so both files are read whole
+            with file_lock(os.path.join(case_dir, ".lock")):
+                stamp = self._stamp(case_dir)
+                if stamp:
+                    with open(os.path.join(case_dir, "chunks.jsonl"), "r", encoding="utf-8") as f:
+                        chunks = [json.loads(line) for line in f if line.strip()]
+
+            if chunks:
+                dim = chunks[0]["dim"]
+                rows = min(len(chunks), stamp[1] // (4 * dim))
+                # An interrupted append can leave one side longer than the other
+                chunks = chunks[:rows]
+                if rows:
+                    vectors = np.memmap(os.path.join(case_dir, "vectors.f32"), dtype=np.float32,
+                                        mode="c", shape=(rows, dim))
+                    # Vector ids are chunk positions in chunks.jsonl; rows were stored normalized
+                    index = ExactIndex.wrap(np.arange(rows), vectors)
+
+        case = {"chunks": chunks, "index": index, "stamp": stamp}
+        self._cases[case_id] = case
+        return case
+
+    def add_email(self, case_id, email_id, sender, subject, body, attachments=None) -> int:
+        """Chunk, embed and append an email (and its PDF attachment text) to a case index
+
+        Args:
+            case_id: The case the email was assigned to
+            email_id: The database ID of the stored email
+            attachments: List of {'filename', 'text'} dicts, e.g. from
+                GmailReader.get_pdf_attachments_text
+
+        Returns:
+            The number of chunks added
+        """
+        header = f"Email from {sender}: {subject}"
+
+        pending = []
+        for i, chunk in enumerate(self.chunk_text(body)):
+            pending.append({
+                "email_id": email_id,
+                "source": "email",
+                "sender": sender,
+                "subject": subject,
+                "chunk": i,
+                "text": chunk,
+                "embed_text": f"{header}\n{chunk}"
+            })
+
+        for attachment in attachments or []:
+            filename = attachment.get("filename", "attachment")
+            for i, chunk in enumerate(self.chunk_text(attachment.get("text", ""))):
+                pending.append({
+                    "email_id": email_id,
+                    "source": "attachment",
+                    "filename": filename,
+                    "sender": sender,
+                    "subject": subject,
+                    "chunk": i,
+                    "text": chunk,
+                    "embed_text": f"{header}\nAttachment {filename}\n{chunk}"
+                })
+
+        if not pending:
+            return 0
+
+        embeddings = np.asarray(
+            self.embedding_model.encode([c.pop("embed_text") for c in pending]),
+            dtype=np.float32
+        )
+        # Store unit vectors so search is a single dot product
+        embeddings = normalize(embeddings)
+
+        dim = embeddings.shape[1]
+        for c in pending:
+            c["dim"] = dim
+
+        with self._lock:
+            case_dir = self._case_dir(case_id)
+            os.makedirs(case_dir, exist_ok=True)
+
+            with file_lock(os.path.join(case_dir, ".lock")):
+                self._align_files(case_dir, dim)
+                # Vectors first: on a crash, _load_case trims to the shorter file
+                with open(os.path.join(case_dir, "vectors.f32"), "ab") as f:
+                    f.write(embeddings.tobytes())
+                with open(os.path.join(case_dir, "chunks.jsonl"), "a", encoding="utf-8") as f:
+                    for c in pending:
+                        f.write(json.dumps(c) + "\n")
+
+            # Remapped with the new rows on the next search
+            self._cases.pop(case_id, None)
+
+        return len(pending)
+
+    def email_ids(self, case_id) -> set:
+        """IDs of the emails with chunks in a case's index"""
+        with self._lock:
+            return {c["email_id"] for c in self._load_case(case_id)["chunks"]}
+
+    def search(self, case_id, query: str, n_results: int = 6) -> List[Dict]:
+        """Return the chunks of a case most similar to the query"""
+        with self._lock:
+            if not self._load_case(case_id)["chunks"]:
+                return []
+
+        query_embedding = self.query_encoder.encode(query)
+        with self._lock:
+            case = self._load_case(case_id)
+            chunks = case["chunks"]
+            ids, scores = case["index"].search(query_embedding, n_results)
+
+        results = []
+        for i, score in zip(ids, scores):
+            chunk = dict(chunks[i])
+            chunk["similarity"] = float(score)
+            results.append(chunk)
+        return results
+
+    def build_context(self, case_id, query: str, max_chars: int = 6000, n_results: int = 8) -> str:
+        """Format the most relevant case excerpts for a prompt, bounded by max_chars"""
+        parts = []
+        used = 0
+        for chunk in self.search(case_id, query, n_results=n_results):
+            if chunk["source"] == "attachment":
+                label = f"[{chunk['filename']} (attached to \"{chunk['subject']}\")]"
+            else:
+                label = f"[Email from {chunk['sender']}: {chunk['subject']}]"
+
+            part = f"{label}\n{chunk['text']}"
+            if used + len(part) > max_chars:
+                break
+            parts.append(part)
+            used += len(part)
+
+        return "\n\n".join(parts)
@@ -1,27 +1,151 @@
 import re
+from collections import namedtuple
+
+# One reference format; pattern may capture the reference value in group 1,
+# key formats the canonical key from it ({0}), weak marks formats that are
+# too easily coincidental to route on alone. Matches must start a word,
+# contain a digit and fit on one line (see ReferenceExtractor). Patterns are
+# case-sensitive; scope (?i:...) to the parts people write in any case
+ReferencePattern = namedtuple('ReferencePattern', 'kind pattern key weak', defaults=(None, False))
+
+# A reference found in an email; start/end index into the named field
+CaseReference = namedtuple('CaseReference', 'kind text key start end field weak')
+
+DASH = "[-‐‑‒–—−]"
+
+# Order matters where formats overlap: the first alternative that matches wins
+DEFAULT_PATTERNS = [
+    # This system's own references: SCC-2025-001
+    ReferencePattern('scc', rf'\b(?i:SCC){DASH}\d{{4}}{DASH}\d{{3,4}}\b'),
+    # Other institutions using prefix-year-number
+    ReferencePattern('institution_year', rf'\b[A-Z]{{2,4}}{DASH}\d{{4}}{DASH}\d{{3,4}}\b'),
+    # ICC/2024/001 style
+    ReferencePattern('institution_slash', r'\b[A-Z]{2,4}/\d{4}/\d{3,4}\b'),
+    # Our internal format XX-###/YY
+    ReferencePattern('internal', rf'\b[A-Z]{{1,3}}{DASH}\d{{1,4}}/\d{{2}}\b'),
+    # Case 12345, Matter: 12345, File #12345
+    ReferencePattern('case_number', r'\b(?i:Case|Matter|File)[ \t]*[:#]?[ \t]*(\d{3,6})\b', key='#{0}', weak=True),
+    # #12345
+    ReferencePattern('hash', r'#\d{3,6}\b', weak=True),
+]
+
+# Where the quoted part of a reply starts
+QUOTE_MARKER = re.compile(
+    r'^(?:On\s.{1,200}?\swrote:\s*$'
+    r'|-{2,}\s*Original Message\s*-{2,}'
+    r'|_{10,}\s*$'
+    r'|From:\s.*\n(?:Sent|Date):\s)',
+    re.MULTILINE | re.IGNORECASE
+)
+QUOTED_LINE = re.compile(r'^[ \t]*>.*\n?', re.MULTILINE)
+
+# Every reference contains a digit, so only lines with one need the full pattern
+DIGIT = re.compile(r'\d')
+
+
+def strip_quoted_reply(text):
+    """Drop the quoted history from a reply: '>' lines and everything after an attribution line"""
+    marker = QUOTE_MARKER.search(text)
+    if marker:
+        text = text[:marker.start()]
+    if '>' in text:
+        text = QUOTED_LINE.sub('', text)
+    return text
+
+
+def normalize_reference(reference):
+    """Canonical key for a case reference: upper case, no spaces, plain hyphens
+
+    'ab-001/26', 'AB‑001/26' and ' AB-001/26 ' all map to 'AB-001/26'; a bare
+    number maps to the '#12345' form used for case numbers.
+    """
+    key = "".join(reference.split()).upper()
+    for dash in "‐‑‒–—−":
+        key = key.replace(dash, "-")
+    key = key.strip(".,;:()[]")
+    if key.isdigit():
+        key = f"#{key}"
+    return key
+
+
+class ReferenceExtractor:
+    """Finds case references of several formats in one regex pass
+
+    All patterns are compiled once into a single alternation, run only over lines that contain a digit (a cheap scan
+    that skips most prose), so a body is read once however many formats are
+    configured. Results are typed (which pattern matched), carry spans and
+    come back in reading order, subject first.
+    """
+
+    def __init__(self, patterns=None, strip_quotes=True):
+        self.patterns = list(patterns or DEFAULT_PATTERNS)
+        self.strip_quotes = strip_quotes
+
+        parts = []
+        # (pattern, group holding the value or None) per alternative, by outer group index
+        self._groups = {}
+        next_group = 1
+        for spec in self.patterns:
+            inner_groups = re.compile(spec.pattern).groups
+            self._groups[next_group] = (spec, next_group + 1 if inner_groups else None)
+            parts.append(f"({spec.pattern})")
+            next_group += 1 + inner_groups
+        # The lookbehind rejects mid-word positions before trying any alternative
+        # Case-sensitive: institution prefixes are capitals, and ignoring case
+        # would let them match ordinary prose ("pre-2020/21"); labels that may
+        # be written in any case scope (?i:...) themselves
+        self._regex = re.compile(r"(?<!\w)(?:" + "|".join(parts) + ")")
+
+    def finditer(self, text, field='text'):
+        """Yield a CaseReference for each match in text"""
+        groups = self._groups
+        pos = 0
+        while True:
+            digit = DIGIT.search(text, pos)
+            if not digit:
+                return
+            start = text.rfind('\n', 0, digit.start()) + 1
+            end = text.find('\n', digit.end())
+            if end == -1:
+                end = len(text)
+            pos = end + 1
+
+            # pos/endpos rather than slicing: no copy, and spans stay absolute
+            for match in self._regex.finditer(text, start, end):
+                spec, value_group = groups[match.lastindex]
+                matched = match.group(match.lastindex)
+                value = match.group(value_group) if value_group else matched
+                key = spec.key.format(value) if spec.key else value
+                yield CaseReference(
+                    spec.kind, matched, normalize_reference(key),
+                    match.start(), match.end(), field, spec.weak
+                )
+
+    def extract(self, text, field='text'):
+        return list(self.finditer(text, field))
+
+    def extract_email(self, subject, body):
+        """References in the subject, then in the body without its quoted history
+
+        Body spans index into the stripped body.
+        """
+        references = self.extract(subject or '', 'subject')
+        if body:
+            if self.strip_quotes:
+                body = strip_quoted_reply(body)
+            references.extend(self.finditer(body, 'body'))
+        return references
+
+
+_default_extractor = ReferenceExtractor()
+
 
 def extract_case_references(text):
-    """Extract potential case references from email subject/body"""
-    references = []
-    
-    # Pattern 1: Our format XX-###/YY
-    pattern1 = r'[A-Z]{1,3}-\d{1,4}/\d{2}'
-    references.extend(re.findall(pattern1, text))
-    
-    # Pattern 2: #12345
-    pattern2 = r'#\d{3,6}'
-    references.extend(re.findall(pattern2, text))
-    
-    # Pattern 3: Case 12345 or Matter 12345
-    pattern3 = r'(?:Case|Matter|File)\s*[:#]?\s*(\d{3,6})'
-    matches = re.findall(pattern3, text, re.IGNORECASE)
-    references.extend([f"#{m}" for m in matches])
-    
-    # Pattern 4: ICC/2024/001 style
-    pattern4 = r'[A-Z]{2,4}/\d{4}/\d{3,4}'
-    references.extend(re.findall(pattern4, text))
-    
-    return list(set(references))  # Remove duplicates
+    """Extract potential case references from email subject/body
+
+    Returns canonical keys (see normalize_reference) in order of first appearance.
+    """
+    return list(dict.fromkeys(r.key for r in _default_extractor.finditer(text)))
 
 def test_patterns():
     """Test the pattern matching"""
@@ -30,13 +154,14 @@ def test_patterns():
         "Urgent: Case #12345 needs review",
         "Matter: 54321 - Response due",
         "ICC/2024/001 - Hearing scheduled",
-        "AB-002/26 and CD-003/25 combined"
+        "AB-002/26 and CD-003/25 combined",
+        "SCC-2025-001: Request for Arbitration"
     ]
-    
+
     for text in test_texts:
-        refs = extract_case_references(text)
+        refs = _default_extractor.extract(text)
         print(f"Text: {text}")
-        print(f"Found: {refs}\n")
+        print(f"Found: {[(r.kind, r.key, r.start, r.end) for r in refs]}\n")
 
 if __name__ == "__main__":
-    test_patterns()
\ No newline at end of file
+    test_patterns()
@@ -0,0 +1,159 @@
+import threading
+from case_matcher import ReferenceExtractor, normalize_reference
+
+
+class CaseReferenceIndex:
+    """In-memory canonical reference -> case ID map over the cases table
+
+    refresh() rebuilds it when the table's signature (row count, highest id)
+    has changed, so routing a batch costs one cheap query and the lookups
+    themselves never touch SQLite.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._keys = {}
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def refresh(self, force=False):
+        with self._lock:
+            signature = self.db.get_cases_signature()
+            if force or signature != self._signature:
+                self._keys = {
+                    normalize_reference(reference): case_id
+                    for case_id, reference in self.db.get_case_references()
+                }
+                self._signature = signature
+
+    def resolve(self, key):
+        """Case ID for a canonical reference key, or None"""
+        return self._keys.get(key)
+
+
+class CaseRouter:
+    """Assigns inbox messages to cases by the references they quote
+
+    A message is assigned automatically when its references resolve to
+    exactly one case and at least one of them is a structured reference
+    (weak formats such as bare '#12345' numbers are too easily coincidental
+    on their own). References in quoted reply history are ignored.
+    Everything else goes to the review queue with the reason it was held.
+
+    Stored inbox messages carry only Gmail's snippet (the first ~200
+    characters), so messages are routed on their full body when the reader
+    has it cached and on the snippet otherwise. A snippet can miss a
+    reference further down, which would make the message ambiguous, so a
+    match is checked again against the full body before it is assigned.
+    """
+
+    def __init__(self, db, reader, index=None, extractor=None, label_updater=None):
+        self.db = db
+        self.reader = reader
+        self.label_updater = label_updater
+        self.index = index or CaseReferenceIndex(db)
+        self.extractor = extractor or ReferenceExtractor()
+
+    def match(self, email):
+        """Routing decision for one email dict (subject plus body: its own, cached or the snippet)"""
+        body = email.get('body') or (self.reader and self.reader.cached_body(email['id'])) or email.get('snippet')
+        references = self.extractor.extract_email(email.get('subject'), body)
+        keys = sorted({r.key for r in references})
+
+        resolved = {r.key: self.index.resolve(r.key) for r in references}
+        candidates = sorted({case_id for case_id in resolved.values() if case_id is not None})
+        strong = any(not r.weak and resolved[r.key] is not None for r in references)
+
+        if not keys:
+            reason = 'no_reference'
+        elif not candidates:
+            reason = 'unknown_reference'
+        elif len(candidates) > 1:
+            reason = 'ambiguous'
+        elif not strong:
+            reason = 'weak_reference'
+        else:
+            reason = 'matched'
+
+        return {
+            'gmail_id': email['id'],
+            'case_id': candidates[0] if reason == 'matched' else None,
+            'references': keys,
+            'candidates': candidates,
+            'reason': reason
+        }
+
+    def route(self, emails):
+        """Decisions for many emails against a freshly checked index"""
+        self.index.refresh()
+        return [self.match(email) for email in emails]
+
+    def route_inbox(self, emails=None):
+        """Route the stored unread inbox: bulk-assign matches, queue the rest
+
+        Returns:
+            Dict with the assigned emails (case_id, email_id, gmail_id, email)
+            and the number queued for review
+        """
+        if emails is None:
+            emails = self.db.get_gmail_messages()
+        decisions = self.route(emails)
+
+        assigned = self.assign([d for d in decisions if d['case_id']])
+        assigned_ids = {a['gmail_id'] for a in assigned}
+        review = [d for d in decisions if d['gmail_id'] not in assigned_ids]
+        if review:
+            self.db.queue_for_review(review)
+
+        return {'assigned': assigned, 'queued': len(review)}
+
+    def assign(self, decisions):
+        """Fetch bodies for matched messages and store them in one transaction
+
+        Each decision is made again on the full body; one that no longer
+        matches its case is updated in place (with the new reason) and left
+        out.
+        """
+        if not decisions:
+            return []
+
+        # The inbox store holds metadata only; bodies come in one batch (or the message cache)
+        messages = self.reader.get_messages_batch([d['gmail_id'] for d in decisions], format='full')
+
+        rows = []
+        assigned = []
+        for decision in decisions:
+            message = messages.get(decision['gmail_id'])
+            if not message:
+                continue
+            email = self.reader.parse_message(message, include_pdf_text=False)
+            recheck = self.match(email)
+            if recheck['case_id'] != decision['case_id']:
+                decision.update(recheck)
+                continue
+            extracted_info = {
+                "summary": "Assigned automatically by case reference",
+                "matched_references": decision['references']
+            }
+            rows.append((decision['case_id'], email['sender'], email['subject'], email['body'], extracted_info))
+            assigned.append({'case_id': decision['case_id'], 'gmail_id': decision['gmail_id'], 'email': email})
+
+        email_ids = self.db.add_emails_bulk(rows)
+        for entry, email_id in zip(assigned, email_ids):
+            entry['email_id'] = email_id
+
+        gmail_ids = [a['gmail_id'] for a in assigned]
+        if self.label_updater:
+            # One batchModify for the whole batch instead of a modify per message
+            self.label_updater.mark_read(gmail_ids)
+            self.label_updater.flush_soon()
+        else:
+            for gmail_id in gmail_ids:
+                self.reader.mark_as_read(gmail_id)
+        self.db.delete_gmail_messages(gmail_ids)
+        self.db.remove_from_review_queue(gmail_ids)
+
+        return assigned
@@ -2,15 +2,26 @@ import sqlite3
 import json
 from datetime import datetime
 
+class CaseReferenceExists(ValueError):
+    """An imported case's reference is taken and the import was asked to fail on conflicts"""
+
 class ArbitrationDB:
-    def __init__(self, db_path="data/arbitration.db"):
+    def __init__(self, db_path="data/arbitration.db", busy_timeout=30):
         self.db_path = db_path
+        # Seconds a write waits for another process's transaction (several server workers)
+        self.busy_timeout = busy_timeout
         self.init_db()
     
+    def _connect(self, check_same_thread=True):
+        return sqlite3.connect(self.db_path, timeout=self.busy_timeout, check_same_thread=check_same_thread)
+    
     def init_db(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
+        # Readers don't block the writer (or each other) across processes; persists in the file
+        cursor.execute("PRAGMA journal_mode=WAL")
+        
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS cases (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -44,30 +55,114 @@ class ArbitrationDB:
             )
         ''')
         
+        # Local copy of the unread Gmail inbox, kept current by email_reader.InboxSync
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS gmail_messages (
+                id TEXT PRIMARY KEY,
+                thread_id TEXT,
+                sender TEXT,
+                subject TEXT,
+                body TEXT,
+                snippet TEXT,
+                date TEXT,
+                internal_date INTEGER,
+                label_ids TEXT,
+                attachments TEXT,
+                synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_gmail_messages_internal_date
+            ON gmail_messages (internal_date DESC)
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sync_state (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+        
+        # Gmail label changes not yet sent, flushed by label_updater.LabelUpdater
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS pending_label_ops (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                msg_id TEXT NOT NULL,
+                add_labels TEXT,
+                remove_labels TEXT,
+                attempts INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Inbox messages the case router could not assign with confidence
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS review_queue (
+                gmail_id TEXT PRIMARY KEY,
+                reason TEXT,
+                references_found TEXT,
+                candidate_case_ids TEXT,
+                queued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Change counter per case (case_id 0 counts every change), bumped by the
+        # triggers below on any write to cases or emails; used as HTTP validators
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS case_revisions (
+                case_id INTEGER PRIMARY KEY,
+                revision INTEGER NOT NULL,
+                updated_at TIMESTAMP
+            )
+        ''')
+        for table, key in (('cases', 'id'), ('emails', 'case_id')):
+            for event, rows in (('INSERT', ['NEW']), ('UPDATE', ['OLD', 'NEW']), ('DELETE', ['OLD'])):
+                bumps = "".join(self._revision_bump(f"{row}.{key}") for row in rows)
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {table}_revision_{event.lower()}
+                    AFTER {event} ON {table} BEGIN
+                        {bumps}{self._revision_bump("0")}
+                    END
+                ''')
+        
         conn.commit()
         conn.close()
     
-    def create_case(self, case_name, case_reference=None):
-        import datetime
+    @staticmethod
+    def _revision_bump(case_id_expr):
+        return f'''
+            INSERT INTO case_revisions (case_id, revision, updated_at)
+            SELECT {case_id_expr}, 1, CURRENT_TIMESTAMP WHERE {case_id_expr} IS NOT NULL
+            ON CONFLICT(case_id) DO UPDATE SET revision = revision + 1, updated_at = CURRENT_TIMESTAMP;'''
+    
+    @staticmethod
+    def _next_case_reference(cursor):
+        """Next free SCC-<year>-<number> reference: SCC-2025-001, SCC-2025-002, etc."""
+        # Get current year (full 4 digits)
+        year = datetime.now().year
+        prefix = f"SCC-{year}-"
         
-        conn = sqlite3.connect(self.db_path)
+        # One past the highest number used this year. Counting cases would
+        # reuse a number once cases are deleted, or imported with references
+        # of their own; CAST takes the leading digits, so SCC-2025-003-2 (a
+        # renamed import) counts as 3. The range ('.' sorts right after '-')
+        # lets the lookup use the case_reference index
+        cursor.execute(
+            """SELECT MAX(CAST(substr(case_reference, ?) AS INTEGER)) FROM cases
+               WHERE case_reference >= ? AND case_reference < ?""",
+            (len(prefix) + 1, prefix, f"SCC-{year}.")
+        )
+        highest = cursor.fetchone()[0] or 0
+        return f"{prefix}{highest + 1:03d}"
+    
+    def create_case(self, case_name, case_reference=None):
+        conn = self._connect()
         cursor = conn.cursor()
         
         # Auto-generate reference if not provided
         if not case_reference:
-            # Get current year (full 4 digits)
-            year = datetime.datetime.now().year
-            
-            # Get next case number for this year
-            cursor.execute(
-                "SELECT COUNT(*) FROM cases WHERE case_reference LIKE ?", 
-                (f"SCC-{year}-%",)
-            )
-            count = cursor.fetchone()[0]
-            next_num = count + 1
-            
-            # Generate reference: SCC-2025-001, SCC-2025-002, etc.
-            case_reference = f"SCC-{year}-{next_num:03d}"
+            case_reference = self._next_case_reference(cursor)
         
         cursor.execute(
             "INSERT INTO cases (case_name, case_reference) VALUES (?, ?)", 
@@ -80,7 +175,7 @@ class ArbitrationDB:
     
     def find_case_by_reference(self, reference_pattern):
         """Find case by reference pattern (flexible matching)"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -97,7 +192,7 @@ class ArbitrationDB:
         return dict(case) if case else None
 
     def add_email(self, case_id, sender, subject, body, extracted_info=None):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute(
             "INSERT INTO emails (case_id, sender, subject, body, extracted_info) VALUES (?, ?, ?, ?, ?)",
@@ -108,8 +203,299 @@ class ArbitrationDB:
         conn.close()
         return email_id
     
+    def add_emails_bulk(self, emails):
+        """Insert many emails in one transaction
+
+        Args:
+            emails: Iterable of (case_id, sender, subject, body, extracted_info)
+
+        Returns:
+            List of new email IDs in input order
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        email_ids = []
+        try:
+            for case_id, sender, subject, body, extracted_info in emails:
+                cursor.execute(
+                    "INSERT INTO emails (case_id, sender, subject, body, extracted_info) VALUES (?, ?, ?, ?, ?)",
+                    (case_id, sender, subject, body, json.dumps(extracted_info) if extracted_info else None)
+                )
+                email_ids.append(cursor.lastrowid)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        return email_ids
+    
+    def add_cases_with_emails(self, cases):
+        """Create cases together with their emails in one transaction
+
+        Args:
+            cases: Iterable of (case_name, case_reference or None, emails), where
+                emails is a list of (sender, subject, body, received_at, extracted_info)
+                and received_at is a 'YYYY-MM-DD HH:MM:SS' UTC string or None for now
+
+        Returns:
+            List of (case_id, case_reference) in input order
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        created = []
+        try:
+            for case_name, case_reference, emails in cases:
+                case_reference = case_reference or self._next_case_reference(cursor)
+                cursor.execute(
+                    "INSERT INTO cases (case_name, case_reference) VALUES (?, ?)",
+                    (case_name, case_reference)
+                )
+                case_id = cursor.lastrowid
+                cursor.executemany(
+                    """INSERT INTO emails (case_id, sender, subject, body, received_at, extracted_info)
+                       VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?)""",
+                    [
+                        (case_id, sender, subject, body, received_at,
+                         json.dumps(extracted_info) if extracted_info else None)
+                        for sender, subject, body, received_at, extracted_info in emails
+                    ]
+                )
+                created.append((case_id, case_reference))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        return created
+    
+    def iter_case_records(self, case_ids=None):
+        """Stream cases with their emails and documents, e.g. for case_archive
+
+        Yields ('case', row), then ('email', row) for each of its emails, each
+        followed by ('document', row) for that email's documents, case by case
+        in ID order. Rows come off the cursors as they are consumed, inside
+        one read transaction, so memory stays flat however large the cases
+        are and the snapshot is consistent. The consumer may advance the
+        generator from different threads (a StreamingResponse does, from the
+        threadpool), one at a time.
+
+        Args:
+            case_ids: Cases to include, or None for all
+        """
+        conn = self._connect(check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("BEGIN")
+            if case_ids is None:
+                cases = conn.execute("SELECT * FROM cases ORDER BY id")
+            else:
+                case_ids = list(case_ids)
+                cases = conn.execute(
+                    f"SELECT * FROM cases WHERE id IN ({','.join('?' * len(case_ids))}) ORDER BY id",
+                    case_ids
+                )
+            for case in cases:
+                yield "case", dict(case)
+                emails = conn.execute("SELECT * FROM emails WHERE case_id = ? ORDER BY id", (case["id"],))
+                documents = conn.execute(
+                    """SELECT d.* FROM documents d JOIN emails e ON d.email_id = e.id
+                       WHERE e.case_id = ? ORDER BY d.email_id, d.id""",
+                    (case["id"],)
+                )
+                # Both cursors are in email order: walk them in step
+                document = documents.fetchone()
+                for email in emails:
+                    yield "email", dict(email)
+                    while document is not None and document["email_id"] == email["id"]:
+                        yield "document", dict(document)
+                        document = documents.fetchone()
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def _free_reference(cursor, reference):
+        """reference-2, reference-3, ... whichever is first unused"""
+        n = 2
+        while cursor.execute("SELECT 1 FROM cases WHERE case_reference = ?", (f"{reference}-{n}",)).fetchone():
+            n += 1
+        return f"{reference}-{n}"
+    
+    def import_case_records(self, records, on_conflict="rename", chunk_size=1000, summary=None):
+        """Bulk-load streamed case records (as from iter_case_records) in chunked transactions
+
+        Emails and documents are inserted with executemany and committed
+        every chunk_size records, so an import of any size needs little
+        memory and other writers only ever wait for one chunk. An error (a
+        truncated archive, a reference conflict) is rolled back by case:
+        cases finished before the last commit stay, and whatever was already
+        committed of the case in progress is deleted, so no case is left half
+        imported. Importing the same archive again with on_conflict='skip'
+        picks up where it stopped. Archive IDs are not kept: cases, emails
+        and documents get new IDs, and documents are linked to the email
+        they follow.
+
+        Args:
+            records: Iterable of (kind, row) with kind 'case', 'email' or 'document'
+            on_conflict: What to do with a case whose reference already exists:
+                'rename' imports it as <reference>-2 (or -3, ...), 'skip' leaves it
+                out with its emails, 'merge' adds its emails to the existing case
+                and 'fail' raises CaseReferenceExists
+            summary: Dict to fill in instead of a new one; after an error it
+                describes the cases that stayed imported
+
+        Returns:
+            Dict with the numbers of cases created, merged and skipped, emails and
+            documents imported, renamed references (old -> new) and the created
+            or merged case IDs
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        summary = {} if summary is None else summary
+        summary.update({"cases": 0, "merged": 0, "skipped": 0, "emails": 0, "documents": 0,
+                        "renamed": {}, "case_ids": []})
+        emails = []
+        documents = []
+        pending = 0
+        case_id = None  # None while skipping a case
+        last_email = None  # (archive ID, new ID or None until inserted)
+        # The case in progress: whether this import created it, the summary
+        # before it started and the (first, last) ID ranges of its rows
+        current = None
+        # The case in progress at the last commit (the only one that can be
+        # partly committed) and the summary of the cases finished before it
+        committed = None
+
+        def snapshot():
+            return {**summary, "renamed": dict(summary["renamed"]), "case_ids": list(summary["case_ids"])}
+
+        committed_summary = snapshot()
+
+        def inserted(table, n):
+            last = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+            if current:
+                current[table].append((last - n + 1, last))
+            return last
+
+        def insert_emails():
+            nonlocal last_email
+            if not emails:
+                return
+            cursor.executemany(
+                """INSERT INTO emails (case_id, sender, subject, body, received_at, extracted_info)
+                   VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?)""",
+                emails
+            )
+            last_id = inserted("emails", len(emails))
+            summary["emails"] += len(emails)
+            emails.clear()
+            if last_email and last_email[1] is None:
+                last_email = (last_email[0], last_id)
+
+        def insert_documents():
+            if not documents:
+                return
+            cursor.executemany(
+                "INSERT INTO documents (email_id, filename, doc_type, summary) VALUES (?, ?, ?, ?)",
+                documents
+            )
+            inserted("documents", len(documents))
+            summary["documents"] += len(documents)
+            documents.clear()
+
+        def commit():
+            nonlocal committed, committed_summary
+            insert_emails()
+            insert_documents()
+            conn.commit()
+            committed = current and {**current, "emails": list(current["emails"]),
+                                     "documents": list(current["documents"])}
+            committed_summary = current["before"] if current else snapshot()
+
+        try:
+            # Taken up front so the reference checks hold until the commit
+            cursor.execute("BEGIN IMMEDIATE")
+            for kind, row in records:
+                if kind == "case":
+                    # Rows still buffered belong to the previous case
+                    insert_emails()
+                    insert_documents()
+                    current = None
+                    before = snapshot()
+                    reference = row.get("case_reference")
+                    existing = reference and cursor.execute(
+                        "SELECT id FROM cases WHERE case_reference = ?", (reference,)
+                    ).fetchone()
+                    if existing and on_conflict == "fail":
+                        raise CaseReferenceExists(f"Case reference {reference} already exists")
+                    if existing and on_conflict == "skip":
+                        case_id = None
+                        summary["skipped"] += 1
+                        continue
+                    created = not (existing and on_conflict == "merge")
+                    if not created:
+                        case_id = existing[0]
+                        summary["merged"] += 1
+                    else:
+                        if existing:
+                            summary["renamed"][reference] = reference = self._free_reference(cursor, reference)
+                        cursor.execute(
+                            "INSERT INTO cases (case_name, case_reference, created_at) VALUES (?, ?, COALESCE(?, CURRENT_TIMESTAMP))",
+                            (row.get("case_name") or "Imported case", reference, row.get("created_at"))
+                        )
+                        case_id = cursor.lastrowid
+                        summary["cases"] += 1
+                    summary["case_ids"].append(case_id)
+                    current = {"case_id": case_id, "created": created, "before": before,
+                               "emails": [], "documents": []}
+                elif case_id is None:
+                    continue
+                elif kind == "email":
+                    emails.append((case_id, row.get("sender") or "", row.get("subject"), row.get("body"),
+                                   row.get("received_at"), row.get("extracted_info")))
+                    last_email = (row.get("id"), None)
+                elif kind == "document":
+                    email_id = None
+                    if last_email and row.get("email_id") == last_email[0]:
+                        # Its email may still be buffered: insert it to learn its ID
+                        insert_emails()
+                        email_id = last_email[1]
+                    documents.append((email_id, row.get("filename"), row.get("doc_type"), row.get("summary")))
+                else:
+                    continue
+
+                pending += 1
+                if pending >= chunk_size:
+                    commit()
+                    cursor.execute("BEGIN IMMEDIATE")
+                    pending = 0
+
+            insert_emails()
+            insert_documents()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            if committed:
+                self._delete_imported_case(cursor, committed)
+                conn.commit()
+            summary.clear()
+            summary.update(committed_summary)
+            raise
+        finally:
+            conn.close()
+        return summary
+
+    @staticmethod
+    def _delete_imported_case(cursor, case):
+        """Remove the rows an import added to a case (and the case, if the import created it)"""
+        for table in ("documents", "emails"):
+            cursor.executemany(f"DELETE FROM {table} WHERE id BETWEEN ? AND ?", case[table])
+        if case["created"]:
+            cursor.execute("DELETE FROM cases WHERE id = ?", (case["case_id"],))
+    
     def get_case_emails(self, case_id):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM emails WHERE case_id = ? ORDER BY received_at DESC", (case_id,))
@@ -118,7 +504,7 @@ class ArbitrationDB:
         return emails
     
     def get_all_cases(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM cases ORDER BY created_at DESC")
@@ -126,9 +512,48 @@ class ArbitrationDB:
         conn.close()
         return cases
     
+    def get_case_references(self):
+        """(case_id, case_reference) for every case with a reference"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, case_reference FROM cases WHERE case_reference IS NOT NULL")
+        references = cursor.fetchall()
+        conn.close()
+        return references
+
+    def get_cases_signature(self):
+        """Cheap change marker for the cases table: (row count, highest id)"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM cases")
+        signature = tuple(cursor.fetchone())
+        conn.close()
+        return signature
+    
+    def get_email_counts(self):
+        """Number of emails per case ID, in one query"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT case_id, COUNT(*) FROM emails GROUP BY case_id")
+        counts = dict(cursor.fetchall())
+        conn.close()
+        return counts
+
+    def get_case_revision(self, case_id=0):
+        """(revision, updated_at) for one case, or for all cases with case_id 0
+
+        (0, None) if nothing has changed since the revision triggers were added.
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT revision, updated_at FROM case_revisions WHERE case_id = ?", (case_id,))
+        row = cursor.fetchone()
+        conn.close()
+        return tuple(row) if row else (0, None)
+    
     def get_case_by_id(self, case_id):
         """Get a single case by ID"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM cases WHERE id = ?", (case_id,))
@@ -138,7 +563,7 @@ class ArbitrationDB:
 
     def get_case_parties(self, case_id):
         """Get unique parties from all emails in a case"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute("""
             SELECT DISTINCT sender 
@@ -147,4 +572,232 @@ class ArbitrationDB:
         """, (case_id,))
         parties = [row[0] for row in cursor.fetchall()]
         conn.close()
-        return parties
\ No newline at end of file
+        return parties
+
+    # ========== GMAIL MESSAGE STORE ==========
+
+    def upsert_gmail_messages(self, messages):
+        """Insert or replace synced Gmail messages (dicts from GmailReader.parse_message)"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.executemany(
+            '''INSERT OR REPLACE INTO gmail_messages
+               (id, thread_id, sender, subject, body, snippet, date, internal_date, label_ids, attachments)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+            [(
+                m['id'],
+                m.get('thread_id'),
+                m.get('sender'),
+                m.get('subject'),
+                m.get('body'),
+                m.get('snippet'),
+                m.get('date'),
+                m.get('internal_date'),
+                json.dumps(m.get('label_ids', [])),
+                json.dumps(m.get('attachments', []))
+            ) for m in messages]
+        )
+        conn.commit()
+        conn.close()
+
+    def delete_gmail_messages(self, msg_ids):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.executemany("DELETE FROM gmail_messages WHERE id = ?", [(i,) for i in msg_ids])
+        conn.commit()
+        conn.close()
+
+    def clear_gmail_messages(self):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM gmail_messages")
+        conn.commit()
+        conn.close()
+
+    def get_gmail_message_ids(self):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM gmail_messages")
+        ids = {row[0] for row in cursor.fetchall()}
+        conn.close()
+        return ids
+
+    def get_gmail_messages(self, limit=None, before=None):
+        """Get synced messages, newest first
+
+        Args:
+            limit: Maximum number of messages
+            before: (internal_date, id) of the last message already seen;
+                only messages after it in this order are returned
+        """
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        query = "SELECT * FROM gmail_messages"
+        params = []
+        if before:
+            query += " WHERE internal_date < ? OR (internal_date = ? AND id < ?)"
+            params += [before[0], before[0], before[1]]
+        query += " ORDER BY internal_date DESC, id DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        cursor.execute(query, params)
+        messages = []
+        for row in cursor.fetchall():
+            message = dict(row)
+            message['label_ids'] = json.loads(message['label_ids'] or '[]')
+            message['attachments'] = json.loads(message['attachments'] or '[]')
+            messages.append(message)
+        conn.close()
+        return messages
+
+    def get_gmail_messages_by_ids(self, msg_ids):
+        """Synced messages with the given IDs, newest first"""
+        if not msg_ids:
+            return []
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        placeholders = ",".join("?" * len(msg_ids))
+        cursor.execute(
+            f"SELECT * FROM gmail_messages WHERE id IN ({placeholders}) ORDER BY internal_date DESC, id DESC",
+            list(msg_ids)
+        )
+        messages = []
+        for row in cursor.fetchall():
+            message = dict(row)
+            message['label_ids'] = json.loads(message['label_ids'] or '[]')
+            message['attachments'] = json.loads(message['attachments'] or '[]')
+            messages.append(message)
+        conn.close()
+        return messages
+
+    def get_gmail_message(self, msg_id):
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM gmail_messages WHERE id = ?", (msg_id,))
+        row = cursor.fetchone()
+        conn.close()
+        if not row:
+            return None
+        message = dict(row)
+        message['label_ids'] = json.loads(message['label_ids'] or '[]')
+        message['attachments'] = json.loads(message['attachments'] or '[]')
+        return message
+
+    def get_sync_state(self, key, default=None):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT value FROM sync_state WHERE key = ?", (key,))
+        row = cursor.fetchone()
+        conn.close()
+        return row[0] if row else default
+
+    def set_sync_state(self, key, value):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value))
+        conn.commit()
+        conn.close()
+
+    def queue_for_review(self, entries):
+        """Add or update review queue entries
+
+        Args:
+            entries: Iterable of dicts with gmail_id, reason, references, candidates
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.executemany(
+            '''INSERT OR REPLACE INTO review_queue (gmail_id, reason, references_found, candidate_case_ids)
+               VALUES (?, ?, ?, ?)''',
+            [(e['gmail_id'], e['reason'], json.dumps(e['references']), json.dumps(e['candidates'])) for e in entries]
+        )
+        conn.commit()
+        conn.close()
+
+    def remove_from_review_queue(self, gmail_ids):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.executemany("DELETE FROM review_queue WHERE gmail_id = ?", [(i,) for i in gmail_ids])
+        conn.commit()
+        conn.close()
+
+    def get_review_queue(self):
+        """Queued messages joined with their inbox copy, newest first"""
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT g.id, g.sender, g.subject, g.snippet, g.date, g.internal_date,
+                   q.reason, q.references_found, q.candidate_case_ids, q.queued_at
+            FROM review_queue q JOIN gmail_messages g ON g.id = q.gmail_id
+            ORDER BY g.internal_date DESC
+        ''')
+        queue = []
+        for row in cursor.fetchall():
+            entry = dict(row)
+            entry['references'] = json.loads(entry.pop('references_found') or '[]')
+            entry['candidates'] = json.loads(entry.pop('candidate_case_ids') or '[]')
+            queue.append(entry)
+        conn.close()
+        return queue
+
+    def add_label_ops(self, ops):
+        """Queue Gmail label changes
+
+        Args:
+            ops: Iterable of (msg_id, add_labels, remove_labels)
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT INTO pending_label_ops (msg_id, add_labels, remove_labels) VALUES (?, ?, ?)",
+            [(msg_id, json.dumps(list(add)), json.dumps(list(remove))) for msg_id, add, remove in ops]
+        )
+        conn.commit()
+        conn.close()
+
+    def get_label_ops(self, limit=None):
+        """Pending label changes, oldest first"""
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        query = "SELECT * FROM pending_label_ops ORDER BY id"
+        if limit:
+            query += " LIMIT ?"
+            cursor.execute(query, (limit,))
+        else:
+            cursor.execute(query)
+        ops = []
+        for row in cursor.fetchall():
+            op = dict(row)
+            op['add_labels'] = json.loads(op['add_labels'] or '[]')
+            op['remove_labels'] = json.loads(op['remove_labels'] or '[]')
+            ops.append(op)
+        conn.close()
+        return ops
+
+    def count_label_ops(self):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM pending_label_ops")
+        count = cursor.fetchone()[0]
+        conn.close()
+        return count
+
+    def delete_label_ops(self, op_ids):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.executemany("DELETE FROM pending_label_ops WHERE id = ?", [(i,) for i in op_ids])
+        conn.commit()
+        conn.close()
+
+    def increment_label_op_attempts(self, op_ids):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.executemany("UPDATE pending_label_ops SET attempts = attempts + 1 WHERE id = ?", [(i,) for i in op_ids])
+        conn.commit()
+        conn.close()
@@ -1,105 +1,410 @@
 import os
 import base64
+import html
+import itertools
 import json
-import io
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-import pypdf
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from googleapiclient.errors import HttpError
+from attachment_cache import AttachmentTextCache
+from pdf_extract import get_extractor
+from query_cache import LRUCache
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.modify']
 
+# Gmail recommends at most 50 requests per batch call
+BATCH_SIZE = 50
+
+# Headers the inbox list needs; format='metadata' skips bodies and attachments
+LIST_HEADERS = ['From', 'Subject', 'Date']
+
+# google-auth, oauthlib and googleapiclient.discovery are imported in
+# GmailReader.connect: together they take most of a second to import and
+# only the background connection needs them
+
+_discovery_document = None
+
+class GmailUnavailable(Exception):
+    """Gmail could not be connected (no usable token, refresh failed, or waiting to retry)"""
+
+def load_discovery_document():
+    """Gmail v1 discovery document bundled with google-api-python-client, parsed once
+
+    Building from it never touches the network or the discovery cache.
+    """
+    global _discovery_document
+    if _discovery_document is None:
+        from googleapiclient import discovery_cache
+        document = discovery_cache.get_static_doc('gmail', 'v1')
+        if document is None:
+            raise GmailUnavailable("google-api-python-client has no bundled Gmail discovery document")
+        _discovery_document = json.loads(document)
+    return _discovery_document
+
+def is_retryable_error(error):
+    """True for rate-limit and transient server errors from the Gmail API"""
+    if not isinstance(error, HttpError):
+        return False
+    status = error.resp.status
+    if status in (429, 500, 502, 503, 504):
+        return True
+    # Gmail reports per-user rate limits as 403 with a rateLimitExceeded reason
+    return status == 403 and 'ratelimitexceeded' in str(error).lower()
+
 class GmailReader:
-    def __init__(self):
-        self.service = None
-        self.authenticate()
-    
+    """Gmail API access for the inbox
+
+    The API client is built on first use (or by an explicit connect()) from
+    the bundled discovery document. A failed connection is retried on a later
+    use once reconnect_delay has passed. While connected, a background
+    thread refreshes the access token refresh_margin seconds before it
+    expires, so no request waits on a token refresh.
+    """
+
+    def __init__(self, text_cache=None, message_cache_size=256, message_cache_ttl=300,
+                 token_path='token.json', credentials_path='credentials.json', interactive=True,
+                 reconnect_delay=30, refresh_margin=300):
+        self._service = None
+        self._creds = None
+        self._connect_lock = threading.Lock()
+        self._retry_at = 0
+        self._refresh_stop = threading.Event()
+        self._refresh_thread = None
+
+        self.token_path = token_path
+        self.credentials_path = credentials_path
+        # Run the browser OAuth flow when there is no usable token; a server
+        # can't, so it reports that authorization is required instead
+        self.interactive = interactive
+        self.reconnect_delay = reconnect_delay
+        self.refresh_margin = refresh_margin
+        self.last_error = None
+        self.connect_seconds = None
+
+        # Extracted PDF text, keyed by attachment content hash
+        self.text_cache = text_cache or AttachmentTextCache()
+        # Recently fetched format='full' messages, so opening then assigning fetches once
+        self.message_cache = LRUCache(maxsize=message_cache_size, ttl=message_cache_ttl)
+
+    @property
+    def service(self):
+        """Gmail API client, connecting on first use (raises GmailUnavailable)"""
+        if self._service is None:
+            self.connect()
+        return self._service
+
+    @service.setter
+    def service(self, value):
+        self._service = value
+
+    @property
+    def connected(self):
+        return self._service is not None
+
+    @property
+    def retry_in(self):
+        """Seconds until a failed connection may be retried (0 if it may be now)"""
+        return max(0.0, self._retry_at - time.monotonic())
+
+    def connect(self, wait=10):
+        """Build the Gmail client unless already connected
+
+        Args:
+            wait: Seconds to wait for a connection attempt already in progress
+
+        Raises:
+            GmailUnavailable: if authentication fails (later calls retry after
+                reconnect_delay) or another attempt is still running
+        """
+        if not self._connect_lock.acquire(timeout=wait):
+            raise GmailUnavailable("Gmail connection in progress")
+        try:
+            if self._service is not None:
+                return self._service
+            if time.monotonic() < self._retry_at:
+                raise GmailUnavailable(f"Gmail connection failed, retrying later: {self.last_error}")
+
+            start = time.perf_counter()
+            try:
+                from googleapiclient.discovery import build_from_document
+                creds = self.authenticate()
+                service = build_from_document(load_discovery_document(), credentials=creds)
+            except GmailUnavailable as e:
+                self.last_error = str(e)
+                self._retry_at = time.monotonic() + self.reconnect_delay
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                self._retry_at = time.monotonic() + self.reconnect_delay
+                raise GmailUnavailable(f"Could not connect to Gmail: {e}") from e
+
+            self._creds = creds
+            self._service = service
+            self.connect_seconds = round(time.perf_counter() - start, 3)
+            self.last_error = None
+            self._start_token_refresh()
+            return service
+        finally:
+            self._connect_lock.release()
+
+    def disconnect(self):
+        """Drop the client so the next use reconnects"""
+        self._refresh_stop.set()
+        self._service = None
+        self._creds = None
+
     def authenticate(self):
-        """Authenticate with Gmail API"""
+        """Load saved credentials, refreshing them or running the OAuth flow as needed"""
+        from google.auth.exceptions import RefreshError
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+
         creds = None
         
         # Token file stores user's access and refresh tokens
-        if os.path.exists('token.json'):
-            creds = Credentials.from_authorized_user_file('token.json', SCOPES)
+        if os.path.exists(self.token_path):
+            creds = Credentials.from_authorized_user_file(self.token_path, SCOPES)
         
         # If no valid credentials, let user log in
         if not creds or not creds.valid:
             if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file('credentials.json', SCOPES)
+                try:
+                    creds.refresh(Request())
+                except RefreshError as e:
+                    if self.interactive:
+                        raise
+                    # Revoked or expired refresh token
+                    raise GmailUnavailable(f"Gmail authorization required: token refresh failed ({e}); "
+                                           f"run python -m email_reader to authorize") from e
+            elif self.interactive:
+                from google_auth_oauthlib.flow import InstalledAppFlow
+                flow = InstalledAppFlow.from_client_secrets_file(self.credentials_path, SCOPES)
                 creds = flow.run_local_server(port=0)
+            else:
+                raise GmailUnavailable(f"Gmail authorization required: no usable token in {self.token_path}; "
+                                       f"run python -m email_reader to authorize")
             
             # Save credentials for next run
-            with open('token.json', 'w') as token:
-                token.write(creds.to_json())
+            self._save_token(creds)
         
-        self.service = build('gmail', 'v1', credentials=creds)
+        return creds
+
+    def _save_token(self, creds):
+        tmp = f"{self.token_path}.tmp"
+        with open(tmp, 'w') as token:
+            token.write(creds.to_json())
+        os.replace(tmp, self.token_path)
+
+    def _start_token_refresh(self):
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        self._refresh_stop = threading.Event()
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_token_loop, args=(self._creds, self._refresh_stop),
+            name="gmail-token-refresh", daemon=True
+        )
+        self._refresh_thread.start()
+
+    def _refresh_token_loop(self, creds, stop):
+        """Refresh the access token shortly before it expires, until disconnected"""
+        from google.auth.exceptions import RefreshError
+        from google.auth.transport.requests import Request
+
+        while not stop.is_set():
+            if creds.expiry is None:
+                return
+            # google-auth keeps expiry as naive UTC
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            remaining = (creds.expiry - now).total_seconds() - self.refresh_margin
+            if remaining > 0:
+                stop.wait(min(remaining, 3600))
+                continue
+            try:
+                creds.refresh(Request())
+                self._save_token(creds)
+            except RefreshError as e:
+                # Revoked or expired refresh token: reconnect (and re-authorize) on next use
+                print(f"Gmail token refresh failed: {e}")
+                self.last_error = str(e)
+                self.disconnect()
+                return
+            except Exception as e:
+                print(f"Gmail token refresh failed, retrying in 60s: {e}")
+                stop.wait(60)
     
     def get_unread_emails(self, max_results=10):
-        """Get unread emails from inbox"""
+        """Get unread emails from inbox (headers and snippet only, no body)"""
         try:
-            results = self.service.users().messages().list(
-                userId='me',
-                labelIds=['INBOX', 'UNREAD'],
-                maxResults=max_results
-            ).execute()
-            
-            messages = results.get('messages', [])
-            
-            emails = []
-            for message in messages:
-                email_data = self.get_email_details(message['id'])
-                emails.append(email_data)
-            
-            return emails
+            return list(itertools.islice(self.iter_unread_emails(page_size=min(max_results, 500)), max_results))
         
         except Exception as e:
             print(f"Error fetching emails: {e}")
             return []
+
+    def list_unread_page(self, page_token=None, page_size=50):
+        """Fetch one page of the unread inbox: one list call plus one metadata batch
+
+        Returns:
+            (emails, next_page_token), next_page_token None on the last page
+        """
+        results = self.service.users().messages().list(
+            userId='me',
+            labelIds=['INBOX', 'UNREAD'],
+            maxResults=page_size,
+            pageToken=page_token
+        ).execute()
+
+        msg_ids = [m['id'] for m in results.get('messages', [])]
+
+        # One batch round trip per BATCH_SIZE messages instead of one per message
+        messages = self.get_messages_batch(msg_ids, format='metadata')
+        emails = [self.parse_message(messages[m], include_pdf_text=False) for m in msg_ids if m in messages]
+
+        return emails, results.get('nextPageToken')
+
+    def iter_unread_emails(self, page_size=50, page_token=None):
+        """Yield unread emails across all pages; each page is fetched when reached"""
+        while True:
+            emails, page_token = self.list_unread_page(page_token, page_size)
+            yield from emails
+            if not page_token:
+                return
     
-    def get_email_details(self, msg_id, include_pdf_text=True):
-        """Get details of a specific email including attachments
+    def get_messages_batch(self, msg_ids, format='full', max_retries=5, base_delay=0.5):
+        """Fetch many messages through the Gmail batch HTTP endpoint
 
-        Args:
-            msg_id: The Gmail message ID
-            include_pdf_text: If True, extract and include text from PDF attachments
+        Rate-limited and transient failures are retried (whole batch or single
+        requests) with jittered exponential backoff; other failures are logged
+        and the message is left out. Full messages are served from and added
+        to the message cache; format='metadata' requests only LIST_HEADERS.
+
+        Returns:
+            Dict of message ID -> Gmail message resource
         """
-        try:
+        results = {}
+        pending = list(dict.fromkeys(msg_ids))
+        if format == 'full':
+            for msg_id in pending:
+                message = self.message_cache.get(msg_id)
+                if message is not None:
+                    results[msg_id] = message
+            pending = [m for m in pending if m not in results]
+        params = {'metadataHeaders': LIST_HEADERS} if format == 'metadata' else {}
+
+        for attempt in range(max_retries + 1):
+            retry = []
+
+            def callback(request_id, response, exception):
+                if exception is None:
+                    results[request_id] = response
+                    if format == 'full':
+                        self.message_cache.put(request_id, response)
+                elif is_retryable_error(exception):
+                    retry.append(request_id)
+                else:
+                    print(f"Error getting email {request_id}: {exception}")
+
+            for start in range(0, len(pending), BATCH_SIZE):
+                chunk = pending[start:start + BATCH_SIZE]
+                batch = self.service.new_batch_http_request(callback=callback)
+                for msg_id in chunk:
+                    batch.add(
+                        self.service.users().messages().get(userId='me', id=msg_id, format=format, **params),
+                        request_id=msg_id
+                    )
+                try:
+                    batch.execute()
+                except HttpError as e:
+                    if not is_retryable_error(e):
+                        raise
+                    retry.extend(m for m in chunk if m not in results and m not in retry)
+
+            pending = retry
+            if not pending:
+                break
+            if attempt < max_retries:
+                time.sleep(base_delay * (2 ** attempt) * (0.5 + random.random()))
+
+        if pending:
+            print(f"Giving up on {len(pending)} emails after {max_retries} retries")
+
+        return results
+
+    def parse_message(self, message, include_pdf_text=False):
+        """Turn a Gmail message resource into an email dict
+
+        A format='metadata' resource has no body or attachments; the
+        snippet is the preview.
+        """
+        msg_id = message['id']
+        headers = message['payload'].get('headers', [])
+
+        # Extract subject and sender
+        subject = next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject')
+        sender = next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown')
+        date = next((h['value'] for h in headers if h['name'] == 'Date'), '')
+
+        # Extract body
+        body = self.get_email_body(message['payload'])
+
+        # Extract attachments
+        attachments = self.get_attachments(message['payload'], msg_id)
+
+        # Extract PDF text if requested
+        pdf_contents = []
+        if include_pdf_text and attachments:
+            pdf_contents = self.get_pdf_attachments_text(msg_id, attachments)
+
+        return {
+            'id': msg_id,
+            'thread_id': message.get('threadId'),
+            'sender': sender,
+            'subject': subject,
+            'body': body,
+            # Gmail HTML-escapes snippets
+            'snippet': html.unescape(message.get('snippet', '')),
+            'date': date,
+            'internal_date': int(message.get('internalDate', 0)),
+            'label_ids': message.get('labelIds', []),
+            'attachments': attachments,
+            'pdf_contents': pdf_contents
+        }
+
+    def get_message(self, msg_id):
+        """Full Gmail message resource, from the message cache when recently fetched"""
+        message = self.message_cache.get(msg_id)
+        if message is None:
             message = self.service.users().messages().get(
                 userId='me',
                 id=msg_id,
                 format='full'
             ).execute()
+            self.message_cache.put(msg_id, message)
+        return message
 
-            headers = message['payload']['headers']
+    def cached_body(self, msg_id):
+        """Body of a message already fetched in full (e.g. opened in the UI), or None; never calls Gmail"""
+        message = self.message_cache.get(msg_id)
+        return self.get_email_body(message['payload']) if message else None
 
-            # Extract subject and sender
-            subject = next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject')
-            sender = next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown')
-            date = next((h['value'] for h in headers if h['name'] == 'Date'), '')
+    def invalidate_messages(self, msg_ids):
+        """Drop cached messages whose labels changed"""
+        for msg_id in msg_ids:
+            self.message_cache.pop(msg_id)
 
-            # Extract body
-            body = self.get_email_body(message['payload'])
-
-            # Extract attachments
-            attachments = self.get_attachments(message['payload'], msg_id)
+    def get_email_details(self, msg_id, include_pdf_text=False):
+        """Get details of a specific email including attachments
 
-            # Extract PDF text if requested
-            pdf_contents = []
-            if include_pdf_text and attachments:
-                pdf_contents = self.get_pdf_attachments_text(msg_id, attachments)
+        Args:
+            msg_id: The Gmail message ID
+            include_pdf_text: If True, extract and include text from PDF attachments
+        """
+        try:
+            message = self.get_message(msg_id)
 
-            return {
-                'id': msg_id,
-                'sender': sender,
-                'subject': subject,
-                'body': body,
-                'date': date,
-                'attachments': attachments,
-                'pdf_contents': pdf_contents
-            }
+            return self.parse_message(message, include_pdf_text=include_pdf_text)
 
         except Exception as e:
             print(f"Error getting email details: {e}")
@@ -108,11 +413,7 @@ class GmailReader:
     def get_email_by_id(self, email_id):
         """Get a specific email by ID (simplified version for assignment)"""
         try:
-            message = self.service.users().messages().get(
-                userId='me', 
-                id=email_id,
-                format='full'
-            ).execute()
+            message = self.get_message(email_id)
             
             # Parse the email
             headers = message['payload']['headers']
@@ -121,12 +422,16 @@ class GmailReader:
             
             # Get body
             body = self.get_email_body(message['payload'])
+
+            # Attachment metadata (needed to index PDF text with the case)
+            attachments = self.get_attachments(message['payload'], email_id)
             
             return {
                 'id': email_id,
                 'sender': sender,
                 'subject': subject,
-                'body': body
+                'body': body,
+                'attachments': attachments
             }
         except Exception as e:
             print(f"Error getting email: {e}")
@@ -156,6 +461,7 @@ class GmailReader:
                 id=msg_id,
                 body={'removeLabelIds': ['UNREAD']}
             ).execute()
+            self.invalidate_messages([msg_id])
             return True
         except Exception as e:
             print(f"Error marking email as read: {e}")
@@ -183,6 +489,7 @@ class GmailReader:
                         'filename': filename,
                         'mime_type': mime_type,
                         'attachment_id': attachment_id,
+                        'part_id': part.get('partId'),
                         'size': size,
                         'msg_id': msg_id
                     })
@@ -211,23 +518,47 @@ class GmailReader:
             return None
 
     def extract_pdf_text(self, pdf_data):
-        """Extract text content from PDF binary data"""
+        """Extract text content from PDF binary data, or None if extraction failed"""
         try:
-            pdf_file = io.BytesIO(pdf_data)
-            reader = pypdf.PdfReader(pdf_file)
-
-            text_content = []
-            for page_num, page in enumerate(reader.pages):
-                page_text = page.extract_text()
-                if page_text:
-                    text_content.append(f"--- Page {page_num + 1} ---\n{page_text}")
-
-            return '\n\n'.join(text_content)
+            # Parsed in a worker process with timeout, page and memory limits
+            return get_extractor().extract_text(pdf_data)
 
         except Exception as e:
             print(f"Error extracting PDF text: {e}")
             return None
 
+    def get_attachment_text(self, msg_id, attachment):
+        """Get the text of one PDF attachment, downloading and parsing it at most once
+
+        Text is cached on disk by content hash; the message part -> hash mapping
+        means a cached attachment is not downloaded again either. A failed
+        extraction (timeout, crash, malformed file) is not cached, so a later
+        call tries again; it returns None.
+        """
+        # Gmail attachment IDs change between fetches, the part ID does not
+        part_id = attachment.get('part_id') or attachment['filename']
+
+        with self.text_cache.lock_for(msg_id, part_id):
+            digest = self.text_cache.get_ref(msg_id, part_id)
+            if digest:
+                text = self.text_cache.get_text(digest)
+                if text is not None:
+                    return text
+
+            pdf_data = self.download_attachment(msg_id, attachment['attachment_id'])
+            if not pdf_data:
+                return None
+
+            digest = self.text_cache.content_hash(pdf_data)
+            text = self.text_cache.get_text(digest)
+            if text is None:
+                text = self.extract_pdf_text(pdf_data)
+                if text is None:
+                    return None
+                self.text_cache.put_text(digest, text)
+            self.text_cache.put_ref(msg_id, part_id, digest)
+            return text
+
     def get_pdf_attachments_text(self, msg_id, attachments):
         """Get text content from all PDF attachments in an email"""
         pdf_texts = []
@@ -235,14 +566,203 @@ class GmailReader:
         for attachment in attachments:
             if attachment['mime_type'] == 'application/pdf' or attachment['filename'].lower().endswith('.pdf'):
                 if attachment['attachment_id']:
-                    pdf_data = self.download_attachment(msg_id, attachment['attachment_id'])
-                    if pdf_data:
-                        text = self.extract_pdf_text(pdf_data)
-                        if text:
-                            pdf_texts.append({
-                                'filename': attachment['filename'],
-                                'text': text,
-                                'size': attachment['size']
-                            })
-
-        return pdf_texts
\ No newline at end of file
+                    text = self.get_attachment_text(msg_id, attachment)
+                    if text:
+                        pdf_texts.append({
+                            'filename': attachment['filename'],
+                            'text': text,
+                            'size': attachment['size']
+                        })
+
+        return pdf_texts
+
+
+class InboxSync:
+    """Keeps a local SQLite copy of the unread inbox in step with Gmail
+
+    The first sync (or one after the stored history ID has expired) lists and
+    downloads the newest ``full_sync_limit`` unread messages and keeps Gmail's
+    page token for the rest, which get_inbox_page pulls in a page at a time
+    as the inbox is scrolled. Later syncs call users.history.list with the
+    last seen history ID and only fetch messages that were added or relabeled
+    since, so the inbox view can be served from the database.
+    """
+
+    HISTORY_KEY = 'gmail_history_id'
+    PAGE_TOKEN_KEY = 'gmail_list_page_token'
+    LABELS = ('INBOX', 'UNREAD')
+
+    def __init__(self, reader, db, full_sync_limit=100, page_size=50):
+        self.reader = reader
+        self.db = db
+        self.full_sync_limit = full_sync_limit
+        self.page_size = page_size
+        self._lock = threading.Lock()
+
+    def sync(self):
+        """Bring the local store up to date
+
+        Returns:
+            Summary dict with the sync mode, added/removed counts and the
+            added_ids/removed_ids themselves
+        """
+        with self._lock:
+            history_id = self.db.get_sync_state(self.HISTORY_KEY)
+            if history_id:
+                try:
+                    return self.incremental_sync(history_id)
+                except HttpError as e:
+                    # Gmail keeps history for about a week; older IDs return 404
+                    if e.resp.status != 404:
+                        raise
+                    print("Gmail history ID expired, doing a full resync")
+            return self.full_sync()
+
+    def _in_view(self, label_ids):
+        return all(label in label_ids for label in self.LABELS)
+
+    def _fetch(self, msg_ids):
+        # List view only: bodies are downloaded when a message is opened or assigned
+        messages = self.reader.get_messages_batch(msg_ids, format='metadata')
+        return [
+            self.reader.parse_message(messages[m], include_pdf_text=False)
+            for m in msg_ids if m in messages and self._in_view(messages[m].get('labelIds', []))
+        ]
+
+    def full_sync(self):
+        """Replace the local store with the newest unread messages"""
+        service = self.reader.service
+
+        # Read the history ID first so changes made while listing are picked up next time
+        history_id = service.users().getProfile(userId='me').execute()['historyId']
+
+        emails = []
+        page_token = None
+        while len(emails) < self.full_sync_limit:
+            page, page_token = self.reader.list_unread_page(
+                page_token, min(500, self.full_sync_limit - len(emails))
+            )
+            emails.extend(page)
+            if not page_token:
+                break
+
+        self.db.clear_gmail_messages()
+        self.db.upsert_gmail_messages(emails)
+        self.db.set_sync_state(self.PAGE_TOKEN_KEY, page_token or '')
+        self.db.set_sync_state(self.HISTORY_KEY, str(history_id))
+
+        return {'mode': 'full', 'added': len(emails), 'removed': 0,
+                'added_ids': [e['id'] for e in emails], 'removed_ids': []}
+
+    def incremental_sync(self, start_history_id):
+        """Apply the changes recorded in Gmail history since start_history_id"""
+        service = self.reader.service
+
+        # Latest known label set per message; None means deleted
+        changes = {}
+        history_id = start_history_id
+        page_token = None
+        while True:
+            results = service.users().history().list(
+                userId='me',
+                startHistoryId=start_history_id,
+                pageToken=page_token
+            ).execute()
+
+            for record in results.get('history', []):
+                for key in ('messagesAdded', 'labelsAdded', 'labelsRemoved'):
+                    for entry in record.get(key, []):
+                        changes[entry['message']['id']] = entry['message'].get('labelIds', [])
+                for entry in record.get('messagesDeleted', []):
+                    changes[entry['message']['id']] = None
+
+            history_id = results.get('historyId', history_id)
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                break
+
+        self.reader.invalidate_messages(changes)
+
+        stored = self.db.get_gmail_message_ids()
+        removed = [m for m, labels in changes.items() if m in stored and (labels is None or not self._in_view(labels))]
+        to_fetch = [m for m, labels in changes.items() if m not in stored and labels is not None and self._in_view(labels)]
+
+        emails = self._fetch(to_fetch) if to_fetch else []
+        if removed:
+            self.db.delete_gmail_messages(removed)
+        if emails:
+            self.db.upsert_gmail_messages(emails)
+        self.db.set_sync_state(self.HISTORY_KEY, str(history_id))
+
+        return {'mode': 'incremental', 'added': len(emails), 'removed': len(removed),
+                'added_ids': [e['id'] for e in emails], 'removed_ids': removed}
+
+    def get_inbox(self, limit=None):
+        """Unread inbox from the local store, newest first"""
+        return self.db.get_gmail_messages(limit=limit)
+
+    def load_more(self):
+        """Store the next Gmail page of older unread messages
+
+        Returns:
+            False if the whole inbox was already loaded, True otherwise
+        """
+        with self._lock:
+            page_token = self.db.get_sync_state(self.PAGE_TOKEN_KEY)
+            if not page_token:
+                return False
+            try:
+                emails, page_token = self.reader.list_unread_page(page_token, self.page_size)
+            except HttpError as e:
+                # A stale page token; the next full sync starts over
+                if e.resp.status not in (400, 404):
+                    raise
+                print(f"Gmail page token rejected: {e}")
+                emails, page_token = [], None
+            self.db.upsert_gmail_messages(emails)
+            self.db.set_sync_state(self.PAGE_TOKEN_KEY, page_token or '')
+            return True
+
+    def get_inbox_page(self, cursor=None, limit=20):
+        """One page of the unread inbox, newest first, keyset-paginated
+
+        Older Gmail pages are fetched only when the stored messages run out.
+
+        Args:
+            cursor: next_cursor from the previous page, None for the first page
+            limit: Messages per page
+
+        Returns:
+            (emails, next_cursor), next_cursor None after the last page
+        """
+        before = self.parse_cursor(cursor) if cursor else None
+        emails = self.db.get_gmail_messages(limit=limit, before=before)
+        while len(emails) < limit and self.load_more():
+            emails = self.db.get_gmail_messages(limit=limit, before=before)
+
+        next_cursor = None
+        if len(emails) == limit:
+            last = emails[-1]
+            next_cursor = f"{last['internal_date']}:{last['id']}"
+        return emails, next_cursor
+
+    @staticmethod
+    def parse_cursor(cursor):
+        """(internal_date, message ID) from a next_cursor; ValueError if it isn't one"""
+        internal_date, _, msg_id = cursor.partition(':')
+        if not msg_id:
+            raise ValueError(f"Invalid inbox cursor: {cursor!r}")
+        return int(internal_date), msg_id
+
+
+if __name__ == "__main__":
+    # Authorize in a browser and save the token, e.g. before starting a
+    # server (which never runs the OAuth flow itself) or on a machine with a
+    # browser, then copy the token file to the server
+    import argparse
+    parser = argparse.ArgumentParser(description="Authorize Gmail access and save the token")
+    parser.add_argument("--token", default=os.getenv("GMAIL_TOKEN_PATH", "token.json"))
+    parser.add_argument("--credentials", default=os.getenv("GMAIL_CREDENTIALS_PATH", "credentials.json"))
+    args = parser.parse_args()
+    GmailReader(token_path=args.token, credentials_path=args.credentials, interactive=True).authenticate()
+    print(f"Saved Gmail token to {args.token}")
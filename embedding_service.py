@@ -0,0 +1,161 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class _Request:
+    __slots__ = ("texts", "single", "future")
+
+    def __init__(self, texts, single):
+        self.texts = texts
+        self.single = single
+        self.future = Future()
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent encode calls on one model into micro-batches
+
+    Callers submit texts from any thread and get a Future; a single worker
+    thread takes the first queued request plus everything queued behind it,
+    up to ``max_batch_size`` texts, and encodes them all in one model call.
+    Under concurrent traffic this turns many one-string encodes (mostly
+    per-call overhead, and threads contending on the model) into a few
+    batched ones. While the previous batch held more than one request it
+    also waits up to ``max_wait`` seconds for the batch to fill; a lone
+    caller never waits. encode() takes texts like the model's (but no
+    options), so a batcher can stand in for the model for query encoding.
+    Bulk encoding belongs on the model itself: one large request would hold
+    up every query queued behind it.
+
+    The worker starts on first use and again in a forked child (e.g. a
+    gunicorn worker), since threads don't survive a fork.
+    """
+
+    def __init__(self, model, max_batch_size=32, max_wait=0.002):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self.requests = 0
+        self.texts = 0
+        self.batches = 0
+
+        self._last_batch = 0
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+
+    def submit(self, texts) -> Future:
+        """Queue a string or list of strings; the Future resolves to its embedding(s)
+
+        A string gives a 1-D vector, a list a 2-D array with one row per text.
+        """
+        single = isinstance(texts, str)
+        request = _Request([texts] if single else list(texts), single)
+        if not request.texts:
+            request.future.set_result(np.empty((0, 0), dtype=np.float32))
+            return request.future
+        self._ensure_worker().put(request)
+        return request.future
+
+    def encode(self, texts, **kwargs):
+        """Blocking submit()
+
+        Raises:
+            TypeError: for model.encode keyword arguments (normalize_embeddings,
+                batch_size, ...): batched texts are encoded together with the
+                model's defaults, so options for one caller can't be honoured
+        """
+        if kwargs:
+            raise TypeError(f"EmbeddingBatcher.encode does not support {', '.join(sorted(kwargs))}; "
+                            f"call the model directly")
+        return self.submit(texts).result()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "texts": self.texts,
+                "batches": self.batches,
+                "mean_batch_size": round(self.texts / self.batches, 2) if self.batches else 0
+            }
+
+    def close(self):
+        """Stop the worker after the requests already queued"""
+        with self._lock:
+            if self._thread and self._pid == os.getpid():
+                self._queue.put(None)
+                thread = self._thread
+            else:
+                thread = None
+            self._queue = self._thread = self._pid = None
+        if thread:
+            thread.join()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.SimpleQueue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, args=(self._queue,),
+                                                name="embedding-batcher", daemon=True)
+                self._thread.start()
+            return self._queue
+
+    def _collect(self, requests, first):
+        """The first request plus what is queued (or arrives within max_wait), up to max_batch_size texts
+
+        Returns:
+            (batch, stop) where stop is True if close() was called meanwhile
+        """
+        batch = [first]
+        size = len(first.texts)
+        # Only worth waiting for more when callers are evidently concurrent
+        deadline = time.monotonic() + (self.max_wait if self._last_batch > 1 else 0)
+        while size < self.max_batch_size:
+            try:
+                remaining = deadline - time.monotonic()
+                request = requests.get(timeout=remaining) if remaining > 0 else requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                return batch, True
+            batch.append(request)
+            size += len(request.texts)
+        return batch, False
+
+    def _run(self, requests):
+        stop = False
+        while not stop:
+            first = requests.get()
+            if first is None:
+                break
+            batch, stop = self._collect(requests, first)
+            self._last_batch = len(batch)
+            batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            texts = [text for r in batch for text in r.texts]
+            try:
+                embeddings = np.asarray(self.model.encode(texts, batch_size=self.max_batch_size))
+            except Exception as e:
+                for r in batch:
+                    r.future.set_exception(e)
+                continue
+
+            with self._lock:
+                self.requests += len(batch)
+                self.texts += len(texts)
+                self.batches += 1
+
+            offset = 0
+            for r in batch:
+                rows = embeddings[offset:offset + len(r.texts)]
+                offset += len(r.texts)
+                r.future.set_result(rows[0] if r.single else rows)
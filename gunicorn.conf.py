@@ -0,0 +1,26 @@
+"""gunicorn settings for serving backend.py with several worker processes
+
+    WEB_CONCURRENCY=4 gunicorn -c gunicorn.conf.py backend:app
+
+The app is imported once in the master (preload_app) and the workers are
+forked from it, so the SentenceTransformer model and the SCC article index
+are loaded once and shared copy-on-write instead of once per worker; case
+index vectors are memory-mapped and shared through the page cache. SQLite
+runs in WAL mode with a busy timeout, and the Gmail sync and label flushing
+run only in the worker holding the leader lock in DATA_DIR.
+
+Start once with a single worker (or uvicorn) first if scc_vector_db.pkl
+does not exist yet, so the master does not run the embedding model before
+forking.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") != "0"
+
+# Chat and generate requests wait on the model API
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "180"))
+graceful_timeout = 30
+keepalive = 5
@@ -0,0 +1,273 @@
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from email_reader import GmailUnavailable
+
+
+def format_sse(event):
+    """One server-sent event frame for an event dict (id, type, data)"""
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+class Subscription:
+    """One connected client's event queue, read from its own event loop"""
+
+    def __init__(self, broadcaster, loop, max_queue):
+        self.broadcaster = broadcaster
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_queue)
+
+    async def get(self, timeout=None):
+        """Next event, or None after timeout seconds without one"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def _deliver(self, event):
+        # Runs on the subscriber's loop. A client too slow to keep up gets its
+        # backlog replaced by one reset, telling it to reload the first page
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = self.broadcaster._reset_event()
+        self.queue.put_nowait(event)
+
+
+class InboxBroadcaster:
+    """Fans inbox change events out to every connected client
+
+    publish() may be called from any thread; each subscriber's queue is fed
+    on its own event loop. The last ``history`` events are kept so a client
+    reconnecting with Last-Event-ID only receives what it missed; if that is
+    no longer available it gets a reset event instead.
+    """
+
+    def __init__(self, history=256, max_queue=100):
+        self.max_queue = max_queue
+        self._history = deque(maxlen=history)
+        self._ids = itertools.count(1)
+        self._last_id = 0
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self, last_event_id=None):
+        """Register the calling event loop's client; call from a coroutine"""
+        subscription = Subscription(self, asyncio.get_running_loop(), self.max_queue)
+        with self._lock:
+            self._subscribers.add(subscription)
+            if last_event_id is not None:
+                for event in self._missed_since(last_event_id):
+                    subscription._deliver(event)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event_type, data):
+        """Send an event to all subscribers; returns its id"""
+        with self._lock:
+            event = {'id': next(self._ids), 'type': event_type, 'data': data}
+            self._last_id = event['id']
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, event)
+            except RuntimeError:
+                # Loop closed under a client that never unsubscribed
+                self.unsubscribe(subscription)
+        return event['id']
+
+    def _missed_since(self, last_event_id):
+        try:
+            last_event_id = int(last_event_id)
+        except (TypeError, ValueError):
+            return [self._reset_event()]
+        if last_event_id >= self._last_id:
+            return []
+        oldest = self._history[0]['id'] if self._history else self._last_id + 1
+        if last_event_id + 1 < oldest:
+            return [self._reset_event()]
+        return [event for event in self._history if event['id'] > last_event_id]
+
+    def _reset_event(self):
+        return {'id': self._last_id, 'type': 'reset', 'data': {}}
+
+
+class InboxSyncWorker:
+    """Syncs the inbox store from Gmail on a schedule and publishes the changes
+
+    Two jobs share one thread. Every watch_interval seconds the stored
+    message IDs are compared with the previous snapshot, and an 'inbox'
+    event with the metadata of added messages and the IDs of removed ones
+    is published (or 'reset' if more than reset_threshold changed at once).
+    Watching the store rather than the sync result means changes made by
+    any process, such as an assignment served by another worker, reach
+    this process's clients too.
+
+    The Gmail sync itself runs every interval seconds, but only in the
+    process holding ``leader`` (a LeaderLock; None means always), so Gmail
+    API usage depends on the interval and the amount of new mail, not on
+    how many clients or workers there are. trigger() asks for an early sync,
+    passing the request to the leader through the database when needed;
+    syncs are never closer together than min_interval seconds.
+    """
+
+    SYNC_REQUEST_KEY = 'gmail_sync_requested'
+
+    def __init__(self, inbox_sync, db, broadcaster, interval=30.0, min_interval=5.0,
+                 watch_interval=2.0, reset_threshold=200, leader=None):
+        self.inbox_sync = inbox_sync
+        self.db = db
+        self.broadcaster = broadcaster
+        self.interval = interval
+        self.min_interval = min_interval
+        self.watch_interval = watch_interval
+        self.reset_threshold = reset_threshold
+        self.leader = leader
+
+        self.last_sync = None
+        self.last_sync_at = None
+        self.last_error = None
+
+        self._snapshot = None
+        self._requested = threading.Event()
+        self._poke = threading.Event()
+        self._stop = threading.Event()
+        self._synced = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    @property
+    def leading(self):
+        return self.leader is None or self.leader.held
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="gmail-inbox-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._poke.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def trigger(self):
+        """Ask for a sync as soon as min_interval allows, without waiting for it"""
+        self._requested.set()
+        self._poke.set()
+
+    @property
+    def synced(self):
+        """Whether the store has been synced once, by this process or the leader (or a sync failed)"""
+        return self._synced.is_set()
+
+    def wait_for_first_sync(self, timeout=None):
+        """Block until the store has been synced once (or a sync failed); True if so"""
+        return self._synced.wait(timeout)
+
+    def _mark_synced(self):
+        """Record the first sync; clients that loaded the store before it reload on 'reset'"""
+        if not self._synced.is_set():
+            self._synced.set()
+            self.broadcaster.publish('reset', {})
+
+    def _run(self):
+        last_sync = None
+        while not self._stop.is_set():
+            try:
+                if self._tick(last_sync):
+                    last_sync = time.monotonic()
+                self.publish_changes()
+            except Exception as e:
+                print(f"Error in inbox sync worker: {e}")
+            self._poke.wait(self.watch_interval)
+            self._poke.clear()
+
+    def _tick(self, last_sync):
+        """Sync from Gmail if this process leads and a sync is due; True if it ran"""
+        since = None if last_sync is None else time.monotonic() - last_sync
+        if since is not None and since < self.min_interval:
+            return False
+
+        requested = self._requested.is_set()
+        if not (self.leader is None or self.leader.acquire()):
+            # Another process syncs; hand it the request and just watch the store
+            if requested:
+                self._requested.clear()
+                self.db.set_sync_state(self.SYNC_REQUEST_KEY, '1')
+            if not self._synced.is_set() and self.db.get_sync_state(self.inbox_sync.HISTORY_KEY):
+                self._mark_synced()
+            return False
+
+        requested = requested or bool(self.db.get_sync_state(self.SYNC_REQUEST_KEY))
+        if since is None or since >= self.interval or requested:
+            self._requested.clear()
+            self.db.set_sync_state(self.SYNC_REQUEST_KEY, '')
+            self.sync_once()
+            return True
+        return False
+
+    def sync_once(self):
+        """Run one Gmail sync into the store; returns the sync summary or None"""
+        try:
+            summary = self.inbox_sync.sync()
+        except GmailUnavailable as e:
+            # Offline: the token refresher or a later connect brings it back
+            self.last_error = str(e)
+            return None
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Error syncing Gmail inbox: {e}")
+            return None
+        finally:
+            self._mark_synced()
+
+        self.last_sync = {k: summary[k] for k in ('mode', 'added', 'removed')}
+        self.last_sync_at = time.time()
+        self.last_error = None
+        return summary
+
+    def publish_changes(self):
+        """Publish how the stored inbox differs from the last snapshot"""
+        ids = self.db.get_gmail_message_ids()
+        previous, self._snapshot = self._snapshot, ids
+        if previous is None:
+            return
+        added = ids - previous
+        removed = previous - ids
+        if not added and not removed:
+            return
+        if len(added) + len(removed) > self.reset_threshold:
+            self.broadcaster.publish('reset', {})
+        else:
+            self.broadcaster.publish('inbox', {
+                'added': self.db.get_gmail_messages_by_ids(list(added)),
+                'removed': sorted(removed)
+            })
+
+    def status(self):
+        return {
+            'running': self.running,
+            'leader': self.leading,
+            'interval': self.interval,
+            'last_sync': self.last_sync,
+            'last_sync_at': self.last_sync_at,
+            'last_error': self.last_error,
+            'subscribers': len(self.broadcaster)
+        }
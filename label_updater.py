@@ -0,0 +1,202 @@
+import random
+import threading
+import time
+from collections import defaultdict
+from googleapiclient.errors import HttpError
+from email_reader import BATCH_SIZE, GmailUnavailable, is_retryable_error
+
+# users.messages.batchModify accepts at most 1000 message IDs per call
+MAX_BATCH_IDS = 1000
+
+
+def coalesce(ops):
+    """Net label change per message, grouped by identical change
+
+    Later ops win over earlier ones for the same label, so adding then
+    removing UNREAD on one message nets out to a removal.
+
+    Returns:
+        Dict of (add_labels, remove_labels) tuples -> list of message IDs
+    """
+    state = {}
+    for op in ops:
+        labels = state.setdefault(op['msg_id'], {})
+        for label in op['add_labels']:
+            labels[label] = True
+        for label in op['remove_labels']:
+            labels[label] = False
+
+    groups = defaultdict(list)
+    for msg_id, labels in state.items():
+        add = tuple(sorted(label for label, on in labels.items() if on))
+        remove = tuple(sorted(label for label, on in labels.items() if not on))
+        if add or remove:
+            groups[(add, remove)].append(msg_id)
+    return groups
+
+
+class LabelUpdater:
+    """Write-behind queue for Gmail label changes
+
+    Changes are written to the pending_label_ops table when requested, so
+    none are lost on restart, and a background thread flushes them every
+    flush_interval seconds (or when woken with flush_soon). A flush coalesces
+    the pending ops per message and sends each distinct change with
+    users.messages.batchModify, up to MAX_BATCH_IDS messages per call.
+    Rate-limited calls are retried with jittered backoff; if Gmail rejects
+    a batch outright the messages are retried one by one so one bad ID does
+    not hold back the rest. Ops still failing after max_attempts flushes are
+    dropped. With a ``leader`` lock, only the process holding it flushes in
+    the background; the others just record changes for it to send.
+    """
+
+    def __init__(self, reader, db, flush_interval=2.0, max_attempts=8, max_retries=3, base_delay=0.5,
+                 leader=None):
+        self.reader = reader
+        self.db = db
+        self.leader = leader
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def enqueue(self, msg_ids, add_labels=(), remove_labels=()):
+        """Record a label change for later sending"""
+        msg_ids = list(msg_ids)
+        if not msg_ids:
+            return
+        self.db.add_label_ops([(msg_id, add_labels, remove_labels) for msg_id in msg_ids])
+        # Cached copies carry the old labels
+        self.reader.invalidate_messages(msg_ids)
+
+    def mark_read(self, msg_ids):
+        self.enqueue(msg_ids, remove_labels=['UNREAD'])
+
+    def pending(self):
+        return self.db.count_label_ops()
+
+    def start(self):
+        """Start the background flusher (sends anything left from a previous run first)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="gmail-label-updater", daemon=True)
+        self._thread.start()
+
+    def stop(self, flush=True):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if flush and (self.leader is None or self.leader.held):
+            self.flush()
+
+    def flush_soon(self):
+        """Wake the background flusher without waiting for it"""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.leader is None or self.leader.acquire():
+                    self.flush()
+            except Exception as e:
+                print(f"Error flushing Gmail label changes: {e}")
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+
+    def flush(self):
+        """Send all pending label changes now
+
+        Returns:
+            Dict with API calls made, messages updated and ops still pending
+        """
+        with self._flush_lock:
+            ops = self.db.get_label_ops()
+            if not ops:
+                return {'calls': 0, 'updated': 0, 'pending': 0}
+
+            # Offline is not a failed attempt; keep everything for the next flush
+            try:
+                self.reader.connect(wait=0)
+            except GmailUnavailable:
+                return {'calls': 0, 'updated': 0, 'pending': len(ops)}
+
+            calls = 0
+            failed_msgs = set()
+            updated = 0
+            for (add, remove), msg_ids in coalesce(ops).items():
+                for start in range(0, len(msg_ids), MAX_BATCH_IDS):
+                    chunk = msg_ids[start:start + MAX_BATCH_IDS]
+                    succeeded, chunk_calls = self._send(chunk, add, remove)
+                    calls += chunk_calls
+                    updated += len(succeeded)
+                    failed_msgs.update(set(chunk) - set(succeeded))
+
+            # Ops on messages that were sent, or whose changes net out to nothing, are done
+            failed = [op for op in ops if op['msg_id'] in failed_msgs]
+            self.db.delete_label_ops([op['id'] for op in ops if op['msg_id'] not in failed_msgs])
+
+            expired = [op['id'] for op in failed if op['attempts'] + 1 >= self.max_attempts]
+            if expired:
+                print(f"Dropping {len(expired)} Gmail label changes after {self.max_attempts} attempts")
+                self.db.delete_label_ops(expired)
+            retry = [op['id'] for op in failed if op['attempts'] + 1 < self.max_attempts]
+            if retry:
+                self.db.increment_label_op_attempts(retry)
+
+            return {'calls': calls, 'updated': updated, 'pending': len(retry)}
+
+    def _send(self, msg_ids, add, remove):
+        """batchModify one chunk; returns (message IDs updated, API calls made)"""
+        body = {'ids': msg_ids, 'addLabelIds': list(add), 'removeLabelIds': list(remove)}
+        calls = 0
+        for attempt in range(self.max_retries + 1):
+            calls += 1
+            try:
+                self.reader.service.users().messages().batchModify(userId='me', body=body).execute()
+                return msg_ids, calls
+            except HttpError as e:
+                if not is_retryable_error(e):
+                    print(f"Gmail rejected a label batch ({e}), retrying messages individually")
+                    succeeded, single_calls = self._send_individually(msg_ids, add, remove)
+                    return succeeded, calls + single_calls
+            except Exception as e:
+                print(f"Error sending Gmail label changes: {e}")
+                return [], calls
+            if attempt < self.max_retries:
+                time.sleep(self.base_delay * (2 ** attempt) * (0.5 + random.random()))
+        return [], calls
+
+    def _send_individually(self, msg_ids, add, remove):
+        """messages.modify per message through the batch HTTP endpoint"""
+        body = {'addLabelIds': list(add), 'removeLabelIds': list(remove)}
+        succeeded = []
+        calls = 0
+
+        def callback(request_id, response, exception):
+            if exception is None:
+                succeeded.append(request_id)
+            elif isinstance(exception, HttpError) and exception.resp.status == 404:
+                # Deleted since; nothing left to label
+                succeeded.append(request_id)
+            else:
+                print(f"Error updating labels on {request_id}: {exception}")
+
+        service = self.reader.service
+        for start in range(0, len(msg_ids), BATCH_SIZE):
+            batch = service.new_batch_http_request(callback=callback)
+            for msg_id in msg_ids[start:start + BATCH_SIZE]:
+                batch.add(service.users().messages().modify(userId='me', id=msg_id, body=body), request_id=msg_id)
+            calls += 1
+            try:
+                batch.execute()
+            except Exception as e:
+                print(f"Error sending Gmail label changes: {e}")
+        return succeeded, calls
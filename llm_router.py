@@ -0,0 +1,345 @@
+import os
+import queue
+import random
+import threading
+import time
+from collections import namedtuple
+
+MAX_BACKOFF = 8.0
+
+Completion = namedtuple('Completion', 'text provider label attempts latency')
+
+
+class LLMUnavailable(Exception):
+    """No provider produced a completion in time (rate limited, failing or too slow)
+
+    ``errors`` lists (provider name, exception) for every failed attempt chain
+    and ``retry_after`` is a suggested wait in seconds before trying again.
+    """
+
+    def __init__(self, message, errors=(), retry_after=None):
+        super().__init__(message)
+        self.errors = list(errors)
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """Token bucket: at most ``rate`` acquisitions per ``per`` seconds, bursts up to ``burst``"""
+
+    def __init__(self, rate, per=60.0, burst=None):
+        self.interval = per / rate
+        self.capacity = burst or 1
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Block until a token is available, then take it; False if that takes longer than timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) / self.interval)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) * self.interval
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+def status_code(error):
+    """HTTP status of an SDK error (anthropic's status_code, google-api-core's code), or None"""
+    for attr in ("status_code", "code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def retry_after(error):
+    """Seconds from an error response's Retry-After header, or None"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class Provider:
+    """One LLM backend with its own concurrency cap, rate limit and timeout
+
+    Subclasses implement complete(). Errors with a 408/409/429/5xx status or
+    of a type in ``transient_errors`` are retried; anything else (a bad
+    request, an authentication error) fails the provider straight away.
+
+    Args:
+        name: Key used to pick the provider in LLMRouter.complete
+        label: Shown to users as the model that answered
+        max_concurrency: Calls in flight at once; more wait for a slot
+        requests_per_minute: Calls started per minute (bursts up to max_concurrency), None for no limit
+        timeout: Seconds a single call may take
+    """
+
+    transient_errors = (TimeoutError, ConnectionError)
+
+    def __init__(self, name, label, max_concurrency=8, requests_per_minute=None, timeout=60.0):
+        self.name = name
+        self.label = label
+        self.timeout = timeout
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.limiter = RateLimiter(requests_per_minute, burst=max_concurrency) if requests_per_minute else None
+
+        self.counters = {"calls": 0, "failures": 0, "retries": 0, "hedges": 0, "fallbacks": 0, "in_flight": 0}
+        self._counter_lock = threading.Lock()
+
+    def complete(self, prompt, max_tokens, timeout):
+        """The text of one completion of prompt"""
+        raise NotImplementedError
+
+    def retryable(self, error):
+        code = status_code(error)
+        if code is not None:
+            return code in (408, 409, 429) or code >= 500
+        return isinstance(error, self.transient_errors)
+
+    def count(self, counter, n=1):
+        with self._counter_lock:
+            self.counters[counter] += n
+
+    def stats(self):
+        with self._counter_lock:
+            return dict(self.counters)
+
+
+class AnthropicProvider(Provider):
+    """Claude through an anthropic client (whose own retries are turned off; the router retries)"""
+
+    def __init__(self, client, model="claude-3-haiku-20240307", name="claude", label="Claude API", **limits):
+        super().__init__(name, label, **limits)
+        # Imported here so the router and its fakes work without the SDK installed
+        from anthropic import APIConnectionError  # also the base of APITimeoutError
+        self.transient_errors = Provider.transient_errors + (APIConnectionError,)
+        self.client = client.with_options(max_retries=0)
+        self.model = model
+
+    def complete(self, prompt, max_tokens, timeout):
+        response = self.client.messages.create(
+            model=self.model,
+            max_tokens=max_tokens,
+            messages=[{"role": "user", "content": prompt}],
+            timeout=timeout
+        )
+        return response.content[0].text
+
+
+class GeminiProvider(Provider):
+    """Gemini on Vertex AI, initialized on first use
+
+    The Vertex SDK has no per-call timeout; the router stops waiting for a
+    call after the timeout, but the call itself runs to completion.
+    """
+
+    def __init__(self, model="gemini-2.5-flash", project=None, location="us-central1",
+                 name="gemini", label="Vertex AI Gemini", **limits):
+        super().__init__(name, label, **limits)
+        self.model_name = model
+        self.project = project
+        self.location = location
+        self._model = None
+        self._init_lock = threading.Lock()
+
+    @property
+    def model(self):
+        with self._init_lock:
+            if self._model is None:
+                import vertexai
+                from vertexai.generative_models import GenerativeModel
+                vertexai.init(project=self.project, location=self.location)
+                self._model = GenerativeModel(self.model_name)
+            return self._model
+
+    def complete(self, prompt, max_tokens, timeout):
+        response = self.model.generate_content(prompt, generation_config={"max_output_tokens": max_tokens})
+        return response.text
+
+
+class LLMRouter:
+    """Sends completions to a set of providers with retries, deadlines, hedging and fallback
+
+    Every call runs on a provider (the requested one if configured, else the
+    first) inside that provider's concurrency and rate limits, retrying
+    transient errors with full-jitter exponential backoff (or the server's
+    Retry-After) until ``timeout`` runs out. If the chain fails, the next
+    provider is tried. With ``hedge_after`` set, a call still unanswered
+    that many seconds after it reached the provider is also sent to the next provider (or again to
+    the same one if it is the only one) and whichever answers first wins; the
+    slower call is left to finish in the background. At most
+    ``max_hedge_ratio`` of all calls are hedged, so a provider that is slow
+    across the board can't double the load. When nothing answers in time, LLMUnavailable is raised.
+    """
+
+    def __init__(self, providers, max_retries=2, backoff=0.5, timeout=90.0, hedge_after=None, max_hedge_ratio=0.1):
+        self.providers = {p.name: p for p in providers}
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.max_hedge_ratio = max_hedge_ratio
+
+        self._requests = 0
+        self._hedges = 0
+        self._lock = threading.Lock()
+
+    def _take_hedge(self):
+        """Whether another hedge stays within max_hedge_ratio of all requests (and count it)"""
+        with self._lock:
+            if self._hedges + 1 > self.max_hedge_ratio * self._requests:
+                return False
+            self._hedges += 1
+            return True
+
+    def complete(self, prompt, max_tokens=1024, provider=None, fallback=True, hedge_after=None, timeout=None):
+        """Complete prompt, preferring the named provider (the first one if it isn't configured)
+
+        Args:
+            fallback: Try (and hedge on) the other providers if the preferred one fails or is slow
+            hedge_after: Latency budget in seconds before hedging; defaults to the router's
+            timeout: Overall deadline in seconds; defaults to the router's
+
+        Returns:
+            Completion(text, provider, label, attempts, latency)
+        """
+        preferred = self.providers.get(provider) or next(iter(self.providers.values()))
+        others = [p for p in self.providers.values() if p is not preferred] if fallback else []
+        hedge_after = self.hedge_after if hedge_after is None else hedge_after
+
+        start = time.monotonic()
+        timeout = timeout or self.timeout
+        deadline = start + timeout
+        results = queue.SimpleQueue()
+        # When the preferred provider's attempts were sent: the latency budget
+        # counts from there, not from time spent waiting for a slot
+        sent = []
+        with self._lock:
+            self._requests += 1
+
+        running = []  # providers with an attempt chain still going
+
+        def launch(p, sent=None):
+            running.append(p)
+
+            def run():
+                try:
+                    results.put((p, self._call(p, prompt, max_tokens, start, deadline, sent), None))
+                except Exception as e:
+                    results.put((p, None, e))
+            threading.Thread(target=run, name=f"llm-{p.name}", daemon=True).start()
+
+        launch(preferred, sent)
+        hedged = False
+        errors = []
+        while running:
+            now = time.monotonic()
+            wait = deadline - now
+            if hedge_after and not hedged:
+                wait = min(wait, sent[-1] + hedge_after - now if sent else 0.05)
+            try:
+                p, completion, error = results.get(timeout=max(wait, 0))
+            except queue.Empty:
+                if time.monotonic() >= deadline:
+                    break
+                if not hedge_after or hedged or not sent or time.monotonic() < sent[-1] + hedge_after:
+                    continue
+                # Over the latency budget: race a second call against the first
+                hedged = True
+                if not self._take_hedge():
+                    continue
+                target = others.pop(0) if others else preferred
+                target.count("hedges")
+                launch(target)
+                continue
+
+            running.remove(p)
+            if error is None:
+                return completion
+            errors.append((p.name, error))
+            if not running and others:
+                target = others.pop(0)
+                target.count("fallbacks")
+                launch(target)
+
+        for p in running:
+            errors.append((p.name, TimeoutError(f"No response within {timeout:g}s")))
+        retry_hints = [retry_after(e) for _, e in errors]
+        raise LLMUnavailable(
+            "; ".join(f"{name}: {e}" for name, e in errors),
+            errors,
+            retry_after=max([h for h in retry_hints if h] or [5])
+        )
+
+    def _call(self, p, prompt, max_tokens, start, deadline, sent=None):
+        """One provider's attempts at a completion, within its limits and the deadline
+
+        Appends the time each attempt is sent to ``sent``, if given.
+        """
+        for attempt in range(1, self.max_retries + 2):
+            remaining = deadline - time.monotonic()
+            if p.limiter and not p.limiter.acquire(timeout=remaining):
+                raise TimeoutError(f"{p.name} rate limit: no slot before the deadline")
+            if not p.semaphore.acquire(timeout=max(deadline - time.monotonic(), 0)):
+                raise TimeoutError(f"{p.name} concurrency limit: no slot before the deadline")
+
+            p.count("calls")
+            p.count("in_flight")
+            if sent is not None:
+                sent.append(time.monotonic())
+            try:
+                text = p.complete(prompt, max_tokens, timeout=min(p.timeout, max(deadline - time.monotonic(), 0.1)))
+                return Completion(text, p.name, p.label, attempt, time.monotonic() - start)
+            except Exception as e:
+                p.count("failures")
+                error = e
+            finally:
+                p.count("in_flight", -1)
+                p.semaphore.release()
+
+            if attempt > self.max_retries or not p.retryable(error):
+                raise error
+            delay = retry_after(error) or random.uniform(0, min(MAX_BACKOFF, self.backoff * 2 ** (attempt - 1)))
+            if time.monotonic() + delay >= deadline:
+                raise error
+            p.count("retries")
+            time.sleep(delay)
+
+    def stats(self):
+        with self._lock:
+            totals = {"requests": self._requests, "hedges": self._hedges}
+        return {**totals, "providers": {name: p.stats() for name, p in self.providers.items()}}
+
+
+def default_router(anthropic_client):
+    """Claude, plus Gemini on Vertex AI when GCP_PROJECT_ID is set, with limits from the environment"""
+    providers = [AnthropicProvider(
+        anthropic_client,
+        max_concurrency=int(os.getenv("ANTHROPIC_MAX_CONCURRENCY", "8")),
+        requests_per_minute=float(os.getenv("ANTHROPIC_RPM", "50")),
+        timeout=float(os.getenv("LLM_TIMEOUT", "60"))
+    )]
+    if os.getenv("GCP_PROJECT_ID"):
+        providers.append(GeminiProvider(
+            project=os.getenv("GCP_PROJECT_ID"),
+            location=os.getenv("GCP_LOCATION", "us-central1"),
+            max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "8")),
+            requests_per_minute=float(os.getenv("GEMINI_RPM", "60")),
+            timeout=float(os.getenv("LLM_TIMEOUT", "60"))
+        ))
+    hedge_after = os.getenv("LLM_HEDGE_AFTER")
+    return LLMRouter(
+        providers,
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "2")),
+        timeout=float(os.getenv("LLM_DEADLINE", "90")),
+        hedge_after=float(hedge_after) if hedge_after else None
+    )
@@ -0,0 +1,202 @@
+import io
+import os
+import queue
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def _forget_forkserver():
+    """In a forked child: drop the parent's forkserver so the child starts its own
+
+    multiprocessing keeps one forkserver per process in module state. A child
+    forked after the parent started it (a gunicorn worker forked from a
+    preloaded master that extracted the rules PDF) would reuse that server,
+    and then fail waiting on a process that is not its child.
+    """
+    from multiprocessing import forkserver
+    server = forkserver._forkserver
+    if server._forkserver_alive_fd is not None:
+        # Our copy of the write end; the server exits once its owner's closes too
+        try:
+            os.close(server._forkserver_alive_fd)
+        except OSError:
+            pass
+    # Back to "not started" (address, pid, fds, lock and preload list)
+    server.__init__()
+
+
+if hasattr(os, "register_at_fork") and "forkserver" in multiprocessing.get_all_start_methods():
+    os.register_at_fork(after_in_child=_forget_forkserver)
+
+
+class PDFExtractionError(Exception):
+    """A PDF could not be extracted (malformed, timed out or over the memory cap)"""
+
+
+def _extract_worker(source, max_pages, memory_limit_mb, out):
+    """Runs in a child process: stream (kind, page_number, payload) tuples to out"""
+    # Imported here so the parent (the web backend) never loads pypdf
+    import pypdf
+
+    if resource and memory_limit_mb:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    try:
+        reader = pypdf.PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
+        total = len(reader.pages)
+        for i, page in enumerate(reader.pages):
+            if max_pages and i >= max_pages:
+                break
+            out.put(("page", i + 1, page.extract_text() or ""))
+        out.put(("done", total, None))
+    except MemoryError:
+        out.put(("error", 0, f"memory limit of {memory_limit_mb} MB exceeded"))
+    except Exception as e:
+        out.put(("error", 0, str(e)))
+
+
+class PDFExtractor:
+    """Bounded pool of PDF text extraction processes
+
+    Each document is parsed in its own child process (started from a
+    forkserver, so it is cheap and does not inherit the model-laden parent).
+    That lets a per-document timeout kill a hung parse and lets an address
+    space limit stop a runaway one without touching the caller. At most
+    ``max_workers`` documents are parsed at once; further callers wait.
+    """
+
+    def __init__(self, max_workers=None, timeout=60, max_pages=500, memory_limit_mb=1024):
+        self.max_workers = max_workers or os.cpu_count() or 2
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self.memory_limit_mb = memory_limit_mb
+
+        self._ctx = None
+        self._ctx_pid = None
+        self._ctx_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+
+    def _context(self):
+        """The multiprocessing context, set up on first use in each process"""
+        with self._ctx_lock:
+            if self._ctx_pid != os.getpid():
+                if "forkserver" in multiprocessing.get_all_start_methods():
+                    self._ctx = multiprocessing.get_context("forkserver")
+                    # Import pypdf once in the server so each child forks with it loaded
+                    # (set again after a fork, which resets the forkserver)
+                    self._ctx.set_forkserver_preload(["pypdf", "pdf_extract"])
+                else:
+                    self._ctx = multiprocessing.get_context("spawn")
+                self._ctx_pid = os.getpid()
+            return self._ctx
+
+    def iter_pages(self, source, timeout=None, max_pages=None, stats=None):
+        """Yield (page_number, text) as pages are extracted
+
+        Args:
+            source: PDF bytes or a file path
+            timeout: Seconds for the whole document (default self.timeout)
+            max_pages: Stop after this many pages (default self.max_pages)
+            stats: Optional dict; 'total_pages' is set once extraction finishes
+
+        Raises:
+            PDFExtractionError: on a malformed PDF, timeout or memory cap
+        """
+        timeout = timeout or self.timeout
+        max_pages = self.max_pages if max_pages is None else max_pages
+
+        ctx = self._context()
+        with self._slots:
+            out = ctx.Queue()
+            process = ctx.Process(
+                target=_extract_worker,
+                args=(source, max_pages, self.memory_limit_mb, out),
+                daemon=True
+            )
+            process.start()
+            deadline = time.monotonic() + timeout
+
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PDFExtractionError(f"Timed out after {timeout}s")
+                    try:
+                        kind, number, payload = out.get(timeout=min(remaining, 1.0))
+                    except queue.Empty:
+                        if not process.is_alive():
+                            raise PDFExtractionError(f"Extraction process exited with code {process.exitcode}")
+                        continue
+
+                    if kind == "page":
+                        yield number, payload
+                    elif kind == "done":
+                        if stats is not None:
+                            stats['total_pages'] = number
+                        return
+                    else:
+                        raise PDFExtractionError(payload)
+            finally:
+                if process.is_alive():
+                    process.terminate()
+                process.join(timeout=1)
+                out.close()
+
+    def extract_text(self, source, timeout=None, max_pages=None):
+        """Extract all page text, formatted with '--- Page N ---' headers"""
+        max_pages = self.max_pages if max_pages is None else max_pages
+
+        text_content = []
+        stats = {}
+        for page_num, page_text in self.iter_pages(source, timeout=timeout, max_pages=max_pages, stats=stats):
+            if page_text:
+                text_content.append(f"--- Page {page_num} ---\n{page_text}")
+
+        if max_pages and stats.get('total_pages', 0) > max_pages:
+            text_content.append(f"[Truncated after {max_pages} of {stats['total_pages']} pages]")
+
+        return '\n\n'.join(text_content)
+
+    def extract_many(self, sources, timeout=None, max_pages=None):
+        """Extract several documents in parallel
+
+        Returns:
+            List in input order of text or the PDFExtractionError raised
+        """
+        def extract(source):
+            try:
+                return self.extract_text(source, timeout=timeout, max_pages=max_pages)
+            except PDFExtractionError as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(extract, sources))
+
+
+_extractor = None
+_extractor_pid = None
+_extractor_lock = threading.Lock()
+
+
+def get_extractor():
+    """The process-wide PDFExtractor shared by attachment processing and rules ingestion"""
+    global _extractor, _extractor_pid
+    with _extractor_lock:
+        # A forked server worker can't use its parent's process pool
+        if _extractor is None or _extractor_pid != os.getpid():
+            _extractor_pid = os.getpid()
+            _extractor = PDFExtractor(
+                max_workers=int(os.getenv("PDF_EXTRACT_WORKERS", "0")) or None,
+                timeout=float(os.getenv("PDF_EXTRACT_TIMEOUT", "60")),
+                max_pages=int(os.getenv("PDF_EXTRACT_MAX_PAGES", "500")),
+                memory_limit_mb=int(os.getenv("PDF_EXTRACT_MEMORY_MB", "1024"))
+            )
+        return _extractor
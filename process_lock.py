@@ -0,0 +1,63 @@
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+
+class LeaderLock:
+    """Non-blocking exclusive lock on a file, held until released or the process exits
+
+    Of several processes sharing a data directory (e.g. gunicorn workers), at
+    most one holds it at a time; the others can keep calling acquire() and
+    one of them takes over when the holder dies, since the OS drops the lock
+    with the process. Without fcntl every process is the leader.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+        self._pid = None
+
+    @property
+    def held(self):
+        # A descriptor inherited across fork belongs to the parent's lock
+        return self._fd is not None and self._pid == os.getpid()
+
+    def acquire(self):
+        """Take the lock if it is free; True if this process holds it"""
+        if self.held:
+            return True
+        if fcntl is None:
+            self._fd, self._pid = -1, os.getpid()
+            return True
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd, self._pid = fd, os.getpid()
+        return True
+
+    def release(self):
+        if self.held and self._fd >= 0:
+            os.close(self._fd)
+        self._fd = self._pid = None
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock on path for the duration of the block, waiting for other processes"""
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
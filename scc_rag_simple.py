@@ -4,15 +4,21 @@ import pickle
 import numpy as np
 from typing import List, Dict
 from sentence_transformers import SentenceTransformer
-import pypdf
+from pdf_extract import get_extractor
+from vector_index import load_or_build_index
+from query_cache import LRUCache, normalize_query
+from embedding_service import EmbeddingBatcher
 import os
 
 class SCCRagSystem:
-    def __init__(self, pdf_path="./SCC_Arbitration_Rules_2023_English.pdf"):
+    def __init__(self, pdf_path="./SCC_Arbitration_Rules_2023_English.pdf", index_type="exact", index_params=None, cache_size=256, db_path="./scc_vector_db.pkl"):
         # Initialize components (no Vertex AI)
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.model_name = 'all-MiniLM-L6-v2'
+        self.embedding_model = SentenceTransformer(self.model_name)
+        # Query embeddings go through here so concurrent requests are encoded in micro-batches
+        self.embedder = EmbeddingBatcher(self.embedding_model)
         self.pdf_path = pdf_path
-        self.db_path = "./scc_vector_db.pkl"
+        self.db_path = db_path
         
         # Article categories for smart routing
         self.categories = {
@@ -34,15 +40,25 @@ class SCCRagSystem:
             self.articles_db = self.process_pdf()
             with open(self.db_path, 'wb') as f:
                 pickle.dump(self.articles_db, f)
+        
+        # Vector index over the article embeddings ("exact" or "ivf"; index_params
+        # can also select quantized storage, e.g. {"storage": "int8"}, see vector_index.py).
+        # Saved beside the article database and memory-mapped on later starts
+        self.index = load_or_build_index(
+            f"{os.path.splitext(self.db_path)[0]}_{index_type}_index", index_type,
+            self.articles_db["embeddings"], source_path=self.db_path, **(index_params or {})
+        )
+        
+        # Query caches (normalized query -> embedding, (query, n) -> article ids),
+        # cleared whenever index_manifest() changes
+        self.embedding_cache = LRUCache(maxsize=cache_size)
+        self.results_cache = LRUCache(maxsize=cache_size)
+        self._cache_manifest = self.index_manifest()
     
     def extract_articles_from_pdf(self) -> List[Dict]:
         """Extract articles from SCC PDF"""
-        reader = pypdf.PdfReader(self.pdf_path)
-        full_text = ""
-        
-        # Extract all text
-        for page in reader.pages:
-            full_text += page.extract_text()
+        # Extract all text (in a worker process, see pdf_extract.py)
+        full_text = "".join(text for _, text in get_extractor().iter_pages(self.pdf_path))
         
         articles = []
         
@@ -103,31 +119,70 @@ class SCCRagSystem:
         """Calculate cosine similarity between two vectors"""
         return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
     
+    def index_manifest(self) -> Dict:
+        """Identify the embedding model and article index that cached results depend on"""
+        return {
+            "model": self.model_name,
+            "db_path": self.db_path,
+            "db_mtime": os.path.getmtime(self.db_path) if os.path.exists(self.db_path) else None,
+            "index": self.index.kind,
+            "params": self.index.params(),
+            "version": self.index.version,
+            "count": len(self.index)
+        }
+    
+    def _check_cache_manifest(self):
+        """Drop cached embeddings and results if the model or index changed"""
+        manifest = self.index_manifest()
+        if manifest != self._cache_manifest:
+            self.embedding_cache.clear()
+            self.results_cache.clear()
+            self._cache_manifest = manifest
+    
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters for the query caches and embedding batch sizes"""
+        return {
+            "embeddings": self.embedding_cache.stats(),
+            "results": self.results_cache.stats(),
+            "embedding_batches": self.embedder.stats()
+        }
+    
+    def embed_query(self, query: str):
+        """Embed a query, reusing the embedding of identical (normalized) queries"""
+        key = normalize_query(query)
+        embedding = self.embedding_cache.get(key)
+        if embedding is None:
+            embedding = self.embedder.encode(key)
+            self.embedding_cache.put(key, embedding)
+        return embedding
+    
     def retrieve_relevant_articles(self, query: str, n_results: int = 5) -> List[Dict]:
         """Retrieve relevant articles using semantic search"""
-        # Create query embedding
-        query_embedding = self.embedding_model.encode(query)
+        self._check_cache_manifest()
         
-        # Calculate similarities
-        similarities = []
-        for i, embedding in enumerate(self.articles_db["embeddings"]):
-            sim = self.cosine_similarity(query_embedding, embedding)
-            similarities.append((i, sim))
-        
-        # Sort by similarity
-        similarities.sort(key=lambda x: x[1], reverse=True)
+        key = (normalize_query(query), n_results)
+        hits = self.results_cache.get(key)
+        if hits is None:
+            # Nearest articles from the vector index (ids are article positions)
+            ids, scores = self.index.search(self.embed_query(query), n_results)
+            hits = list(zip(ids.tolist(), scores.tolist()))
+            self.results_cache.put(key, hits)
         
         # Get top N articles
         top_articles = []
-        for i, sim in similarities[:n_results]:
+        for i, sim in hits:
             article = self.articles_db["articles"][i].copy()
             article["similarity"] = float(sim)
             top_articles.append(article)
         
         return top_articles
     
-    def smart_query(self, query: str, claude_client, force_claude: bool = False) -> Dict:
-        """Main query function - uses Claude for everything"""
+    def smart_query(self, query: str, llm, force_claude: bool = False, case_context: str = "") -> Dict:
+        """Main query function - uses Claude for everything (llm is an llm_router.LLMRouter)
+
+        case_context, if given, is case material (e.g. excerpts from the case
+        file) the answer should apply the rules to.
+        """
         
         # Retrieve relevant articles
         articles = self.retrieve_relevant_articles(query, n_results=5)
@@ -137,24 +192,18 @@ class SCCRagSystem:
             f"Article {a['article_number']}: {a['title']}\n{a['content']}"
             for a in articles
         ])
+        case_text = f"The case this question is about:\n{case_context}\n\n" if case_context else ""
         
-        response = claude_client.messages.create(
-            model="claude-3-haiku-20240307",
-            max_tokens=2000,
-            messages=[{
-                "role": "user",
-                "content": f"""You are an expert in SCC Arbitration Rules. Answer this question using the provided articles:
+        completion = llm.complete(f"""You are an expert in SCC Arbitration Rules. Answer this question using the provided articles:
 
 Relevant SCC Articles:
 {articles_text}
 
-Question: {query}
+{case_text}Question: {query}
 
-Provide a clear, accurate answer based on the rules:"""
-            }]
-        )
+Provide a clear, accurate answer based on the rules:""", max_tokens=2000, provider="claude")
         
-        answer = response.content[0].text
+        answer = completion.text
         
         return {
             "answer": answer,
@@ -162,5 +211,5 @@ Provide a clear, accurate answer based on the rules:"""
                 {"number": a['article_number'], "title": a['title'], "similarity": a['similarity']}
                 for a in articles
             ],
-            "model_used": "Claude API"
+            "model_used": completion.label
         }
\ No newline at end of file
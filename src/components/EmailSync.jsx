@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import axios from 'axios'
 import NewCaseModal from './NewCaseModal'
 import './EmailSync.css'
@@ -11,12 +11,19 @@ function EmailSync({ onBack, cases, onRefreshCases }) {
   const [processing, setProcessing] = useState({})
   const [showNewCaseModal, setShowNewCaseModal] = useState(false)
   const [emailForNewCase, setEmailForNewCase] = useState(null)
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+  const [syncing, setSyncing] = useState(false)
+  const loadMoreRef = useRef(null)
 
   const fetchEmails = async () => {
     setLoading(true)
     try {
       const response = await axios.get(`${API_URL}/api/emails/unread`)
       setEmails(response.data.emails || [])
+      setNextCursor(response.data.next_cursor || null)
+      // The first sync after a restart is still running; a 'reset' event reloads the list
+      setSyncing(Boolean(response.data.syncing))
     } catch (error) {
       console.error('Error fetching emails:', error)
       alert('Failed to fetch emails')
@@ -24,10 +31,60 @@ function EmailSync({ onBack, cases, onRefreshCases }) {
     setLoading(false)
   }
 
+  const fetchMoreEmails = async () => {
+    if (!nextCursor || loadingMore) return
+    setLoadingMore(true)
+    try {
+      const response = await axios.get(`${API_URL}/api/emails/unread`, {
+        params: { cursor: nextCursor }
+      })
+      const more = response.data.emails || []
+      setEmails(prev => [...prev, ...more.filter(m => !prev.some(e => e.id === m.id))])
+      setNextCursor(response.data.next_cursor || null)
+    } catch (error) {
+      console.error('Error fetching more emails:', error)
+    }
+    setLoadingMore(false)
+  }
+
   useEffect(() => {
     fetchEmails()
   }, [])
 
+  // Live updates pushed by the backend's sync worker (shared by every open tab)
+  useEffect(() => {
+    const events = new EventSource(`${API_URL}/api/emails/events`)
+    events.addEventListener('inbox', (event) => {
+      const { added = [], removed = [] } = JSON.parse(event.data)
+      setEmails(prev => {
+        const gone = new Set([...removed, ...added.map(e => e.id)])
+        return [...added, ...prev.filter(e => !gone.has(e.id))]
+          .sort((a, b) => (b.internal_date || 0) - (a.internal_date || 0))
+      })
+    })
+    events.addEventListener('reset', () => fetchEmails())
+    return () => events.close()
+  }, [])
+
+  const requestSync = async () => {
+    try {
+      await axios.post(`${API_URL}/api/emails/sync`)
+    } catch (error) {
+      console.error('Error requesting sync:', error)
+    }
+  }
+
+  // Load the next page when the end of the list scrolls into view
+  useEffect(() => {
+    const target = loadMoreRef.current
+    if (!target) return
+    const observer = new IntersectionObserver(entries => {
+      if (entries[0].isIntersecting) fetchMoreEmails()
+    })
+    observer.observe(target)
+    return () => observer.disconnect()
+  }, [nextCursor, loadingMore, emails.length])
+
   const assignEmailToCase = async (email, caseId) => {
     setProcessing({ ...processing, [email.id]: true })
     
@@ -49,6 +106,20 @@ function EmailSync({ onBack, cases, onRefreshCases }) {
     setProcessing({ ...processing, [email.id]: false })
   }
 
+  const autoRouteEmails = async () => {
+    setLoading(true)
+    try {
+      const response = await axios.post(`${API_URL}/api/emails/auto-route`)
+      const assigned = response.data.assigned || []
+      alert(`Auto-assigned ${assigned.length} email(s); ${response.data.queued} left for review`)
+      if (assigned.length) onRefreshCases()
+    } catch (error) {
+      console.error('Error auto-routing emails:', error)
+      alert('Failed to auto-route emails')
+    }
+    await fetchEmails()
+  }
+
   const handleCreateCaseForEmail = (email) => {
     setEmailForNewCase(email)
     setShowNewCaseModal(true)
@@ -79,7 +150,7 @@ function EmailSync({ onBack, cases, onRefreshCases }) {
   }
 
   const findMatchingCase = (email) => {
-    const ref = extractCaseReference(email.subject + ' ' + email.body)
+    const ref = extractCaseReference(email.subject + ' ' + email.snippet)
     if (ref) {
       return cases.find(c => c.case_reference?.toLowerCase() === ref.toLowerCase())
     }
@@ -91,25 +162,34 @@ function EmailSync({ onBack, cases, onRefreshCases }) {
       <div className="sync-header">
         <button className="back-btn" onClick={onBack}>← Back to Cases</button>
         <h1>📧 Sync Emails from Gmail</h1>
-        <button className="refresh-btn" onClick={fetchEmails} disabled={loading}>
-          🔄 Refresh
-        </button>
+        <div className="sync-header-actions">
+          <button className="refresh-btn" onClick={autoRouteEmails} disabled={loading}>
+            ⚡ Auto-route
+          </button>
+          <button className="refresh-btn" onClick={requestSync} disabled={loading}>
+            🔄 Refresh
+          </button>
+        </div>
       </div>
 
+      {syncing && !loading && (
+        <div className="loading">Syncing with Gmail...</div>
+      )}
+
       {loading ? (
         <div className="loading">Loading emails...</div>
-      ) : emails.length === 0 ? (
+      ) : emails.length === 0 && !syncing ? (
         <div className="no-emails">
           <p>✅ No unread emails found!</p>
           <button onClick={onBack}>Back to Cases</button>
         </div>
       ) : (
         <div className="emails-container">
-          <h2>Review and Assign Emails ({emails.length})</h2>
+          <h2>Review and Assign Emails ({emails.length}{nextCursor ? '+' : ''})</h2>
           
           {emails.map(email => {
             const matchedCase = findMatchingCase(email)
-            const caseRef = extractCaseReference(email.subject + ' ' + email.body)
+            const caseRef = extractCaseReference(email.subject + ' ' + email.snippet)
             
             return (
               <div key={email.id} className="email-card">
@@ -130,7 +210,7 @@ function EmailSync({ onBack, cases, onRefreshCases }) {
                 )}
 
                 <div className="email-body-preview">
-                  {email.body.substring(0, 200)}...
+                  {email.snippet}...
                 </div>
 
                 <div className="email-actions">
@@ -173,6 +253,17 @@ function EmailSync({ onBack, cases, onRefreshCases }) {
               </div>
             )
           })}
+
+          {nextCursor && (
+            <button
+              ref={loadMoreRef}
+              className="refresh-btn load-more-btn"
+              onClick={fetchMoreEmails}
+              disabled={loadingMore}
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          )}
         </div>
       )}
 
@@ -0,0 +1,37 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    """Wall-clock seconds spent in each startup step
+
+    Steps may run in background threads (e.g. connecting to Gmail), so
+    they are recorded as they finish; a failed step keeps its error.
+    """
+
+    def __init__(self):
+        self.steps = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, **details):
+        with self._lock:
+            self.steps[name] = {'seconds': round(seconds, 3), **details}
+
+    @contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.record(name, time.perf_counter() - start, error=str(e))
+            raise
+        self.record(name, time.perf_counter() - start)
+
+    def as_dict(self):
+        with self._lock:
+            return {'steps': dict(self.steps)}
+
+    def summary(self):
+        with self._lock:
+            return "  ".join(f"{name}={step['seconds']}s" for name, step in self.steps.items())
@@ -0,0 +1,96 @@
+import io
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from case_archive import ArchiveError, export_archive, import_archive, iter_archive, read_archive
+from case_generator import generate_synthetic_dataset
+from database import ArbitrationDB, CaseReferenceExists
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = ArbitrationDB(str(tmp_path / "arbitration.db"))
+    generate_synthetic_dataset(db, 3, 200, seed=1)
+    # Incompressible padding so the archive spans many 256 KB export buffers
+    with sqlite3.connect(db.db_path) as conn:
+        conn.execute("UPDATE emails SET body = body || hex(randomblob(2048))")
+    return db
+
+
+def test_export_streams_through_threadpool(db):
+    """StreamingResponse advances the export generator from threadpool threads"""
+    pytest.importorskip("fastapi")
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+    from fastapi.testclient import TestClient
+
+    app = FastAPI()
+
+    @app.get("/export")
+    def export():
+        return StreamingResponse(iter_archive(db), media_type="application/gzip")
+
+    # Concurrent downloads on one event loop share its worker threads, so
+    # each generator is resumed on whichever thread is free
+    with TestClient(app) as client, ThreadPoolExecutor(8) as pool:
+        responses = list(pool.map(lambda _: client.get("/export"), range(8)))
+
+    for response in responses:
+        assert response.status_code == 200
+        assert len(response.content) > 256 * 1024
+        records = list(read_archive(io.BytesIO(response.content)))
+        assert [kind for kind, _ in records].count("email") == 600
+
+
+def test_truncated_import_leaves_no_partial_case(db, tmp_path):
+    archive = io.BytesIO()
+    export_archive(db, archive)
+    data = archive.getvalue()
+    target = ArbitrationDB(str(tmp_path / "target.db"))
+    counts = {case["case_reference"]: len(db.get_case_emails(case["id"])) for case in db.get_all_cases()}
+
+    summary = {}
+    with pytest.raises(ArchiveError):
+        import_archive(target, io.BytesIO(data[:len(data) // 2]), chunk_size=50, summary=summary)
+
+    # Chunks were committed, but only whole cases stay
+    imported = target.get_all_cases()
+    assert 0 < len(imported) < 3
+    assert [case["id"] for case in imported] == summary["case_ids"]
+    for case in imported:
+        assert len(target.get_case_emails(case["id"])) == counts[case["case_reference"]]
+    assert summary["emails"] == sum(counts[case["case_reference"]] for case in imported)
+
+    # Importing again with skip picks up where it stopped
+    summary = import_archive(target, io.BytesIO(data), on_conflict="skip", chunk_size=50)
+    assert (summary["cases"] + summary["skipped"], summary["renamed"]) == (3, {})
+    assert sorted(len(target.get_case_emails(case["id"])) for case in target.get_all_cases()) == \
+        sorted(counts.values())
+
+
+def test_failed_merge_removes_only_its_emails(db):
+    archive = io.BytesIO()
+    export_archive(db, archive)
+    data = archive.getvalue()
+    before = {case["id"]: len(db.get_case_emails(case["id"])) for case in db.get_all_cases()}
+
+    with pytest.raises(ArchiveError):
+        import_archive(db, io.BytesIO(data[:len(data) // 2]), on_conflict="merge", chunk_size=50)
+
+    after = {case["id"]: len(db.get_case_emails(case["id"])) for case in db.get_all_cases()}
+    assert after.keys() == before.keys()
+    # A case is either fully merged again or untouched
+    assert all(after[case_id] in (count, 2 * count) for case_id, count in before.items())
+    assert after != before
+
+
+def test_fail_mode_raises_conflict(db):
+    archive = io.BytesIO()
+    export_archive(db, archive)
+    archive.seek(0)
+
+    with pytest.raises(CaseReferenceExists):
+        import_archive(db, archive, on_conflict="fail")
+    assert len(db.get_all_cases()) == 3
@@ -0,0 +1,60 @@
+import os
+import zlib
+
+import numpy as np
+import pytest
+
+from case_index import CaseIndex
+
+
+class HashingModel:
+    """Bag-of-words stand-in for the sentence transformer: texts sharing words score high"""
+
+    dim = 64
+
+    def encode(self, texts, **kwargs):
+        single = isinstance(texts, str)
+        vectors = np.zeros((1 if single else len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate([texts] if single else texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.encode()) % self.dim] += 1
+        return vectors[0] if single else vectors
+
+
+@pytest.fixture
+def index(tmp_path):
+    return CaseIndex(HashingModel(), root=str(tmp_path / "case_index"))
+
+
+def test_search_finds_the_email(index):
+    index.add_email(1, 10, "claimant@example.com", "Statement of claim", "damages for late delivery of turbines")
+    index.add_email(1, 11, "tribunal@example.com", "Procedural order", "hearing scheduled in Stockholm in May")
+
+    results = index.search(1, "hearing in Stockholm", n_results=1)
+    assert [r["email_id"] for r in results] == [11]
+    assert index.email_ids(1) == {10, 11}
+    assert index.search(2, "anything") == []
+
+
+def test_append_after_interrupted_write_stays_aligned(index, tmp_path):
+    index.add_email(1, 10, "a@example.com", "Claim", "damages for late delivery of turbines")
+    case_dir = index._case_dir(1)
+
+    # A crash between the two appends: vectors written, chunk lines not
+    with open(os.path.join(case_dir, "vectors.f32"), "ab") as f:
+        f.write(np.ones((3, HashingModel.dim), dtype=np.float32).tobytes())
+    # ... or a chunk line cut short
+    with open(os.path.join(case_dir, "chunks.jsonl"), "a") as f:
+        f.write('{"email_id": 99, "te')
+
+    index.add_email(1, 11, "b@example.com", "Order", "hearing scheduled in Stockholm in May")
+
+    assert os.path.getsize(os.path.join(case_dir, "vectors.f32")) == 2 * 4 * HashingModel.dim
+    # Same results as an index that never crashed
+    clean = CaseIndex(HashingModel(), root=str(tmp_path / "clean"))
+    clean.add_email(1, 10, "a@example.com", "Claim", "damages for late delivery of turbines")
+    clean.add_email(1, 11, "b@example.com", "Order", "hearing scheduled in Stockholm in May")
+    query = "hearing scheduled in Stockholm"
+    assert [(r["email_id"], round(r["similarity"], 5)) for r in index.search(1, query, n_results=2)] == \
+        [(r["email_id"], round(r["similarity"], 5)) for r in clean.search(1, query, n_results=2)]
+    assert index.email_ids(1) == {10, 11}
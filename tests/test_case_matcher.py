@@ -0,0 +1,58 @@
+import pytest
+
+from case_matcher import ReferenceExtractor, extract_case_references, normalize_reference, strip_quoted_reply
+
+
+@pytest.fixture
+def extractor():
+    return ReferenceExtractor()
+
+
+@pytest.mark.parametrize("text, kind, key", [
+    ("Re: AB-001/26 - Document submission", "internal", "AB-001/26"),
+    ("Urgent: Case #12345 needs review", "case_number", "#12345"),
+    ("matter: 54321 - response due", "case_number", "#54321"),
+    ("ICC/2024/001 - Hearing scheduled", "institution_slash", "ICC/2024/001"),
+    ("SCC-2025-001: Request for Arbitration", "scc", "SCC-2025-001"),
+    ("scc–2025–001 with en dashes", "scc", "SCC-2025-001"),
+    ("LCIA-2023-0042 award", "institution_year", "LCIA-2023-0042"),
+    ("see #4567", "hash", "#4567"),
+])
+def test_finds_reference(extractor, text, kind, key):
+    references = extractor.extract(text)
+    assert [(r.kind, r.key) for r in references] == [(kind, key)]
+    assert text[references[0].start:references[0].end] == references[0].text
+
+
+@pytest.mark.parametrize("text", [
+    # Lower-case prose that only looks like a reference when case is ignored
+    "costs for the pre-2020/21 period were agreed",
+    "the in-2024-123 budget line",
+    "see the ab-1234-001 memo",
+    "icc/2024/001",
+    "Ab-001/26",
+    # Mid-word and out-of-range numbers
+    "XAB-001/26x",
+    "Case 12",
+    "invoice total 2025-001",
+])
+def test_ignores_non_references(extractor, text):
+    assert extractor.extract(text) == []
+
+
+def test_weak_formats_are_marked(extractor):
+    weak = {r.kind: r.weak for r in extractor.extract("Case 12345 and SCC-2025-001")}
+    assert weak == {"case_number": True, "scc": False}
+
+
+def test_quoted_history_is_skipped(extractor):
+    body = "Please see attached.\n\nOn Mon, 3 Mar 2025, Counsel wrote:\n> Re SCC-2024-009\n"
+    assert strip_quoted_reply(body).strip() == "Please see attached."
+    references = extractor.extract_email("Re: SCC-2025-001", body)
+    assert [(r.field, r.key) for r in references] == [("subject", "SCC-2025-001")]
+
+
+def test_keys_are_canonical():
+    assert normalize_reference(" ab‑001/26 ") == "AB-001/26"
+    assert normalize_reference("12345") == "#12345"
+    assert extract_case_references("AB-001/26, then AB-001/26 again and Case 777") == ["AB-001/26", "#777"]
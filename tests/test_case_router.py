@@ -0,0 +1,141 @@
+import pytest
+
+from case_router import CaseRouter
+from database import ArbitrationDB
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = ArbitrationDB(str(tmp_path / "router.db"))
+    db.create_case("Nordic Turbines v. Baltic Power", "SCC-2025-001")
+    db.create_case("Acme v. Globex", "AB-001/26")
+    db.create_case("Old numbered matter", "12345")
+    return db
+
+
+@pytest.fixture
+def router(db):
+    return CaseRouter(db, reader=None)
+
+
+def email(subject, body="", msg_id="m1", snippet=""):
+    return {'id': msg_id, 'subject': subject, 'body': body, 'snippet': snippet}
+
+
+def decide(router, *emails):
+    return router.route(list(emails))
+
+
+def test_structured_reference_is_matched(router, db):
+    [decision] = decide(router, email("SCC-2025-001: Request for Arbitration"))
+    assert decision['reason'] == 'matched'
+    assert decision['case_id'] == db.find_case_by_reference("SCC-2025-001")['id']
+    assert decision['references'] == ['SCC-2025-001']
+
+
+def test_reference_in_body_with_other_spelling(router):
+    [decision] = decide(router, email("Documents", "Please file these under scc–2025–001."))
+    assert decision['reason'] == 'matched'
+
+
+def test_no_reference(router):
+    [decision] = decide(router, email("Lunch on Friday?", "See you at noon"))
+    assert (decision['reason'], decision['case_id'], decision['references']) == ('no_reference', None, [])
+
+
+def test_unknown_reference(router):
+    [decision] = decide(router, email("SCC-2024-999 hearing"))
+    assert (decision['reason'], decision['candidates']) == ('unknown_reference', [])
+
+
+def test_two_cases_are_ambiguous(router):
+    [decision] = decide(router, email("SCC-2025-001 and AB-001/26 consolidation"))
+    assert decision['reason'] == 'ambiguous'
+    assert decision['case_id'] is None and len(decision['candidates']) == 2
+
+
+def test_weak_reference_alone_is_held(router, db):
+    [decision] = decide(router, email("Case #12345 needs review"))
+    assert decision['reason'] == 'weak_reference'
+    assert decision['candidates'] == [db.find_case_by_reference("12345")['id']]
+
+
+def test_weak_reference_backs_up_a_strong_one(router):
+    [decision] = decide(router, email("AB-001/26 update", "Re case #99999, which is not ours"))
+    assert decision['reason'] == 'matched'
+
+
+def test_quoted_history_is_ignored(router):
+    body = "Thanks, noted.\n\nOn Mon, 3 Mar 2025, Counsel wrote:\n> Regarding SCC-2025-001"
+    [decision] = decide(router, email("Re: your note", body))
+    assert decision['reason'] == 'no_reference'
+
+
+def test_snippet_is_used_without_body(router):
+    [decision] = decide(router, email("Filing", snippet="Attached for SCC-2025-001"))
+    assert decision['reason'] == 'matched'
+
+
+def test_new_cases_are_picked_up(router, db):
+    assert decide(router, email("SCC-2025-002 request"))[0]['reason'] == 'unknown_reference'
+    db.create_case("Second SCC case", "SCC-2025-002")
+    assert decide(router, email("SCC-2025-002 request"))[0]['reason'] == 'matched'
+
+
+def test_route_inbox_assigns_matches_and_queues_the_rest(db, tmp_path):
+    pytest.importorskip("googleapiclient")
+    from tests.test_email_reader import FlakyGmail, make_reader
+
+    service = FlakyGmail()
+    matched = service.add_message("SCC-2025-001: Statement of Defence", "counsel@example.com", "Please find attached.")
+    held = service.add_message("Hearing logistics", "clerk@example.com", "Room booked for case #12345.")
+    reader = make_reader(service, tmp_path)
+    emails, _ = reader.list_unread_page(page_size=10)
+    db.upsert_gmail_messages(emails)
+
+    result = CaseRouter(db, reader).route_inbox()
+
+    [assigned] = result['assigned']
+    assert assigned['gmail_id'] == matched and result['queued'] == 1
+    [stored] = db.get_case_emails(assigned['case_id'])
+    assert stored['body'] == "Please find attached."
+    assert "UNREAD" not in service.messages[matched]["labelIds"]
+    assert db.get_gmail_message_ids() == {held}
+    assert [(q['id'], q['reason']) for q in db.get_review_queue()] == [(held, 'weak_reference')]
+
+
+def test_full_body_is_used_when_cached(db, tmp_path):
+    pytest.importorskip("googleapiclient")
+    from tests.test_email_reader import FlakyGmail, make_reader
+
+    service = FlakyGmail()
+    filler = "Dear Members of the Tribunal, please find our submissions attached. " * 4
+    msg_id = service.add_message("Submissions", "counsel@example.com", filler + "Our reference: SCC-2025-001.")
+    reader = make_reader(service, tmp_path)
+    [stored], _ = reader.list_unread_page(page_size=10)
+    router = CaseRouter(db, reader)
+
+    # The reference is past the snippet
+    assert decide(router, stored)[0]['reason'] == 'no_reference'
+    reader.get_email_details(msg_id)
+    assert decide(router, stored)[0]['reason'] == 'matched'
+
+
+def test_snippet_match_is_checked_against_the_body(db, tmp_path):
+    pytest.importorskip("googleapiclient")
+    from tests.test_email_reader import FlakyGmail, make_reader
+
+    service = FlakyGmail()
+    filler = "The parties have agreed the timetable for the next phase of the proceedings. " * 3
+    msg_id = service.add_message("SCC-2025-001 timetable", "counsel@example.com",
+                                 filler + "The same applies in AB-001/26.")
+    reader = make_reader(service, tmp_path)
+    emails, _ = reader.list_unread_page(page_size=10)
+    db.upsert_gmail_messages(emails)
+
+    result = CaseRouter(db, reader).route_inbox()
+
+    assert result == {'assigned': [], 'queued': 1}
+    [queued] = db.get_review_queue()
+    assert (queued['id'], queued['reason'], len(queued['candidates'])) == (msg_id, 'ambiguous', 2)
+    assert "UNREAD" in service.messages[msg_id]["labelIds"]
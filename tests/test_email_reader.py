@@ -0,0 +1,151 @@
+import pytest
+
+pytest.importorskip("googleapiclient")
+
+import email_reader
+from attachment_cache import AttachmentTextCache
+from benchmarks.fake_gmail import FakeGmailService, _http_error
+from email_reader import GmailReader, InboxSync
+
+
+class FlakyGmail(FakeGmailService):
+    """FakeGmailService without latency whose first ``failures`` requests are rate limited (429)"""
+
+    def __init__(self, failures=0):
+        super().__init__()
+        self.failures = failures
+
+    def _round_trip(self, items=1):
+        with self._lock:
+            self.round_trips += 1
+            self.requests += items
+
+    def _maybe_fail(self):
+        with self._lock:
+            if self.failures:
+                self.failures -= 1
+                raise _http_error(429, "rateLimitExceeded")
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff delays requested by GmailReader, without sleeping"""
+    delays = []
+    monkeypatch.setattr(email_reader.time, "sleep", delays.append)
+    return delays
+
+
+def make_reader(service, tmp_path):
+    reader = GmailReader(text_cache=AttachmentTextCache(str(tmp_path / "attachment_text")))
+    reader.service = service
+    return reader
+
+
+def test_batch_fetch_retries_rate_limited_items(tmp_path, sleeps):
+    service = FlakyGmail(failures=30)
+    ids = service.populate(120, attachment_every=0)
+    reader = make_reader(service, tmp_path)
+
+    messages = reader.get_messages_batch(ids, format="metadata", base_delay=0.5)
+
+    assert set(messages) == set(ids)
+    # Three batches of up to 50, then one batch with the 30 rate-limited items
+    assert service.round_trips == 4
+    assert len(sleeps) == 1 and 0.25 <= sleeps[0] <= 0.75
+
+
+def test_batch_fetch_retries_a_rejected_batch(tmp_path, sleeps):
+    service = FlakyGmail()
+    ids = service.populate(10, attachment_every=0)
+    reader = make_reader(service, tmp_path)
+
+    new_batch = service.new_batch_http_request
+    rejected = []
+
+    def reject_first_batch(callback=None):
+        batch = new_batch(callback)
+        if not rejected:
+            rejected.append(batch)
+
+            def execute():
+                raise _http_error(429, "rateLimitExceeded")
+            batch.execute = execute
+        return batch
+
+    service.new_batch_http_request = reject_first_batch
+    assert set(reader.get_messages_batch(ids)) == set(ids)
+    assert len(sleeps) == 1
+
+
+def test_batch_fetch_backs_off_exponentially_then_gives_up(tmp_path, sleeps):
+    service = FlakyGmail(failures=10 ** 6)
+    ids = service.populate(5, attachment_every=0)
+    reader = make_reader(service, tmp_path)
+
+    assert reader.get_messages_batch(ids, max_retries=3, base_delay=1.0) == {}
+    assert service.round_trips == 4
+    # Jittered: base_delay * 2**attempt * [0.5, 1.5)
+    assert len(sleeps) == 3
+    for attempt, delay in enumerate(sleeps):
+        assert 0.5 * 2 ** attempt <= delay < 1.5 * 2 ** attempt
+
+
+def test_batch_fetch_leaves_out_failed_items(tmp_path, sleeps):
+    service = FlakyGmail()
+    ids = service.populate(3, attachment_every=0)
+    service.delete_message(ids[1])
+    reader = make_reader(service, tmp_path)
+
+    messages = reader.get_messages_batch(ids)
+
+    # A 404 is not retried; the rest of the batch still arrives
+    assert set(messages) == {ids[0], ids[2]}
+    assert sleeps == []
+    assert service.round_trips == 1
+
+
+def test_full_messages_are_cached(tmp_path, sleeps):
+    service = FlakyGmail()
+    ids = service.populate(3, attachment_every=0)
+    reader = make_reader(service, tmp_path)
+
+    reader.get_messages_batch(ids)
+    assert set(reader.get_messages_batch(ids)) == set(ids)
+    assert service.round_trips == 1
+
+
+def test_unread_pages_come_from_list_plus_one_batch(tmp_path, sleeps):
+    service = FlakyGmail()
+    ids = service.populate(70, attachment_every=0)
+    reader = make_reader(service, tmp_path)
+
+    emails, next_page = reader.list_unread_page(page_size=50)
+    assert len(emails) == 50 and next_page
+    assert all(e["subject"] != "No Subject" and e["body"] == "" for e in emails)
+    # One list call and one metadata batch
+    assert service.round_trips == 2
+
+    assert {e["id"] for e in reader.iter_unread_emails(page_size=50)} == set(ids)
+
+
+@pytest.mark.parametrize("cursor", ["", "abc:123", "1700000000000", "1700000000000:", "12.5:abc"])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        InboxSync.parse_cursor(cursor)
+
+
+def test_cursor_round_trips():
+    assert InboxSync.parse_cursor("1700000000000:18c2f0a1") == (1700000000000, "18c2f0a1")
+
+
+def test_failed_connect_reports_when_to_retry(tmp_path):
+    reader = GmailReader(text_cache=AttachmentTextCache(str(tmp_path / "attachment_text")),
+                         token_path=str(tmp_path / "missing-token.json"), interactive=False, reconnect_delay=30)
+    assert reader.retry_in == 0
+
+    with pytest.raises(email_reader.GmailUnavailable, match="authorization required"):
+        reader.connect()
+    assert 29 < reader.retry_in <= 30
+    # Within the delay the next attempt fails straight away
+    with pytest.raises(email_reader.GmailUnavailable, match="retrying later"):
+        reader.connect()
@@ -0,0 +1,63 @@
+import pytest
+
+pytest.importorskip("googleapiclient")
+
+from database import ArbitrationDB
+from email_reader import InboxSync
+from inbox_events import InboxBroadcaster, InboxSyncWorker
+
+
+class OtherProcessLeads:
+    """LeaderLock held by another process"""
+
+    held = False
+
+    def acquire(self):
+        return False
+
+
+class CountingSync:
+    HISTORY_KEY = InboxSync.HISTORY_KEY
+
+    def __init__(self):
+        self.syncs = 0
+
+    def sync(self):
+        self.syncs += 1
+        return {'mode': 'full', 'added': 0, 'removed': 0}
+
+
+def make_worker(tmp_path, leader=None):
+    db = ArbitrationDB(str(tmp_path / "inbox.db"))
+    broadcaster = InboxBroadcaster()
+    return InboxSyncWorker(CountingSync(), db, broadcaster, leader=leader), db, broadcaster
+
+
+def event_types(broadcaster):
+    return [event['type'] for event in broadcaster._missed_since(0)]
+
+
+def test_follower_sees_the_leaders_first_sync(tmp_path):
+    worker, db, broadcaster = make_worker(tmp_path, leader=OtherProcessLeads())
+
+    assert not worker._tick(None)
+    assert not worker.synced and event_types(broadcaster) == []
+
+    db.set_sync_state(InboxSync.HISTORY_KEY, '123')
+    worker._tick(None)
+
+    assert worker.synced and worker.inbox_sync.syncs == 0
+    # Clients that loaded the empty store reload
+    assert event_types(broadcaster) == ['reset']
+    worker._tick(None)
+    assert event_types(broadcaster) == ['reset']
+
+
+def test_leader_syncs_and_announces_it_once(tmp_path):
+    worker, _, broadcaster = make_worker(tmp_path)
+
+    assert worker._tick(None) and worker.synced
+    worker.sync_once()
+
+    assert worker.inbox_sync.syncs == 2
+    assert event_types(broadcaster) == ['reset']
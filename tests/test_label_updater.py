@@ -0,0 +1,128 @@
+import pytest
+
+pytest.importorskip("googleapiclient")
+
+import label_updater
+from database import ArbitrationDB
+from label_updater import LabelUpdater, coalesce
+from tests.test_email_reader import FlakyGmail, make_reader
+
+
+def op(msg_id, add=(), remove=()):
+    return {'msg_id': msg_id, 'add_labels': list(add), 'remove_labels': list(remove)}
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff delays requested by LabelUpdater, without sleeping"""
+    delays = []
+    monkeypatch.setattr(label_updater.time, "sleep", delays.append)
+    return delays
+
+
+def make_updater(service, tmp_path, **kwargs):
+    db = ArbitrationDB(str(tmp_path / "labels.db"))
+    return LabelUpdater(make_reader(service, tmp_path), db, **kwargs), db
+
+
+def unread(service):
+    return {msg_id for msg_id, m in service.messages.items() if "UNREAD" in m["labelIds"]}
+
+
+def test_coalesce_groups_identical_changes():
+    groups = coalesce([op("a", remove=["UNREAD"]), op("b", remove=["UNREAD"]), op("c", add=["STARRED"])])
+    assert dict(groups) == {((), ("UNREAD",)): ["a", "b"], (("STARRED",), ()): ["c"]}
+
+
+def test_coalesce_later_ops_win():
+    groups = coalesce([
+        op("a", add=["UNREAD"]),
+        op("a", remove=["UNREAD"]),
+        op("b", remove=["STARRED"]),
+        op("b", add=["STARRED", "IMPORTANT"]),
+    ])
+    assert dict(groups) == {
+        ((), ("UNREAD",)): ["a"],
+        (("IMPORTANT", "STARRED"), ()): ["b"],
+    }
+
+
+def test_coalesce_merges_labels_per_message():
+    groups = coalesce([op("a", remove=["UNREAD"]), op("a", add=["STARRED"])])
+    assert dict(groups) == {(("STARRED",), ("UNREAD",)): ["a"]}
+
+
+def test_flush_sends_one_batch_modify_per_change(tmp_path, sleeps):
+    service = FlakyGmail()
+    ids = service.populate(30, attachment_every=0)
+    updater, db = make_updater(service, tmp_path)
+
+    updater.mark_read(ids[:20])
+    updater.mark_read(ids[10:])
+    assert updater.pending() == 40
+
+    result = updater.flush()
+
+    assert result == {'calls': 1, 'updated': 30, 'pending': 0}
+    assert unread(service) == set()
+    assert db.count_label_ops() == 0
+
+
+def test_flush_splits_at_batch_modify_limit(tmp_path, sleeps):
+    service = FlakyGmail()
+    ids = service.populate(label_updater.MAX_BATCH_IDS + 5, attachment_every=0)
+    updater, _ = make_updater(service, tmp_path)
+
+    updater.mark_read(ids)
+    result = updater.flush()
+
+    # The fake rejects more than 1000 IDs per batchModify, as Gmail does
+    assert result == {'calls': 2, 'updated': len(ids), 'pending': 0}
+    assert unread(service) == set()
+
+
+def test_rejected_batch_falls_back_to_single_updates(tmp_path, sleeps):
+    service = FlakyGmail()
+    ids = service.populate(8, attachment_every=0)
+    service.delete_message(ids[3])
+    updater, db = make_updater(service, tmp_path)
+
+    updater.mark_read(ids)
+    service.round_trips = 0
+    result = updater.flush()
+
+    # batchModify fails with 404 for the deleted message; the rest go out in
+    # one batch of messages.modify and the deleted one counts as done
+    assert result == {'calls': 2, 'updated': 8, 'pending': 0}
+    assert service.round_trips == 2
+    assert unread(service) == set()
+    assert db.count_label_ops() == 0
+    assert sleeps == []
+
+
+def test_rate_limited_batch_is_retried_with_backoff(tmp_path, sleeps):
+    service = FlakyGmail(failures=2)
+    ids = service.populate(5, attachment_every=0)
+    updater, _ = make_updater(service, tmp_path, base_delay=1.0)
+
+    updater.mark_read(ids)
+    result = updater.flush()
+
+    assert result == {'calls': 3, 'updated': 5, 'pending': 0}
+    assert len(sleeps) == 2
+    for attempt, delay in enumerate(sleeps):
+        assert 0.5 * 2 ** attempt <= delay < 1.5 * 2 ** attempt
+
+
+def test_failed_ops_are_kept_then_dropped(tmp_path, sleeps):
+    service = FlakyGmail(failures=10 ** 6)
+    ids = service.populate(3, attachment_every=0)
+    updater, db = make_updater(service, tmp_path, max_attempts=2, max_retries=1)
+
+    updater.mark_read(ids)
+    assert updater.flush() == {'calls': 2, 'updated': 0, 'pending': 3}
+    assert [op['attempts'] for op in db.get_label_ops()] == [1, 1, 1]
+
+    assert updater.flush()['pending'] == 0
+    assert db.count_label_ops() == 0
+    assert unread(service) == set(ids)
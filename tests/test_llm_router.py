@@ -0,0 +1,136 @@
+import time
+
+import pytest
+
+import llm_router
+from benchmarks.fake_llm import FakeAPIError, FakeProvider
+from llm_router import LLMRouter, LLMUnavailable, Provider
+
+
+class ScriptedProvider(Provider):
+    """Provider that raises the queued errors in turn, then answers"""
+
+    def __init__(self, name, errors=(), **limits):
+        super().__init__(name, name, **limits)
+        self.errors = list(errors)
+        self.received = 0
+
+    def complete(self, prompt, max_tokens, timeout):
+        self.received += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return f"{self.name}: {prompt}"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff delays requested by the router, without sleeping"""
+    delays = []
+    monkeypatch.setattr(llm_router.time, "sleep", delays.append)
+    return delays
+
+
+def test_transient_errors_are_retried(sleeps):
+    claude = ScriptedProvider("claude", [FakeAPIError(529, "overloaded_error"), ConnectionError("reset")])
+    router = LLMRouter([claude], max_retries=2, backoff=0.5)
+
+    completion = router.complete("hi")
+
+    assert (completion.text, completion.provider, completion.attempts) == ("claude: hi", "claude", 3)
+    assert claude.stats()["retries"] == 2 and claude.stats()["failures"] == 2
+    # Full jitter: uniform(0, backoff * 2**attempt)
+    assert 0 <= sleeps[0] <= 0.5 and 0 <= sleeps[1] <= 1.0
+
+
+def test_retry_after_header_sets_the_delay(sleeps):
+    claude = ScriptedProvider("claude", [FakeAPIError(429, "rate_limit_error", retry_after=3)])
+    router = LLMRouter([claude])
+
+    assert router.complete("hi").attempts == 2
+    assert sleeps == [3.0]
+
+
+def test_client_errors_are_not_retried(sleeps):
+    claude = ScriptedProvider("claude", [FakeAPIError(400, "invalid_request_error")])
+    router = LLMRouter([claude], max_retries=2)
+
+    with pytest.raises(LLMUnavailable) as raised:
+        router.complete("hi")
+
+    assert claude.received == 1 and sleeps == []
+    assert [name for name, _ in raised.value.errors] == ["claude"]
+
+
+def test_falls_back_to_the_next_provider(sleeps):
+    claude = ScriptedProvider("claude", [FakeAPIError(529, "overloaded_error")] * 3)
+    gemini = ScriptedProvider("gemini")
+    router = LLMRouter([claude, gemini], max_retries=2)
+
+    completion = router.complete("hi")
+
+    assert completion.provider == "gemini"
+    assert claude.received == 3
+    assert gemini.stats()["fallbacks"] == 1
+
+
+def test_preferred_provider_goes_first(sleeps):
+    claude = ScriptedProvider("claude")
+    gemini = ScriptedProvider("gemini")
+    router = LLMRouter([claude, gemini])
+
+    assert router.complete("hi", provider="gemini").provider == "gemini"
+    assert claude.received == 0
+    assert router.complete("hi", provider="unknown").provider == "claude"
+
+
+def test_no_fallback_raises_with_retry_hint(sleeps):
+    claude = ScriptedProvider("claude", [FakeAPIError(429, "rate_limit_error", retry_after=30)])
+    gemini = ScriptedProvider("gemini")
+    router = LLMRouter([claude, gemini], timeout=5)
+
+    # The server's Retry-After is past the deadline, so the chain gives up at once
+    with pytest.raises(LLMUnavailable) as raised:
+        router.complete("hi", fallback=False)
+
+    assert raised.value.retry_after == 30
+    assert gemini.received == 0 and sleeps == []
+
+
+def test_slow_call_is_hedged_to_the_next_provider():
+    claude = FakeProvider("claude", latency=2.0)
+    gemini = FakeProvider("gemini", latency=0.05)
+    router = LLMRouter([claude, gemini], hedge_after=0.1, max_hedge_ratio=1.0)
+
+    start = time.monotonic()
+    completion = router.complete("hi")
+
+    assert completion.provider == "gemini"
+    assert time.monotonic() - start < 1.0
+    assert gemini.stats()["hedges"] == 1 and router.stats()["hedges"] == 1
+
+
+def test_hedges_stay_within_ratio():
+    claude = FakeProvider("claude", latency=0.15)
+    gemini = FakeProvider("gemini", latency=0.15)
+    router = LLMRouter([claude, gemini], hedge_after=0.02, max_hedge_ratio=0.5)
+
+    for _ in range(4):
+        router.complete("hi")
+
+    # Every call runs over the budget, but only every other one may hedge
+    assert router.stats()["requests"] == 4
+    assert router.stats()["hedges"] == 2
+    assert gemini.received == 2
+
+
+def test_deadline_raises_unavailable():
+    claude = FakeProvider("claude", latency=5.0)
+    router = LLMRouter([claude], timeout=0.3)
+
+    start = time.monotonic()
+    with pytest.raises(LLMUnavailable) as raised:
+        router.complete("hi")
+
+    assert time.monotonic() - start < 1.0
+    assert raised.value.retry_after == 5
+    assert isinstance(raised.value.errors[0][1], TimeoutError)
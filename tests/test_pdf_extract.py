@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from pdf_extract import PDFExtractionError, get_extractor
+
+pytest.importorskip("pypdf")
+
+
+def make_pdf(text):
+    """A one-page PDF showing text in Helvetica"""
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return pdf
+
+
+def test_extract_text():
+    assert get_extractor().extract_text(make_pdf("Notice of arbitration")) == \
+        "--- Page 1 ---\nNotice of arbitration"
+
+
+def test_malformed_pdf_raises():
+    with pytest.raises(PDFExtractionError):
+        get_extractor().extract_text(b"%PDF-1.4\nnot really a pdf")
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_extract_in_forked_child():
+    """A child forked after the parent extracted (a gunicorn worker under preload_app) extracts too"""
+    get_extractor().extract_text(make_pdf("Before the fork"))
+
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            result = get_extractor().extract_text(make_pdf("After the fork"))
+        except BaseException as e:
+            result = f"{type(e).__name__}: {e}"
+        os.write(write_end, result.encode())
+        os._exit(0)
+
+    os.close(write_end)
+    with os.fdopen(read_end, "rb") as f:
+        result = f.read().decode()
+    os.waitpid(pid, 0)
+    assert result == "--- Page 1 ---\nAfter the fork"
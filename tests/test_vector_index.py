@@ -0,0 +1,165 @@
+import tempfile
+
+import numpy as np
+import pytest
+
+import vector_index
+from vector_index import ExactIndex, build_index, load_index, load_or_build_index, normalize
+
+DIM = 32
+
+
+@pytest.fixture(scope="module")
+def data():
+    """Clustered unit vectors, like embeddings of texts on a few topics, plus held-out queries"""
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(20, DIM))
+    vectors = centers[rng.integers(20, size=3000)] + 0.5 * rng.normal(size=(3000, DIM))
+    queries = centers[rng.integers(20, size=50)] + 0.5 * rng.normal(size=(50, DIM))
+    return normalize(vectors), normalize(queries)
+
+
+def truth(vectors, queries, k):
+    return [set(np.argsort(-(vectors @ q))[:k]) for q in queries]
+
+
+def recall(index, queries, expected, k, **search):
+    found = [set(index.search(q, k, **search)[0]) for q in queries]
+    return np.mean([len(f & e) / k for f, e in zip(found, expected)])
+
+
+def test_exact_index_is_exact(data):
+    vectors, queries = data
+    index = build_index("exact", vectors)
+
+    ids, scores = index.search(queries[0], k=5)
+    expected = np.argsort(-(vectors @ queries[0]))[:5]
+    assert list(ids) == list(expected)
+    assert np.allclose(scores, vectors[expected] @ queries[0], atol=1e-5)
+    assert recall(index, queries, truth(vectors, queries, 10), 10) == 1.0
+
+
+def test_ivf_recall(data):
+    vectors, queries = data
+    expected = truth(vectors, queries, 10)
+    ivf = build_index("ivf", vectors, nlist=16, nprobe=4, train_size=1000)
+
+    assert ivf.trained
+    assert recall(ivf, queries, expected, 10) >= 0.9
+    # Probing every list is an exact search
+    assert recall(ivf, queries, expected, 10, nprobe=16) == 1.0
+
+
+def test_ivf_is_exact_until_trained(data):
+    vectors, queries = data
+    ivf = build_index("ivf", vectors[:500], nlist=16, train_size=1000)
+
+    assert not ivf.trained
+    assert recall(ivf, queries, truth(vectors[:500], queries, 10), 10) == 1.0
+
+
+@pytest.mark.parametrize("kind", ["exact", "ivf"])
+def test_quantized_index_rescores_with_originals(data, kind):
+    vectors, queries = data
+    params = {"nlist": 16, "nprobe": 16, "train_size": 1000} if kind == "ivf" else {}
+    float32 = build_index(kind, vectors, **params)
+    int8 = build_index(kind, vectors, storage="int8", **params)
+
+    assert recall(int8, queries, truth(vectors, queries, 10), 10) >= 0.98
+    ids, scores = int8.search(queries[0], k=5)
+    # Returned scores come from the float32 originals, not the int8 codes
+    assert np.allclose(scores, vectors[ids] @ queries[0], atol=1e-5)
+    assert int8.nbytes < float32.nbytes / 3
+    assert int8.mapped_nbytes >= vectors.nbytes and float32.mapped_nbytes == 0
+
+
+def test_quantized_index_without_rescoring(data):
+    vectors, queries = data
+    index = build_index("exact", vectors, storage="int8", rescore=0)
+
+    assert index.mapped_nbytes == 0
+    assert recall(index, queries, truth(vectors, queries, 10), 10) >= 0.9
+
+
+@pytest.mark.parametrize("kind, params", [
+    ("exact", {}),
+    ("exact", {"storage": "int8"}),
+    ("ivf", {"nlist": 16, "nprobe": 4, "train_size": 1000}),
+    ("ivf", {"nlist": 16, "nprobe": 4, "train_size": 1000, "storage": "float16"}),
+])
+@pytest.mark.parametrize("mmap", [False, True])
+def test_save_and_load(data, tmp_path, kind, params, mmap):
+    vectors, queries = data
+    index = build_index(kind, vectors, **params)
+    index.save(str(tmp_path / "index"))
+
+    loaded = load_index(str(tmp_path / "index"), mmap=mmap)
+
+    assert (loaded.kind, len(loaded), loaded.params(), loaded.version) == \
+        (index.kind, len(index), index.params(), index.version)
+    for query in queries[:10]:
+        assert list(loaded.search(query, k=5)[0]) == list(index.search(query, k=5)[0])
+
+    # A loaded index stays writable
+    loaded.add([10 ** 6], queries[:1])
+    loaded.remove([0])
+    assert loaded.search(queries[0], k=1)[0][0] == 10 ** 6
+    assert 0 not in set(loaded.search(vectors[0], k=5)[0])
+
+
+def test_load_or_build_reuses_matching_index(data, tmp_path):
+    vectors, _ = data
+    path = str(tmp_path / "index")
+    built = load_or_build_index(path, "exact", vectors, storage="int8")
+    reused = load_or_build_index(path, "exact", vectors, storage="int8")
+
+    assert built.nbytes > reused.nbytes  # codes memory-mapped from the saved file
+    rebuilt = load_or_build_index(path, "exact", vectors[:100], storage="int8")
+    assert len(rebuilt) == 100
+
+
+def test_add_replaces_and_dedupes(data):
+    vectors, _ = data
+    index = ExactIndex(DIM)
+    index.add([1, 2, 1], vectors[:3])
+    index.add([2], vectors[3:4])
+
+    assert len(index) == 2
+    assert index.search(vectors[2], k=1)[0][0] == 1
+    assert index.search(vectors[3], k=1)[0][0] == 2
+    assert index.search(vectors[0], k=2)[1][0] < 0.999
+
+
+@pytest.fixture
+def spill_dirs(monkeypatch):
+    """Directories the rescoring vectors are spilled to"""
+    dirs = []
+    temporary_file = tempfile.TemporaryFile
+
+    def recording(*args, dir=None, **kwargs):
+        dirs.append(dir)
+        return temporary_file(*args, dir=dir, **kwargs)
+    monkeypatch.setattr(vector_index.tempfile, "TemporaryFile", recording)
+    return dirs
+
+
+def test_rescoring_vectors_spill_next_to_the_index(data, tmp_path, spill_dirs):
+    vectors, queries = data
+    path = str(tmp_path / "articles_index")
+
+    built = load_or_build_index(path, "ivf", vectors, storage="int8", nlist=16, train_size=1000)
+    assert spill_dirs and set(spill_dirs) == {str(tmp_path)}
+    assert built.mapped_nbytes >= vectors.nbytes
+
+    spill_dirs.clear()
+    loaded = load_or_build_index(path, "ivf", vectors, storage="int8", nlist=16, train_size=1000)
+    assert spill_dirs == []
+    # Growing past the saved rows copies them to a new spill file, also next to the index
+    loaded.add(np.arange(10 ** 6, 10 ** 6 + 500), vectors[:500])
+    assert spill_dirs and set(spill_dirs) == {str(tmp_path)}
+
+    other = tmp_path / "spill"
+    other.mkdir()
+    spill_dirs.clear()
+    build_index("exact", vectors, storage="int8", spill_dir=str(other))
+    assert set(spill_dirs) == {str(other)}
@@ -0,0 +1,668 @@
+import os
+import json
+import tempfile
+import numpy as np
+from typing import Tuple
+
+
+STORAGE_TYPES = ("float32", "float16", "int8")
+
+
+def normalize(vectors):
+    """Return float32 unit vectors (rows) so cosine similarity is a dot product"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        return vectors / max(float(np.linalg.norm(vectors)), 1e-12)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def quantize(vectors, storage):
+    """Encode float32 vectors for storage
+
+    Returns:
+        (codes, scales): scales is a per-vector float32 array for int8
+        (value = code * scale) and None otherwise
+    """
+    if storage == "float32":
+        return np.asarray(vectors, dtype=np.float32), None
+    if storage == "float16":
+        return np.asarray(vectors, dtype=np.float16), None
+    if storage == "int8":
+        scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+        codes = np.round(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"Unknown vector storage type: {storage}")
+
+
+def _top_k(scores, k):
+    """Indices of the k highest scores, best first"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def _dedupe(ids, vectors):
+    """Drop all but the last row of ids repeated within one add (last write wins)"""
+    unique, last_reversed = np.unique(ids[::-1], return_index=True)
+    if len(unique) == len(ids):
+        return ids, vectors
+    keep = np.sort(len(ids) - 1 - last_reversed)
+    return ids[keep], vectors[keep]
+
+
+def _spilled(shape, dtype=np.float32, directory=None):
+    """Writable zeroed array backed by an unlinked temporary file instead of process memory
+
+    The file goes in directory, or the system temporary directory if None.
+    """
+    if not np.prod(shape):
+        return np.empty(shape, dtype=dtype)
+    with tempfile.TemporaryFile(dir=directory) as f:
+        # The map keeps its own handle, so the file lives as long as the array
+        return np.memmap(f, dtype=dtype, mode="w+", shape=shape)
+
+
+def _resident_nbytes(array):
+    """Bytes held in process memory (memory-mapped arrays live in the page cache)"""
+    if array is None or isinstance(array, np.memmap):
+        return 0
+    return array.nbytes
+
+
+def _mapped_nbytes(array):
+    """Bytes of a memory-mapped array (0 for arrays in process memory)"""
+    return array.nbytes if isinstance(array, np.memmap) else 0
+
+
+class _Rows:
+    """Growable (ids, vectors) storage with amortized O(1) append and swap-remove
+
+    Vectors are kept as ``codes`` in the configured storage type. Quantized
+    rows can also keep the original float32 vectors in ``full`` for exact
+    rescoring. That array is always memory-mapped, never held in process
+    memory: from the saved index when loaded from disk, otherwise from a
+    temporary file in spill_dir, so a quantized index takes less memory than
+    a float32 one whether it was built or loaded.
+    """
+
+    SCORE_BLOCK = 256
+
+    def __init__(self, dim, storage="float32", keep_full=False, spill_dir=None):
+        self.dim = dim
+        self.storage = storage
+        self.spill_dir = spill_dir
+        self.n = 0
+        self._ids = np.empty(0, dtype=np.int64)
+        self._codes = np.empty((0, dim), dtype=quantize(np.zeros((0, dim)), storage)[0].dtype)
+        self._scales = np.empty(0, dtype=np.float32) if storage == "int8" else None
+        self._full = _spilled((0, dim)) if keep_full and storage != "float32" else None
+
+    @classmethod
+    def from_arrays(cls, dim, storage, ids, codes, scales=None, full=None, spill_dir=None):
+        """Wrap existing arrays without copying (e.g. slices of a loaded index)"""
+        rows = cls(dim, storage, spill_dir=spill_dir)
+        rows.n = len(ids)
+        rows._ids, rows._codes, rows._scales, rows._full = ids, codes, scales, full
+        return rows
+
+    @property
+    def ids(self):
+        return self._ids[:self.n]
+
+    @property
+    def codes(self):
+        return self._codes[:self.n]
+
+    @property
+    def scales(self):
+        return None if self._scales is None else self._scales[:self.n]
+
+    @property
+    def has_full(self):
+        return self._full is not None
+
+    @property
+    def full(self):
+        """Full-precision vectors, if kept"""
+        if self.storage == "float32":
+            return self.codes
+        return None if self._full is None else self._full[:self.n]
+
+    def vectors(self):
+        """Float32 vectors: the originals if kept, otherwise dequantized"""
+        if self.full is not None:
+            return np.asarray(self.full, dtype=np.float32)
+        vectors = self.codes.astype(np.float32)
+        if self._scales is not None:
+            vectors *= self.scales[:, None]
+        return vectors
+
+    @property
+    def nbytes(self):
+        return sum(_resident_nbytes(a) for a in (self._ids, self._codes, self._scales, self._full))
+
+    @property
+    def mapped_nbytes(self):
+        return sum(_mapped_nbytes(a) for a in (self._ids, self._codes, self._scales, self._full))
+
+    def _grow(self, capacity):
+        # Copying also materializes memory-mapped arrays, which are read-only on disk
+        def grown(array, spill=False):
+            if array is None:
+                return None
+            shape = (capacity,) + array.shape[1:]
+            new = _spilled(shape, array.dtype, self.spill_dir) if spill else np.empty(shape, dtype=array.dtype)
+            new[:self.n] = array[:self.n]
+            return new
+
+        self._ids = grown(self._ids)
+        self._codes = grown(self._codes)
+        self._scales = grown(self._scales)
+        self._full = grown(self._full, spill=True)
+
+    def append(self, ids, vecs) -> int:
+        """Append rows of float32 unit vectors and return the position of the first one"""
+        start = self.n
+        needed = self.n + len(ids)
+        if needed > len(self._ids):
+            self._grow(max(needed, 2 * len(self._ids), 16))
+
+        codes, scales = quantize(vecs, self.storage)
+        self._ids[start:needed] = ids
+        self._codes[start:needed] = codes
+        if self._scales is not None:
+            self._scales[start:needed] = scales
+        if self._full is not None:
+            self._full[start:needed] = vecs
+        self.n = needed
+        return start
+
+    def remove_at(self, pos):
+        """Remove the row at pos by moving the last row into it
+
+        Returns:
+            The id of the row that moved into pos, or None
+        """
+        last = self.n - 1
+        moved = None
+        if pos != last:
+            for array in (self._ids, self._codes, self._scales, self._full):
+                if array is not None:
+                    array[pos] = array[last]
+            moved = int(self._ids[pos])
+        self.n = last
+        return moved
+
+    def score(self, query):
+        """Approximate (storage-precision) dot products of all rows with query"""
+        if self.storage == "float32":
+            return self.codes @ query
+
+        # Dequantize block by block so the float32 temporary stays small
+        scores = np.empty(self.n, dtype=np.float32)
+        for start in range(0, self.n, self.SCORE_BLOCK):
+            block = self._codes[start:min(start + self.SCORE_BLOCK, self.n)]
+            scores[start:start + len(block)] = block.astype(np.float32) @ query
+        if self._scales is not None:
+            scores *= self.scales
+        return scores
+
+    def exact_scores(self, positions, query):
+        """Full-precision dot products for the given rows"""
+        return np.asarray(self.full[positions], dtype=np.float32) @ query
+
+
+class VectorIndex:
+    """Interface for cosine-similarity vector indexes
+
+    Vectors are identified by integer ids chosen by the caller (e.g. the row
+    of an article or chunk). All vectors are normalized on insert.
+
+    ``storage`` selects how vectors are held in memory ("float32", "float16"
+    or "int8" with a per-vector scale). Quantized indexes score with the
+    compressed vectors first and then rescore the best ``k * rescore``
+    candidates against the float32 originals, which are memory-mapped (from
+    a temporary file until the index is saved) rather than held in process
+    memory; ``rescore=0`` drops the originals entirely. int8 scans about as fast as float32 at a quarter of
+    the memory; float16 halves memory but NumPy's float16 casts make its
+    scans several times slower.
+
+    The temporary file goes in ``spill_dir`` (the system temporary directory
+    if None, which in a container is often RAM-backed tmpfs and would undo
+    the saving); load_index and load_or_build_index put it next to the
+    index. ``nbytes`` counts process memory and ``mapped_nbytes`` the
+    memory-mapped arrays.
+    """
+
+    kind = None
+
+    def __init__(self, dim, storage="float32", rescore=4, spill_dir=None):
+        if storage not in STORAGE_TYPES:
+            raise ValueError(f"Unknown vector storage type: {storage}")
+        self.dim = dim
+        self.storage = storage
+        self.rescore = rescore
+        self.spill_dir = spill_dir
+        # Bumped on every add/remove so callers can detect index changes
+        self.version = 0
+
+    def _new_rows(self):
+        return _Rows(self.dim, self.storage, keep_full=self.rescore > 0, spill_dir=self.spill_dir)
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def add(self, ids, vectors):
+        raise NotImplementedError
+
+    def remove(self, ids):
+        raise NotImplementedError
+
+    def search(self, query, k=5) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (ids, scores) of the k nearest vectors, best first"""
+        raise NotImplementedError
+
+    @property
+    def nbytes(self):
+        """Bytes held in process memory (excludes memory-mapped arrays)"""
+        raise NotImplementedError
+
+    @property
+    def mapped_nbytes(self):
+        """Bytes of memory-mapped arrays: rescoring vectors, and vectors loaded with mmap"""
+        raise NotImplementedError
+
+    def params(self):
+        return {"storage": self.storage, "rescore": self.rescore}
+
+    def save(self, path):
+        raise NotImplementedError
+
+    def _save_rows(self, path, rows_list):
+        np.save(os.path.join(path, "ids.npy"), np.concatenate([rows.ids for rows in rows_list]))
+        if self.storage == "float32":
+            np.save(os.path.join(path, "vectors.npy"), np.concatenate([rows.codes for rows in rows_list]))
+            return
+
+        np.save(os.path.join(path, "codes.npy"), np.concatenate([rows.codes for rows in rows_list]))
+        if self.storage == "int8":
+            np.save(os.path.join(path, "scales.npy"), np.concatenate([rows.scales for rows in rows_list]))
+        if self.rescore > 0:
+            np.save(os.path.join(path, "vectors.npy"), np.concatenate([rows.full for rows in rows_list]))
+
+    def _load_rows(self, path, sizes, mmap=False):
+        """Split saved arrays into _Rows of the given sizes without copying"""
+        ids = np.load(os.path.join(path, "ids.npy"))
+        scales = None
+        full = None
+
+        if self.storage == "float32":
+            codes = np.load(os.path.join(path, "vectors.npy"), mmap_mode="c" if mmap else None)
+        else:
+            codes = np.load(os.path.join(path, "codes.npy"), mmap_mode="c" if mmap else None)
+            if self.storage == "int8":
+                scales = np.load(os.path.join(path, "scales.npy"))
+            if self.rescore > 0:
+                # Rescoring touches a handful of rows per query, so keep them on disk
+                full = np.load(os.path.join(path, "vectors.npy"), mmap_mode="c")
+
+        rows_list = []
+        offset = 0
+        for size in sizes:
+            end = offset + size
+            rows_list.append(_Rows.from_arrays(
+                self.dim, self.storage, ids[offset:end], codes[offset:end],
+                None if scales is None else scales[offset:end],
+                None if full is None else full[offset:end],
+                spill_dir=self.spill_dir
+            ))
+            offset = end
+        return rows_list
+
+    def _write_manifest(self, path):
+        manifest = {
+            "kind": self.kind,
+            "dim": self.dim,
+            "count": len(self),
+            "version": self.version,
+            "params": self.params()
+        }
+        with open(os.path.join(path, "manifest.json"), "w") as f:
+            json.dump(manifest, f)
+
+
+class ExactIndex(VectorIndex):
+    """Brute-force NumPy index: one matrix-vector product per query"""
+
+    kind = "exact"
+
+    def __init__(self, dim, storage="float32", rescore=4, spill_dir=None):
+        super().__init__(dim, storage, rescore, spill_dir)
+        self._rows = self._new_rows()
+        self._pos = {}
+
+    def __len__(self):
+        return self._rows.n
+
+    @property
+    def nbytes(self):
+        return self._rows.nbytes
+
+    @property
+    def mapped_nbytes(self):
+        return self._rows.mapped_nbytes
+
+    def add(self, ids, vectors):
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = normalize(vectors).reshape(len(ids), self.dim)
+        ids, vectors = _dedupe(ids, vectors)
+
+        self.remove([i for i in ids if int(i) in self._pos])
+        start = self._rows.append(ids, vectors)
+        for offset, vector_id in enumerate(ids):
+            self._pos[int(vector_id)] = start + offset
+        self.version += 1
+
+    def remove(self, ids):
+        removed = False
+        for vector_id in ids:
+            pos = self._pos.pop(int(vector_id), None)
+            if pos is None:
+                continue
+            moved = self._rows.remove_at(pos)
+            if moved is not None:
+                self._pos[moved] = pos
+            removed = True
+        if removed:
+            self.version += 1
+
+    def search(self, query, k=5):
+        if not len(self):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        query = normalize(query)
+        scores = self._rows.score(query)
+
+        if self.storage != "float32" and self._rows.has_full:
+            candidates = _top_k(scores, k * self.rescore)
+            exact = self._rows.exact_scores(candidates, query)
+            top = np.argsort(-exact)[:k]
+            return self._rows.ids[candidates[top]], exact[top]
+
+        top = _top_k(scores, k)
+        return self._rows.ids[top], scores[top]
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        self._save_rows(path, [self._rows])
+        self._write_manifest(path)
+
+    @classmethod
+    def wrap(cls, ids, vectors):
+        """Index float32 unit vectors without copying them (e.g. a memory map)
+
+        The caller guarantees the rows are already normalized; appending
+        later copies them into process memory.
+        """
+        index = cls(vectors.shape[1])
+        index._rows = _Rows.from_arrays(index.dim, "float32", np.asarray(ids, dtype=np.int64), vectors)
+        index._pos = {int(v): i for i, v in enumerate(index._rows.ids)}
+        return index
+
+    @classmethod
+    def _load(cls, path, manifest, mmap=False, spill_dir=None):
+        index = cls(manifest["dim"], spill_dir=spill_dir, **manifest.get("params", {}))
+        index._rows = index._load_rows(path, [manifest["count"]], mmap=mmap)[0]
+        index._pos = {int(v): i for i, v in enumerate(index._rows.ids)}
+        index.version = manifest.get("version", 0)
+        return index
+
+
+class IVFIndex(VectorIndex):
+    """Inverted-file index: k-means coarse clustering, probe the nearest lists
+
+    Until ``train_size`` vectors have been added, everything lives in one list
+    and search is exact. Once trained, new vectors go to their nearest
+    centroid; centroids are not retrained on later inserts.
+    """
+
+    kind = "ivf"
+
+    def __init__(self, dim, nlist=256, nprobe=8, train_size=None, seed=0, storage="float32", rescore=4,
+                 spill_dir=None):
+        super().__init__(dim, storage, rescore, spill_dir)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_size = train_size or nlist * 39
+        self.seed = seed
+        self.centroids = None
+        self._lists = [self._new_rows()]
+        self._where = {}
+
+    def __len__(self):
+        return len(self._where)
+
+    @property
+    def trained(self):
+        return self.centroids is not None
+
+    @property
+    def nbytes(self):
+        total = sum(rows.nbytes for rows in self._lists)
+        if self.trained:
+            total += self.centroids.nbytes
+        return total
+
+    @property
+    def mapped_nbytes(self):
+        return sum(rows.mapped_nbytes for rows in self._lists)
+
+    def params(self):
+        params = super().params()
+        params.update({"nlist": self.nlist, "nprobe": self.nprobe, "train_size": self.train_size, "seed": self.seed})
+        return params
+
+    def _kmeans(self, vectors, iterations=10):
+        """Spherical k-means on a sample of the vectors"""
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(len(vectors), self.nlist * 256)
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+
+        centroids = sample[rng.choice(len(sample), self.nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for j in range(self.nlist):
+                members = sample[assign == j]
+                if len(members):
+                    centroids[j] = members.sum(axis=0)
+                else:
+                    # Re-seed empty clusters from a random sample vector
+                    centroids[j] = sample[rng.integers(len(sample))]
+            centroids = normalize(centroids)
+        return centroids
+
+    def _assign(self, vectors, batch_size=65536):
+        return np.concatenate([
+            np.argmax(vectors[i:i + batch_size] @ self.centroids.T, axis=1)
+            for i in range(0, len(vectors), batch_size)
+        ])
+
+    def train(self):
+        """Cluster the current vectors and redistribute them into nlist lists"""
+        ids = np.concatenate([rows.ids for rows in self._lists])
+        vectors = np.concatenate([rows.vectors() for rows in self._lists])
+        self.centroids = self._kmeans(vectors)
+        self._lists = [self._new_rows() for _ in range(self.nlist)]
+        self._where = {}
+        self._insert(ids, vectors)
+
+    def _insert(self, ids, vectors):
+        if not self.trained:
+            start = self._lists[0].append(ids, vectors)
+            for offset, vector_id in enumerate(ids):
+                self._where[int(vector_id)] = (0, start + offset)
+            return
+
+        assign = self._assign(vectors)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(self.nlist + 1))
+        for j in range(self.nlist):
+            members = order[bounds[j]:bounds[j + 1]]
+            if not len(members):
+                continue
+            start = self._lists[j].append(ids[members], vectors[members])
+            for offset, vector_id in enumerate(ids[members]):
+                self._where[int(vector_id)] = (j, start + offset)
+
+    def add(self, ids, vectors):
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = normalize(vectors).reshape(len(ids), self.dim)
+        ids, vectors = _dedupe(ids, vectors)
+
+        self.remove([i for i in ids if int(i) in self._where])
+        self._insert(ids, vectors)
+        if not self.trained and len(self) >= max(self.train_size, self.nlist):
+            self.train()
+        self.version += 1
+
+    def remove(self, ids):
+        removed = False
+        for vector_id in ids:
+            where = self._where.pop(int(vector_id), None)
+            if where is None:
+                continue
+            list_no, pos = where
+            moved = self._lists[list_no].remove_at(pos)
+            if moved is not None:
+                self._where[moved] = (list_no, pos)
+            removed = True
+        if removed:
+            self.version += 1
+
+    def search(self, query, k=5, nprobe=None):
+        query = normalize(query)
+        if not len(self):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        if self.trained:
+            probe = _top_k(self.centroids @ query, nprobe or self.nprobe)
+            lists = [self._lists[j] for j in probe if self._lists[j].n]
+        else:
+            lists = self._lists
+
+        # Fall back to an exact scan when the probed lists can't fill k
+        if sum(rows.n for rows in lists) < min(k, len(self)):
+            lists = [rows for rows in self._lists if rows.n]
+
+        ids = np.concatenate([rows.ids for rows in lists])
+        scores = np.concatenate([rows.score(query) for rows in lists])
+
+        if self.storage != "float32" and lists[0].has_full:
+            candidates = _top_k(scores, k * self.rescore)
+            owners = np.concatenate([np.full(rows.n, i) for i, rows in enumerate(lists)])
+            positions = np.concatenate([np.arange(rows.n) for rows in lists])
+            exact = np.array([
+                lists[owners[c]].exact_scores([positions[c]], query)[0] for c in candidates
+            ], dtype=np.float32)
+            top = np.argsort(-exact)[:k]
+            return ids[candidates[top]], exact[top]
+
+        top = _top_k(scores, k)
+        return ids[top], scores[top]
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        self._save_rows(path, self._lists)
+        np.save(os.path.join(path, "list_sizes.npy"), np.array([rows.n for rows in self._lists], dtype=np.int64))
+        if self.trained:
+            np.save(os.path.join(path, "centroids.npy"), self.centroids)
+        self._write_manifest(path)
+
+    @classmethod
+    def _load(cls, path, manifest, mmap=False, spill_dir=None):
+        index = cls(manifest["dim"], spill_dir=spill_dir, **manifest["params"])
+        sizes = np.load(os.path.join(path, "list_sizes.npy"))
+
+        centroids_path = os.path.join(path, "centroids.npy")
+        if os.path.exists(centroids_path):
+            index.centroids = np.load(centroids_path)
+
+        index._lists = index._load_rows(path, sizes, mmap=mmap)
+        for list_no, rows in enumerate(index._lists):
+            for pos, vector_id in enumerate(rows.ids):
+                index._where[int(vector_id)] = (list_no, pos)
+
+        index.version = manifest.get("version", 0)
+        return index
+
+
+INDEX_TYPES = {
+    ExactIndex.kind: ExactIndex,
+    IVFIndex.kind: IVFIndex
+}
+
+
+def create_index(kind, dim, **params) -> VectorIndex:
+    """Create an empty index of the given kind ('exact' or 'ivf')"""
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown vector index type: {kind}")
+    return INDEX_TYPES[kind](dim, **params)
+
+
+def build_index(kind, vectors, ids=None, **params) -> VectorIndex:
+    """Create an index of the given kind and bulk-load vectors into it"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    index = create_index(kind, vectors.shape[1], **params)
+    index.add(np.arange(len(vectors)) if ids is None else ids, vectors)
+    return index
+
+
+def load_or_build_index(path, kind, vectors, source_path=None, mmap=True, spill_dir=None,
+                        **params) -> VectorIndex:
+    """Reuse the index saved at path if it still matches, otherwise build it and save it there
+
+    A saved index is reused when it has the requested kind, parameters and
+    vector count and is newer than source_path (the file the vectors came
+    from). Loaded with mmap, processes serving the same files share the
+    vectors through the page cache. Temporary rescoring vectors go in
+    spill_dir, by default the directory holding the index.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    spill_dir = spill_dir or os.path.dirname(os.path.abspath(path))
+    try:
+        manifest_path = os.path.join(path, "manifest.json")
+        if source_path is None or os.path.getmtime(manifest_path) >= os.path.getmtime(source_path):
+            index = load_index(path, mmap=mmap, spill_dir=spill_dir)
+            expected = create_index(kind, vectors.shape[1], **params)
+            if (index.kind, index.dim, index.params(), len(index)) == \
+                    (expected.kind, expected.dim, expected.params(), len(vectors)):
+                return index
+    except (OSError, ValueError, KeyError):
+        pass
+
+    index = build_index(kind, vectors, spill_dir=spill_dir, **params)
+    try:
+        index.save(path)
+    except OSError as e:
+        print(f"Could not save vector index to {path}: {e}")
+    return index
+
+
+def load_index(path, mmap=False, spill_dir=None) -> VectorIndex:
+    """Load an index saved with VectorIndex.save
+
+    Args:
+        mmap: Memory-map the primary vectors instead of reading them into RAM
+            (full-precision rescoring vectors are always memory-mapped)
+        spill_dir: Where rescoring vectors go once the index grows past what
+            was saved; defaults to the directory holding the index
+    """
+    with open(os.path.join(path, "manifest.json")) as f:
+        manifest = json.load(f)
+    if manifest["kind"] not in INDEX_TYPES:
+        raise ValueError(f"Unknown vector index type: {manifest['kind']}")
+    spill_dir = spill_dir or os.path.dirname(os.path.abspath(path))
+    return INDEX_TYPES[manifest["kind"]]._load(path, manifest, mmap=mmap, spill_dir=spill_dir)